@@ -0,0 +1,93 @@
+"""
+Bytes, requests and load time per place under every resource blocking profile.
+
+Every profile gets a fresh Chrome browser (the image setting is fixed at launch) that loads the same place URLs
+and extracts them. Chrome does not report the size of blocked requests, so the savings are measured against the
+NONE profile. The missing fields column shows that blocking does not cost any data.
+Run from the repository root (a Chrome install is required), with one place URL per line in the file:
+    python benchmarks/bench_blocking.py places.txt -p none media lean -r blocking.json
+"""
+
+from os.path import dirname, abspath
+from argparse import ArgumentParser
+from tempfile import mkdtemp
+from time import perf_counter
+from threading import Lock
+import json
+import sys
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from utils.resource_blocking import BlockingProfile  # noqa: E402
+from utils.network_monitor import NetworkMonitor  # noqa: E402
+from utils.google_maps_scraper import GoogleMaps  # noqa: E402
+from utils.metrics import MetricsRegistry  # noqa: E402
+
+
+def run_profile(profile_name: str, place_urls: list, headless: bool) -> dict:
+    metrics = MetricsRegistry()
+    monitor = NetworkMonitor()
+    driver = GoogleMaps.build_chrome_driver(headless=headless, blocking_profile=BlockingProfile(profile_name),
+                                            performance_log=True)
+    maps_obj = GoogleMaps(headless=headless, output_path=mkdtemp(prefix="gmaps_bench_"), verbose=False,
+                          print_lock=Lock(), metrics=metrics)
+    maps_obj.attach_driver(driver)
+    # Status printing is not part of the measured cost
+    maps_obj._print.print_with_lock = lambda *args, **kwargs: None
+
+    places = []
+    try:
+        for place_url in place_urls:
+            monitor.read_events(driver)
+            start_time = perf_counter()
+            driver.get(place_url)
+            maps_obj._scrape_result_and_store(driver=driver, result="continue", query="benchmark",
+                                              results_indices=[1, 1])
+            seconds = perf_counter() - start_time
+            summary = monitor.summarize(monitor.read_events(driver))
+            places.append({**summary, "seconds": seconds})
+    finally:
+        driver.quit()
+
+    missing = sum(counter["value"] for counter in metrics.snapshot()["counters"]
+                  if counter["name"] == "gmaps_field_missing_total")
+    count = max(1, len(places))
+    return {"profile": profile_name, "places": len(places),
+            "kb_per_place": round(sum(place["bytes"] for place in places) / 1024 / count, 1),
+            "requests_per_place": round(sum(place["requests"] for place in places) / count, 1),
+            "blocked_per_place": round(sum(place["blocked"] for place in places) / count, 1),
+            "seconds_per_place": round(sum(place["seconds"] for place in places) / count, 3),
+            "missing_fields": int(missing)}
+
+
+def main():
+    parser = ArgumentParser(description="Network cost per place of the resource blocking profiles")
+    parser.add_argument("url_file", help="Text file with one Google Maps place URL per line")
+    parser.add_argument("-p", "--profiles", nargs="+", default=["none", "media", "lean"],
+                        choices=list(BlockingProfile.profiles), help="Profiles to compare (default: none media lean)")
+    parser.add_argument("-n", "--places", type=int, default=10, help="Places loaded per profile (default: 10)")
+    parser.add_argument("-wb", "--windowed-browser", action="store_false", default=True, help="Disable headless")
+    parser.add_argument("-r", "--report", help="JSON report path")
+    args = parser.parse_args()
+
+    with open(args.url_file, "r", encoding="utf-8") as f:
+        place_urls = [line.strip() for line in f if line.strip()][:args.places]
+
+    runs = [run_profile(profile, place_urls, args.windowed_browser) for profile in args.profiles]
+    baseline = next((run for run in runs if run["profile"] == "none"), None)
+    for run in runs:
+        saved = ""
+        if baseline and baseline["kb_per_place"] and run is not baseline:
+            saved = f" saved={(1 - run['kb_per_place'] / baseline['kb_per_place']) * 100:.0f}%"
+        print(f"{run['profile']:>6}: {run['kb_per_place']:>8.1f} KB/place {run['requests_per_place']:>6.1f} requests "
+              f"{run['blocked_per_place']:>6.1f} blocked {run['seconds_per_place']:.3f}s/place "
+              f"missing fields={run['missing_fields']}{saved}")
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"places": len(place_urls), "runs": runs}, f, indent=2)
+        print(f"report written to {args.report}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Email extraction on the saved contact pages: the old per-character scan against the single finditer pass.
+
+Each fixture is padded to about --size-kb of HTML so the numbers reflect large real-world pages.
+    python benchmarks/bench_email_extraction.py --size-kb 500
+"""
+
+from os.path import dirname, abspath, join, basename
+from argparse import ArgumentParser
+from time import perf_counter
+from re import compile
+from glob import glob
+import sys
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from utils.web_site_scraper import PatternScrapper  # noqa: E402
+
+FIXTURES = join(dirname(abspath(__file__)), "fixtures", "contact_pages")
+LEGACY_EMAIL_PATTERN = compile(r'([a-zA-Z0-9._-]+@[a-zA-Z0-9._-]+\.[a-zA-Z0-9_-]+)*')
+
+
+def legacy_scan(source: str) -> list:
+    """The scan get_pattern_data used before: one regex search per character of the page."""
+    return [x for x in source if LEGACY_EMAIL_PATTERN.search(x).group()]
+
+
+def pad_source(source: str, size_kb: int) -> str:
+    filler = "<div class=\"row\"><p>Lorem ipsum dolor sit amet, consectetur adipiscing elit.</p></div>\n"
+    body_end = source.rfind("</body>")
+    repeat = max(0, size_kb * 1024 - len(source)) // len(filler)
+    return source[:body_end] + filler * repeat + source[body_end:]
+
+
+def timed(function, *args, repeat: int = 3) -> tuple:
+    best, result = None, None
+    for _ in range(repeat):
+        start_time = perf_counter()
+        result = function(*args)
+        elapsed = perf_counter() - start_time
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = ArgumentParser(description="Email extraction micro-benchmark")
+    parser.add_argument("--size-kb", type=int, default=500, help="Pad every fixture to this size (default: 500)")
+    parser.add_argument("--skip-legacy", action="store_true", help="Only measure the new extractor")
+    args = parser.parse_args()
+
+    scrapper = PatternScrapper()
+    for fixture in sorted(glob(join(FIXTURES, "*.html"))):
+        with open(fixture, "r", encoding="utf-8") as f:
+            source = pad_source(f.read(), args.size_kb)
+
+        new_seconds, emails = timed(scrapper.extract_emails, source)
+        line = f"{basename(fixture):<26} {len(source) / 1024:.0f}KB  finditer {new_seconds * 1000:8.2f}ms"
+        if not args.skip_legacy:
+            legacy_seconds, _ = timed(legacy_scan, source, repeat=1)
+            line += f"  per-character {legacy_seconds * 1000:8.2f}ms  ({legacy_seconds / new_seconds:.0f}x)"
+        print(line)
+        print(f"    emails: {emails}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Counts the WebDriver commands and the time spent per place for the FIELD and BATCH extraction modes.
+
+Run from the repository root (a Chrome install is required):
+    python benchmarks/bench_extraction.py "https://www.google.com/maps/place/..." -n 5
+"""
+
+from os.path import dirname, abspath
+from argparse import ArgumentParser
+from tempfile import mkdtemp
+from threading import Lock
+from time import time
+import sys
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from utils.google_maps_scraper import GoogleMaps  # noqa: E402
+
+
+class CommandCounter:
+    """Wraps WebDriver.execute, the single entry point every WebDriver command goes through."""
+
+    def __init__(self, driver) -> None:
+        self.commands = 0
+        self._execute = driver.execute
+        driver.execute = self._counted_execute
+
+    def _counted_execute(self, driver_command, params=None):
+        self.commands += 1
+        return self._execute(driver_command, params)
+
+
+def run_mode(driver, counter: CommandCounter, place_url: str, mode: str, repeat: int) -> dict:
+    maps_obj = GoogleMaps(headless=True, output_path=mkdtemp(prefix="gmaps_bench_"), verbose=False,
+                          print_lock=Lock(), extraction_mode=mode)
+    maps_obj.attach_driver(driver)
+    # Status printing is not part of the extraction cost
+    maps_obj._print.print_with_lock = lambda *args, **kwargs: None
+
+    commands, seconds = [], []
+    for _ in range(repeat):
+        driver.get(place_url)
+        counter.commands = 0
+        start_time = time()
+        maps_obj._scrape_result_and_store(driver=driver, result="continue", query="benchmark",
+                                          results_indices=[1, 1])
+        seconds.append(time() - start_time)
+        commands.append(counter.commands)
+
+    return {"mode": mode, "commands_per_place": sum(commands) / repeat, "seconds_per_place": sum(seconds) / repeat}
+
+
+def main():
+    parser = ArgumentParser(description="WebDriver commands per place, FIELD vs BATCH extraction")
+    parser.add_argument("place_url", help="Google Maps place URL to extract repeatedly")
+    parser.add_argument("-n", "--repeat", type=int, default=3, help="Extractions per mode (default: 3)")
+    parser.add_argument("-wb", "--windowed-browser", action="store_false", default=True, help="Disable headless")
+    args = parser.parse_args()
+
+    driver = GoogleMaps.build_chrome_driver(headless=args.windowed_browser)
+    counter = CommandCounter(driver)
+    try:
+        for mode in ("field", "batch"):
+            report = run_mode(driver, counter, args.place_url, mode, args.repeat)
+            print(f"{report['mode']:>6}: {report['commands_per_place']:.1f} commands/place, "
+                  f"{report['seconds_per_place']:.3f}s/place")
+    finally:
+        driver.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Website enrichment over HTTP against a local server serving the saved contact pages.
+
+Checks the extracted fields, that JavaScript-only pages are reported for the browser fallback, and measures
+how many sites per second the pooled client handles with simulated server latency.
+    python benchmarks/bench_http_enrichment.py --latency 0.05 --sites 200 --threads 16
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from os.path import dirname, abspath, basename
+from argparse import ArgumentParser
+from time import perf_counter
+from glob import glob
+import sys
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from utils.web_site_scraper import PatternScrapper  # noqa: E402
+from utils.http_fetcher import HTTPPageFetcher  # noqa: E402
+from bench_email_extraction import FIXTURES  # noqa: E402
+from local_server import LocalFixtureServer  # noqa: E402
+
+
+def main():
+    parser = ArgumentParser(description="HTTP website enrichment against a local fixture server")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds of server latency (default: 0.05)")
+    parser.add_argument("--sites", type=int, default=200, help="Sites to enrich in the throughput run")
+    parser.add_argument("--threads", type=int, default=16, help="Concurrent enrichments (default: 16)")
+    args = parser.parse_args()
+
+    pages = sorted(basename(path) for path in glob(FIXTURES + "/*.html"))
+    fetcher = HTTPPageFetcher(per_host_limit=args.threads, pool_size=args.threads)
+    scrapper = PatternScrapper(page_fetcher=fetcher)
+
+    with LocalFixtureServer(FIXTURES, latency=args.latency) as server:
+        sources, browser_urls = scrapper.get_source_code_http([server.base_url + page for page in pages])
+        print(f"fetched {len(sources)} pages over HTTP, browser fallback for: "
+              f"{[basename(url) for url in browser_urls]}")
+        for page in pages:
+            print(f"  {page:<26} {scrapper.find_patterns(None, server.base_url, [page])}")
+
+        start_time = perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as executor:
+            list(executor.map(lambda _: scrapper.find_patterns(None, server.base_url, pages), range(args.sites)))
+        elapsed = perf_counter() - start_time
+        print(f"{args.sites} sites x {len(pages)} pages in {elapsed:.2f}s: {args.sites / elapsed:.1f} sites/s "
+              f"with {args.latency * 1000:.0f}ms server latency")
+    fetcher.close()
+
+
+if __name__ == '__main__':
+    main()
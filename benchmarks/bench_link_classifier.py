@@ -0,0 +1,63 @@
+"""
+Social link extraction on the saved contact pages: five find_all passes over a BeautifulSoup tree against
+the single-pass classifier with each available parser. The script exits non-zero if the results differ.
+    python benchmarks/bench_link_classifier.py --size-kb 500
+"""
+
+from os.path import dirname, abspath, join, basename
+from argparse import ArgumentParser
+from bs4 import BeautifulSoup
+from re import compile
+from glob import glob
+import sys
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from utils.web_site_scraper import PatternScrapper, HTMLParser, lxml_html  # noqa: E402
+from bench_email_extraction import FIXTURES, pad_source, timed  # noqa: E402
+
+LEGACY_PATTERNS = {
+    "facebook_links": compile(r'(?:https?://)?(?:www\.)?facebook\.com/\S+'),
+    "twitter_links": compile(r'(?:https?://)?(?:www\.)?twitter\.com/\S+'),
+    "instagram_links": compile(r'(?:https?://)?(?:www\.)?instagram\.com/\S+'),
+    "youtube_links": compile(r'(?:https?://)?(?:www\.)?youtube\.com/\S+'),
+    "linkedin_links": compile(r'(?:https?://)?(?:www\.)?linkedin\.com/\S+'),
+}
+
+
+def legacy_links(source: str) -> dict:
+    """What get_pattern_data did before: build a soup, then one find_all per social network."""
+    soup = BeautifulSoup(source, features="lxml")
+    return {bucket: [link['href'] for link in soup.find_all('a', href=pattern)]
+            for bucket, pattern in LEGACY_PATTERNS.items()}
+
+
+def main():
+    parser = ArgumentParser(description="Single-pass link classifier benchmark")
+    parser.add_argument("--size-kb", type=int, default=500, help="Pad every fixture to this size (default: 500)")
+    args = parser.parse_args()
+
+    parsers = ["soup"] + (["lxml"] if lxml_html is not None else []) + (["selectolax"] if HTMLParser else [])
+    mismatches = 0
+    for fixture in sorted(glob(join(FIXTURES, "*.html"))):
+        with open(fixture, "r", encoding="utf-8") as f:
+            source = pad_source(f.read(), args.size_kb)
+
+        legacy_seconds, expected = timed(legacy_links, source)
+        line = f"{basename(fixture):<26} legacy {legacy_seconds * 1000:8.2f}ms"
+        for link_parser in parsers:
+            scrapper = PatternScrapper(link_parser=link_parser)
+            seconds, links = timed(scrapper.classify_links, source)
+            links.pop("mailto")
+            if links != expected:
+                mismatches += 1
+                line += f"  {link_parser} MISMATCH"
+            else:
+                line += f"  {link_parser} {seconds * 1000:7.2f}ms ({legacy_seconds / seconds:.0f}x)"
+        print(line)
+
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Per-record write cost of the output writers at the start and at the end of a run.
+
+A writer that scales shows about the same microseconds per record in the first and the last slice.
+    python benchmarks/bench_output_writers.py -f JSONL -n 100000
+    python benchmarks/bench_output_writers.py -f EXCEL -n 50000
+    python benchmarks/bench_output_writers.py -f EXCEL -n 50000 -ef 1000
+    python benchmarks/bench_output_writers.py -f JSON -n 2000
+"""
+
+from os.path import dirname, abspath
+from argparse import ArgumentParser
+from tempfile import mkdtemp
+from threading import Lock
+from time import perf_counter
+from shutil import rmtree
+import sys
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from utils.output_files_formats import create_file_creator  # noqa: E402
+
+
+def sample_record(index: int) -> dict:
+    return {
+        "title": f"Place {index}", "map_link": f"https://www.google.com/maps/place/{index}",
+        "cover_image": "https://lh5.googleusercontent.com/p/AF1QipN", "rating": "4.5", "privacy_price": "$$",
+        "category": "Restaurant", "address": f"{index} Main Street, Berlin", "working_hours": "Monday,9AM-5PM",
+        "menu_link": "Not Available", "webpage": "https://example.com/", "phone_number": "+49 30 123456",
+        "related_images": "https://lh5.googleusercontent.com/a,https://lh5.googleusercontent.com/b",
+        "latitude": "52.52", "longitude": "13.40", "site_email": "info@example.com",
+        "facebook_links": "Not Available", "twitter_links": "Not Available", "instagram_links": "Not Available",
+        "youtube_links": "Not Available", "linkedin_links": "Not Available", "about_desc": "Not Available",
+    }
+
+
+def run(output_format: str, records: int, slice_percent: int, flush_rows: int = 0) -> dict:
+    output_path = mkdtemp(prefix="gmaps_bench_")
+    writer = create_file_creator(output_format=output_format, file_lock=Lock(), output_path=output_path,
+                                 excel_flush_rows=flush_rows)
+    timings = []
+    try:
+        for index in range(records):
+            record = [sample_record(index)]
+            start_time = perf_counter()
+            writer.create(list_of_dict_data=record)
+            timings.append(perf_counter() - start_time)
+        start_time = perf_counter()
+        writer.close()
+        close_seconds = perf_counter() - start_time
+    finally:
+        rmtree(output_path, ignore_errors=True)
+
+    slice_size = max(1, records * slice_percent // 100)
+    return {
+        "format": output_format,
+        "records": records,
+        "first_us_per_record": sum(timings[:slice_size]) / slice_size * 1e6,
+        "last_us_per_record": sum(timings[-slice_size:]) / slice_size * 1e6,
+        "total_seconds": sum(timings) + close_seconds,
+        "close_seconds": close_seconds,
+    }
+
+
+def main():
+    parser = ArgumentParser(description="Output writer cost per record")
+    parser.add_argument("-f", "--formats", action="append", default=[],
+                        choices=["CSV", "EXCEL", "JSON", "JSONL"],
+                        help="Formats to measure (default: CSV, EXCEL and JSONL, keep -n small for JSON)")
+    parser.add_argument("-n", "--records", type=int, default=10000, help="Records to write (default: 10000)")
+    parser.add_argument("-s", "--slice", type=int, default=10, help="Percent of records per slice (default: 10)")
+    parser.add_argument("-ef", "--flush-rows", type=int, default=0,
+                        help="Rewrite the EXCEL workbook every this many rows like maps.py -ef, the flushes are "
+                             "counted in the record that triggers them (default: 0, only at the end)")
+    args = parser.parse_args()
+
+    for output_format in args.formats or ["CSV", "EXCEL", "JSONL"]:
+        report = run(output_format, args.records, args.slice, args.flush_rows)
+        print(f"{report['format']:>6}: {report['records']} records in {report['total_seconds']:.2f}s "
+              f"(close {report['close_seconds']:.2f}s), first {report['first_us_per_record']:.1f}us/record, "
+              f"last {report['last_us_per_record']:.1f}us/record")
+
+
+if __name__ == '__main__':
+    main()
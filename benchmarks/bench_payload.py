@@ -0,0 +1,125 @@
+"""
+PAYLOAD extraction against the DOM extraction modes: WebDriver commands and time per place, and how many
+fields the payload decoding agrees on with the per-field DOM getters.
+
+Offline, the places are replayed by the FIXTURE backend from the recorded payloads of
+benchmarks/fixtures/maps/payloads. With a place URL the same comparison runs on Google Maps in Chrome:
+    python benchmarks/bench_payload.py -n 50
+    python benchmarks/bench_payload.py -n 3 --place-url "https://www.google.com/maps/place/..."
+"""
+
+from os.path import dirname, abspath, join
+from argparse import ArgumentParser
+from tempfile import mkdtemp
+from time import perf_counter
+from threading import Lock
+from glob import glob
+import sys
+
+ROOT = dirname(dirname(abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.maps_payload import MapsPayloadDecoder  # noqa: E402
+from utils.browser_backends import FixtureDriver  # noqa: E402
+from utils.google_maps_scraper import GoogleMaps  # noqa: E402
+from bench_extraction import CommandCounter  # noqa: E402
+
+FIXTURES = join(ROOT, "benchmarks", "fixtures", "maps")
+MODES = ("field", "batch", "payload")
+
+
+class RecordCollector:
+    """File creator keeping the records in memory."""
+
+    def __init__(self) -> None:
+        self.records = []
+
+    def create(self, list_of_dict_data: list) -> None:
+        self.records.extend(list_of_dict_data)
+
+
+def fixture_place_urls(count: int) -> list:
+    return [f"https://www.google.com/maps/place/Benchmark+Place+{index}/data=!4m7!3m6!1s0x47a85{index:06x}:0x{index:x}"
+            f"!8m2!3d52.{5000 + index}!4d13.{4000 + index}!16s%2Fg%2F11bench{index}!19sChIJbench{index}?hl=en"
+            for index in range(1, count + 1)]
+
+
+def run_mode(driver, counter: CommandCounter, place_urls: list, mode: str) -> dict:
+    collector = RecordCollector()
+    maps_obj = GoogleMaps(headless=True, output_path=mkdtemp(prefix="gmaps_bench_"), verbose=False,
+                          print_lock=Lock(), extraction_mode=mode, file_creator=collector, defer_enrichment=True,
+                          wait_time=2)
+    maps_obj.attach_driver(driver)
+    # Status printing is not part of the extraction cost
+    maps_obj._print.print_with_lock = lambda *args, **kwargs: None
+
+    commands, seconds = 0, 0.0
+    for place_url in place_urls:
+        driver.get(place_url)
+        counter.commands = 0
+        start_time = perf_counter()
+        maps_obj._scrape_result_and_store(driver=driver, result="continue", query="benchmark",
+                                          results_indices=[1, 1], open_in_tab=False)
+        seconds += perf_counter() - start_time
+        commands += counter.commands
+    return {"mode": mode, "records": collector.records, "commands_per_place": commands / len(place_urls),
+            "ms_per_place": seconds / len(place_urls) * 1000}
+
+
+def agreement(records: list, reference: list) -> tuple[int, int, list]:
+    matching, total, differences = 0, 0, set()
+    for record, expected in zip(records, reference):
+        for name, value in expected.items():
+            total += 1
+            if record.get(name) == value:
+                matching += 1
+            else:
+                differences.add(name)
+    return matching, total, sorted(differences)
+
+
+def check_recorded_payloads() -> None:
+    decoder = MapsPayloadDecoder()
+    for path in sorted(glob(join(FIXTURES, "payloads", "*.txt"))):
+        with open(path, "r", encoding="utf-8") as f:
+            data = decoder.parse(f.read())
+        preview = decoder.place_from_preview(data)
+        places = [preview] if preview else decoder.places_from_search(data)
+        decoded = [decoder.decode_place(place) for place in places]
+        fields = sum(len(place_fields) for place_fields in decoded)
+        print(f"{path[len(FIXTURES) + 1:]:<32} {len(places)} places, {fields} fields decoded")
+
+
+def main():
+    parser = ArgumentParser(description="PAYLOAD vs DOM extraction: commands, time and field agreement per place")
+    parser.add_argument("-n", "--places", type=int, default=20, help="Places extracted per mode (default: 20)")
+    parser.add_argument("--command-latency", type=float, default=0.002,
+                        help="Seconds per WebDriver command of the fixture browser (default: 0.002)")
+    parser.add_argument("--place-url", help="Compare on this Google Maps place URL in Chrome instead of the fixtures")
+    parser.add_argument("-wb", "--windowed-browser", action="store_false", default=True, help="Disable headless")
+    args = parser.parse_args()
+
+    if args.place_url:
+        driver = GoogleMaps.build_chrome_driver(headless=args.windowed_browser, performance_log=True)
+        place_urls = [args.place_url] * args.places
+    else:
+        check_recorded_payloads()
+        driver = FixtureDriver(FIXTURES, command_latency=args.command_latency, network_log=True)
+        place_urls = fixture_place_urls(args.places)
+
+    counter = CommandCounter(driver)
+    try:
+        reports = [run_mode(driver, counter, place_urls, mode) for mode in MODES]
+    finally:
+        driver.quit()
+
+    reference = reports[0]["records"]
+    for report in reports:
+        matching, total, differences = agreement(report["records"], reference)
+        print(f"{report['mode']:>8}: {report['commands_per_place']:6.1f} commands/place "
+              f"{report['ms_per_place']:8.1f} ms/place, {matching}/{total} fields equal to FIELD"
+              + (f" (differs: {', '.join(differences)})" if differences else ""))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,241 @@
+"""
+End-to-end throughput of the whole FastSearchAlgo pipeline, offline.
+
+The Maps pages are replayed by the FIXTURE browser backend and the websites of the places are served by a
+local HTTP server with the saved contact pages. Every combination of --workers, --formats and --enrichment
+runs in a fresh process and reports places/s, p50/p95/p99 per stage, peak RSS and WebDriver commands.
+The report is written as JSON, --compare prints the change against the report of another commit.
+    python benchmarks/bench_pipeline.py -w 1 4 -f CSV JSONL -e off http -r pipeline.json
+    python benchmarks/bench_pipeline.py -w 4 --compare pipeline.json -r pipeline_new.json
+"""
+
+from os.path import dirname, abspath, basename
+from contextlib import redirect_stdout
+from multiprocessing import get_context
+from argparse import ArgumentParser
+from tempfile import mkdtemp
+from threading import Thread, Event, Lock
+from time import perf_counter, time
+from functools import wraps
+from shutil import rmtree
+from psutil import Process
+from glob import glob
+import subprocess
+import platform
+import json
+import sys
+import os
+
+ROOT = dirname(dirname(abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.threading_controller import FastSearchAlgo  # noqa: E402
+from utils.browser_backends import FixtureBackend  # noqa: E402
+from utils.google_maps_scraper import GoogleMaps  # noqa: E402
+from utils.enrichment_stage import EnrichmentStage  # noqa: E402
+from utils.output_sink import OutputSink  # noqa: E402
+from bench_email_extraction import FIXTURES  # noqa: E402
+from bench_extraction import CommandCounter  # noqa: E402
+from local_server import LocalFixtureServer  # noqa: E402
+
+# Stage name -> (class, method) timed around every call
+STAGES = {
+    "harvest": (GoogleMaps, "harvest_links"),
+    "scrape_place": (GoogleMaps, "scrape_place"),
+    "tab_query": (GoogleMaps, "start_scrapper"),
+    "extract": (GoogleMaps, "_scrape_result_and_store"),
+    "enrich": (EnrichmentStage, "_enrich"),
+    "sink_write": (OutputSink, "_write"),
+}
+
+
+class StageTimer:
+    """Records the duration of every call of the STAGES methods, from any thread."""
+
+    def __init__(self) -> None:
+        self.samples = {stage: [] for stage in STAGES}
+        self._lock = Lock()
+
+    def install(self) -> None:
+        for stage, (owner, method_name) in STAGES.items():
+            setattr(owner, method_name, self._timed(stage, getattr(owner, method_name)))
+
+    def _timed(self, stage: str, method):
+        @wraps(method)
+        def timed_method(*args, **kwargs):
+            start_time = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start_time
+                with self._lock:
+                    self.samples[stage].append(elapsed)
+        return timed_method
+
+    def summary(self) -> dict:
+        return {stage: summarize(samples) for stage, samples in self.samples.items() if samples}
+
+
+class PeakRSS(Thread):
+    """Samples the resident memory of this process until stopped."""
+
+    def __init__(self, interval: float = 0.05) -> None:
+        super().__init__(name="PeakRSS", daemon=True)
+        self._interval = interval
+        self._stop_event = Event()
+        self.peak_bytes = 0
+
+    def run(self) -> None:
+        process = Process()
+        while True:
+            self.peak_bytes = max(self.peak_bytes, process.memory_info().rss)
+            if self._stop_event.wait(self._interval):
+                return
+
+    def stop(self) -> float:
+        self._stop_event.set()
+        self.join()
+        return round(self.peak_bytes / 1024 / 1024, 1)
+
+
+def percentile(sorted_samples: list, fraction: float) -> float:
+    """Nearest-rank percentile of already sorted samples."""
+    index = min(len(sorted_samples) - 1, max(0, int(round(fraction * len(sorted_samples) + 0.5)) - 1))
+    return sorted_samples[index]
+
+
+def summarize(samples: list) -> dict:
+    ordered = sorted(samples)
+    return {"count": len(ordered), "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+            "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+            "total_s": round(sum(ordered), 3)}
+
+
+def run_config(config: dict) -> dict:
+    """
+    Run the pipeline once with one configuration, meant to run in its own process.
+        :param config: "name", "workers", "output_format", "enrichment", "place_mode", "queries",
+                       "results_per_query", "command_latency", "page_load_latency" and "site_url".
+        :return: The measurements of the run.
+    """
+
+    timer = StageTimer()
+    timer.install()
+    counters = []
+    backend = FixtureBackend(command_latency=config["command_latency"],
+                             page_load_latency=config["page_load_latency"],
+                             results_per_query=config["results_per_query"], website_url=config["site_url"])
+    create_driver = backend.create_driver
+
+    def counted_driver():
+        driver = create_driver()
+        counters.append(CommandCounter(driver))
+        return driver
+
+    backend.create_driver = counted_driver
+    enrich = config["enrichment"] == "http"
+    output_path = mkdtemp(prefix="gmaps_pipeline_")
+    algo_obj = FastSearchAlgo(headless=True, wait_time=5, output_path=output_path, workers=config["workers"],
+                              output_format=config["output_format"], place_mode=config["place_mode"],
+                              suggested_ext=[basename(page) for page in glob(FIXTURES + "/*.html")] if enrich else [],
+                              enrichment_mode="http", enrichment_workers=16 if enrich else 0,
+                              verbose=False, browser_backend=backend)
+    queries = [f"benchmark query {index}" for index in range(config["queries"])]
+
+    rss = PeakRSS()
+    rss.start()
+    start_time = perf_counter()
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        algo_obj.fast_search_algorithm(queries)
+    seconds = perf_counter() - start_time
+    peak_rss_mb = rss.stop()
+    places = algo_obj._output_sink.records_written
+    rmtree(output_path, ignore_errors=True)
+
+    commands = sum(counter.commands for counter in counters)
+    return {"config": config["name"], "workers": config["workers"], "output_format": config["output_format"],
+            "enrichment": config["enrichment"], "place_mode": config["place_mode"], "places": places,
+            "seconds": round(seconds, 3), "places_per_sec": round(places / seconds, 2) if seconds else 0,
+            "peak_rss_mb": peak_rss_mb, "webdriver_commands": commands,
+            "commands_per_place": round(commands / places, 1) if places else 0, "stages": timer.summary()}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(report: dict, baseline_path: str) -> None:
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {run["config"]: run for run in json.load(f)["runs"]}
+    print(f"\nagainst {baseline_path}:")
+    for run in report["runs"]:
+        old = baseline.get(run["config"])
+        if old is None or not old["places_per_sec"]:
+            print(f"  {run['config']:<28} no baseline")
+            continue
+        change = (run["places_per_sec"] - old["places_per_sec"]) / old["places_per_sec"] * 100
+        print(f"  {run['config']:<28} {old['places_per_sec']:>8.1f} -> {run['places_per_sec']:>8.1f} places/s "
+              f"({change:+.1f}%), commands/place {old['commands_per_place']} -> {run['commands_per_place']}")
+
+
+def main():
+    parser = ArgumentParser(description="Offline end-to-end benchmark of the FastSearchAlgo pipeline")
+    parser.add_argument("-w", "--workers", type=int, nargs="+", default=[1, 4], help="Worker counts (default: 1 4)")
+    parser.add_argument("-f", "--formats", nargs="+", default=["CSV", "JSONL"],
+                        choices=["CSV", "EXCEL", "JSON", "JSONL"], help="Output formats (default: CSV JSONL)")
+    parser.add_argument("-e", "--enrichment", nargs="+", default=["off", "http"], choices=["off", "http"],
+                        help="Website enrichment settings (default: off http)")
+    parser.add_argument("-pm", "--place-mode", default="url", choices=["url", "tab"], help="Place mode (default: url)")
+    parser.add_argument("-q", "--queries", type=int, default=4, help="Queries per run (default: 4)")
+    parser.add_argument("-n", "--results", type=int, default=20, help="Places per query (default: 20)")
+    parser.add_argument("--command-latency", type=float, default=0.002,
+                        help="Seconds per WebDriver command (default: 0.002)")
+    parser.add_argument("--page-latency", type=float, default=0.05,
+                        help="Seconds per page load or page of results (default: 0.05)")
+    parser.add_argument("--site-latency", type=float, default=0.02,
+                        help="Seconds of latency of the local website server (default: 0.02)")
+    parser.add_argument("-r", "--report", default="pipeline_report.json", help="JSON report path")
+    parser.add_argument("--compare", help="Earlier JSON report to compare the places/s with")
+    args = parser.parse_args()
+
+    context = get_context("spawn")
+    report = {"commit": git_commit(), "created_at": time(), "python": platform.python_version(),
+              "platform": platform.platform(),
+              "settings": {"queries": args.queries, "results_per_query": args.results,
+                           "place_mode": args.place_mode, "command_latency": args.command_latency,
+                           "page_latency": args.page_latency, "site_latency": args.site_latency},
+              "runs": []}
+
+    with LocalFixtureServer(FIXTURES, latency=args.site_latency) as server:
+        for workers in args.workers:
+            for output_format in args.formats:
+                for enrichment in args.enrichment:
+                    config = {"name": f"w{workers}-{output_format.lower()}-{enrichment}", "workers": workers,
+                              "output_format": output_format, "enrichment": enrichment,
+                              "place_mode": args.place_mode, "queries": args.queries,
+                              "results_per_query": args.results, "command_latency": args.command_latency,
+                              "page_load_latency": args.page_latency, "site_url": server.base_url}
+                    # a fresh process per run, so peak RSS and the class patches do not leak between runs
+                    with context.Pool(processes=1) as pool:
+                        run = pool.apply(run_config, (config,))
+                    report["runs"].append(run)
+                    stages = ", ".join(f"{stage} p50={stats['p50_ms']:.1f}ms p95={stats['p95_ms']:.1f}ms"
+                                       for stage, stats in run["stages"].items())
+                    print(f"{run['config']:<28} {run['places']:>5} places {run['places_per_sec']:>8.1f}/s "
+                          f"rss={run['peak_rss_mb']}MB cmds/place={run['commands_per_place']}\n    {stages}")
+
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"report written to {args.report}")
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == '__main__':
+    main()
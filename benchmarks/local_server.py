@@ -0,0 +1,55 @@
+"""
+Local HTTP server serving fixture files, used by the benchmarks as a stand-in for real websites.
+"""
+
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from functools import partial
+from threading import Thread
+from time import sleep
+
+
+class FixtureRequestHandler(SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+
+    def end_headers(self):
+        if self.latency:
+            sleep(self.latency)
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        ...
+
+
+class LocalFixtureServer:
+    """
+    Serve a directory over HTTP on 127.0.0.1 in a background thread.
+
+    Usage:
+        with LocalFixtureServer("benchmarks/fixtures/contact_pages", latency=0.05) as server:
+            print(server.base_url)
+    """
+
+    def __init__(self, directory: str, latency: float = 0.0, port: int = 0) -> None:
+        handler = type("LatencyHandler", (FixtureRequestHandler,), {"latency": latency})
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), partial(handler, directory=directory))
+        self._server.daemon_threads = True
+        self._thread = Thread(target=self._server.serve_forever, name="LocalFixtureServer", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/"
+
+    def start(self) -> "LocalFixtureServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
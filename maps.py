@@ -1,4 +1,8 @@
+from utils.remote_worker import RemoteWorker, CoordinatorClient
 from utils.threading_controller import FastSearchAlgo
+from utils.metrics import MetricsRegistry, MetricsExporter
+from utils.browser_backends import create_backend
+from utils.geo_tiling import TilePlanner, Gazetteer
 from argparse import ArgumentParser
 from os.path import isfile
 import sys
@@ -39,12 +43,135 @@ class GMapsScraper:
 
         parser.add_argument('-of', '--output-format',
                             help='Output format to store scraped data. '
-                                 'Available formats [CSV, EXCEL, JSON] (default: CSV)',
-                            type=str, default='CSV', choices=["CSV", "EXCEL", "JSON"])
+                                 'Available formats [CSV, EXCEL, JSON, JSONL] (default: CSV)',
+                            type=str, default='CSV', choices=["CSV", "EXCEL", "JSON", "JSONL"])
+        parser.add_argument('-ja', '--jsonl-to-array',
+                            help='With JSONL output, also write the records as a JSON array when the run ends',
+                            action='store_true')
+        parser.add_argument('-ef', '--excel-flush-rows',
+                            help='With EXCEL output, rewrite the workbook every this many rows, spaced out as the '
+                                 'workbook grows (0 to only write it when the run ends, default: 0)',
+                            type=int, default=0)
         parser.add_argument('-sm', '--scroll-minutes',
                             help='Maximum minutes to wait for end of results the waiting time in minutes (default: 1)',
                             type=int,
                             default=1)
+        parser.add_argument('-rq', '--recycle-queries',
+                            help='Relaunch a pooled browser after this many search queries, place pages opened by '
+                                 'URL do not count (0 to never, default: 100)',
+                            type=int, default=100)
+        parser.add_argument('-rm', '--recycle-memory',
+                            help='Relaunch a pooled browser once it uses this many MB of memory '
+                                 '(0 to disable, default: 0)',
+                            type=int, default=0)
+        parser.add_argument('-qt', '--query-timeout',
+                            help='Maximum seconds a worker spends on one query (0 to disable, default: 0)',
+                            type=int, default=0)
+        parser.add_argument('-mr', '--max-retries',
+                            help='Number of times a failed query is queued again (default: 2)',
+                            type=int, default=2)
+        parser.add_argument('-em', '--extraction-mode',
+                            help='How place fields are read: BATCH reads the whole card in one script call '
+                                 'and only falls back to per-field lookups for missing fields, FIELD looks up '
+                                 'every field separately, PAYLOAD decodes the JSON the page is rendered from and '
+                                 'reads the fields it misses in BATCH (default: BATCH)',
+                            type=str, default='BATCH', choices=["BATCH", "FIELD", "PAYLOAD"])
+        parser.add_argument('-en', '--enrichment-mode',
+                            help='How the -se website pages are downloaded: HTTP uses a pooled HTTP client and only '
+                                 'opens pages that need JavaScript in the browser, BROWSER opens every page in a '
+                                 'browser tab (default: HTTP)',
+                            type=str, default='HTTP', choices=["HTTP", "BROWSER"])
+        parser.add_argument('-ew', '--enrichment-workers',
+                            help='With HTTP enrichment, number of websites downloaded in parallel by a separate stage '
+                                 'so the Maps browsers never wait for them. 0 enriches inside the scraper threads '
+                                 'and can fall back to the browser for JavaScript pages (default: 32)',
+                            type=int, default=32)
+        parser.add_argument('-pm', '--place-mode',
+                            help='How places are visited: URL first collects the place links of a query, then '
+                                 'every thread opens them by URL so one query is shared by all browsers, TAB opens '
+                                 'each place in a tab next to the results list (default: URL)',
+                            type=str, default='URL', choices=["URL", "TAB"])
+        parser.add_argument('-dd', '--disable-dedup',
+                            help='Scrape places again even if an earlier query or run already scraped them',
+                            action='store_true')
+        parser.add_argument('-rs', '--resume',
+                            help='Continue the previous run in the same output folder: finished queries are skipped '
+                                 'and harvested queries continue from the places not written yet',
+                            action='store_true')
+        parser.add_argument('-ex', '--execution-mode',
+                            help='THREAD runs every -w worker as a thread of this process, PROCESS runs each one in '
+                                 'its own process with its own browser, restarted if it crashes (default: THREAD)',
+                            type=str, default='THREAD', choices=["THREAD", "PROCESS"])
+        parser.add_argument('-ro', '--role',
+                            help='STANDALONE scrapes the query file on this machine, COORDINATOR hands its queries '
+                                 'out to remote workers and writes their records, WORKER scrapes the tasks of a '
+                                 'coordinator with -w browsers (default: STANDALONE)',
+                            type=str, default='STANDALONE', choices=["STANDALONE", "COORDINATOR", "WORKER"])
+        parser.add_argument('-ca', '--coordinator-address',
+                            help='host:port the coordinator listens on, or the worker connects to '
+                                 '(default: 127.0.0.1:8765)',
+                            type=str, default='127.0.0.1:8765')
+        parser.add_argument('-ct', '--coordinator-token',
+                            help='Shared secret the workers send with every request to the coordinator, a random '
+                                 'one is printed by the coordinator when not given (default: random)',
+                            type=str, default=None)
+        parser.add_argument('-bb', '--browser-backend',
+                            help='CHROME drives real Chrome browsers on Google Maps, FIXTURE replays the saved Maps '
+                                 'pages of -fd offline, for benchmarks and dry runs (default: CHROME)',
+                            type=str, default='CHROME', choices=["CHROME", "FIXTURE"])
+        parser.add_argument('-fd', '--fixture-dir',
+                            help='Folder of the saved Maps pages used by the FIXTURE backend '
+                                 '(default: ./benchmarks/fixtures/maps)',
+                            type=str, default=None)
+        parser.add_argument('-fl', '--fixture-latency',
+                            help='Milliseconds a page load or a page of results takes with the FIXTURE backend '
+                                 '(default: 0)',
+                            type=int, default=0)
+        parser.add_argument('-mp', '--metrics-port',
+                            help='Serve Prometheus metrics (stage and field timings, counters per worker) on '
+                                 'http://0.0.0.0:PORT/metrics while the run goes on (0 to disable, default: 0)',
+                            type=int, default=0)
+        parser.add_argument('-mf', '--metrics-file',
+                            help='Write the same metrics as JSON to this file every 10 seconds and when the run ends',
+                            type=str, default=None)
+        parser.add_argument('-bp', '--block-profile',
+                            help='Resources the Chrome browsers never download: MEDIA blocks images, fonts and '
+                                 'audio/video, LEAN also map tiles, street view and analytics beacons (default: NONE)',
+                            type=str, default='NONE', choices=["NONE", "MEDIA", "LEAN"])
+        parser.add_argument('-nr', '--network-report',
+                            help='Record the bytes and requests of every page in the metrics and print the bytes '
+                                 'per place at the end',
+                            action='store_true')
+        parser.add_argument('-ga', '--geo-area',
+                            help='Split every query of the query file over a grid of map viewports covering this '
+                                 'area: "south,west,north,east" or a city of the gazetteer file, e.g. "Berlin"',
+                            type=str, default=None)
+        parser.add_argument('-gz', '--geo-zoom',
+                            help='Zoom level of the map viewports of -ga, higher is smaller tiles (default: 14)',
+                            type=int, default=14)
+        parser.add_argument('-gs', '--geo-split-at',
+                            help='Split a tile into four smaller ones when its results list shows at least this '
+                                 'many places (0 never splits, default: 100)',
+                            type=int, default=100)
+        parser.add_argument('-gf', '--gazetteer-file',
+                            help='CSV file of named areas for -ga: name,south,west,north,east '
+                                 '(default: ./data/gazetteer.csv)',
+                            type=str, default=None)
+        parser.add_argument('-fw', '--fixed-wait',
+                            help='Wait the full --browser-wait for the cover image, about tab and results list every '
+                                 'time, instead of learned timeouts and skipping what a loaded page does not have',
+                            action='store_true')
+        parser.add_argument('-sf', '--selector-file',
+                            help='JSON file of the place field selectors and their fallbacks, with the canary '
+                                 'thresholds (default: ./data/selectors.json)',
+                            type=str, default=None)
+        parser.add_argument('-cm', '--canary-mode',
+                            help='Scrape one place before the run and check its fields: WARN prints a warning when '
+                                 'too few are filled, ABORT stops the run (default: WARN)',
+                            type=str, default='WARN', choices=["OFF", "WARN", "ABORT"])
+        parser.add_argument('-cu', '--canary-url',
+                            help='Google Maps place URL of the canary (default: the first result of the first query)',
+                            type=str, default=None)
 
         # Custom commands for additional help
         parser.add_argument('--help-query-file',
@@ -77,7 +204,68 @@ class GMapsScraper:
             print(f"[-] File not found at path: {q}")
             sys.exit(1)
 
+    def create_browser_backend(self):
+        return create_backend(name=self._args.browser_backend, headless=self._args.windowed_browser,
+                              block_profile=self._args.block_profile,
+                              network_log=self._args.network_report or self._args.extraction_mode == "PAYLOAD",
+                              fixtures_dir=self._args.fixture_dir,
+                              page_load_latency=self._args.fixture_latency / 1000)
+
+    def create_tile_planner(self):
+        if not self._args.geo_area:
+            return None
+        tile_planner = TilePlanner(zoom=self._args.geo_zoom, split_at=self._args.geo_split_at,
+                                   gazetteer=Gazetteer(self._args.gazetteer_file))
+        try:
+            tile_planner.resolve_area(self._args.geo_area)
+        except ValueError as e:
+            print(f"[-] {e}")
+            sys.exit(1)
+        return tile_planner
+
+    def run_remote_worker(self):
+        metrics = MetricsRegistry()
+        exporter = None
+        if self._args.metrics_port or self._args.metrics_file:
+            exporter = MetricsExporter(metrics, port=self._args.metrics_port, json_path=self._args.metrics_file)
+            exporter.start()
+        worker = RemoteWorker(
+            client=CoordinatorClient(coordinator_url=self._args.coordinator_address,
+                                     token=self._args.coordinator_token),
+            scraper_settings={
+                "unavailable_text": self._args.unavailable_text, "headless": self._args.windowed_browser,
+                "wait_time": self._args.browser_wait, "suggested_ext": self._args.suggested_ext,
+                "output_path": self._args.output_folder, "output_format": self._args.output_format,
+                "result_range": None if self._args.limit == -1 else self._args.limit,
+                "scroll_minutes": self._args.scroll_minutes, "extraction_mode": self._args.extraction_mode.lower(),
+                "verbose": False if self._args.disable_verbose else True,
+                "network_report": self._args.network_report,
+                "adaptive_wait": not self._args.fixed_wait,
+                "selector_file": self._args.selector_file,
+            },
+            threads=self._args.threads,
+            enrichment_mode=self._args.enrichment_mode,
+            enrichment_workers=self._args.enrichment_workers,
+            recycle_queries=self._args.recycle_queries,
+            recycle_rss_mb=self._args.recycle_memory,
+            driver_factory=self.create_browser_backend().create_driver,
+            metrics=metrics,
+            verbose=False if self._args.disable_verbose else True,
+        )
+        try:
+            worker.run()
+        except PermissionError as e:
+            print(f"[-] {e}")
+            sys.exit(2)
+        finally:
+            if exporter:
+                exporter.stop()
+
     def scrape_maps_data(self):
+        if self._args.role == "WORKER":
+            self.run_remote_worker()
+            return
+
         self.check_args()
 
         if self._args.help_query_file:
@@ -87,7 +275,14 @@ class GMapsScraper:
             self.print_limit_help()
 
         queries_list = FastSearchAlgo.load_query_file(file_name=self._args.query_file)
+        tile_planner = self.create_tile_planner()
+        if tile_planner:
+            queries_list = tile_planner.expand(queries_list, tile_planner.resolve_area(self._args.geo_area))
+            print(f"[+] Geo tiling: {len(queries_list)} tiles over {self._args.geo_area}")
         threads_limit = min(self._args.threads, len(queries_list))
+        if self._args.place_mode == "URL":
+            # the places of a single query are shared by every thread
+            threads_limit = self._args.threads
         limit_results = None if self._args.limit == -1 else self._args.limit
 
         algo_obj = FastSearchAlgo(
@@ -96,13 +291,41 @@ class GMapsScraper:
             wait_time=self._args.browser_wait,
             suggested_ext=self._args.suggested_ext,
             output_path=self._args.output_folder,
+            output_format=self._args.output_format,
+            jsonl_to_array=self._args.jsonl_to_array,
+            excel_flush_rows=self._args.excel_flush_rows,
+            enrichment_mode=self._args.enrichment_mode,
+            enrichment_workers=self._args.enrichment_workers,
             workers=threads_limit,
             result_range=limit_results,
             scroll_minutes=self._args.scroll_minutes,
+            recycle_queries=self._args.recycle_queries,
+            recycle_rss_mb=self._args.recycle_memory,
+            query_timeout=self._args.query_timeout,
+            max_retries=self._args.max_retries,
+            extraction_mode=self._args.extraction_mode,
+            place_mode=self._args.place_mode,
+            # tiles overlap, the place index merges their places
+            dedup=not self._args.disable_dedup or tile_planner is not None,
+            resume=self._args.resume,
+            execution_mode=self._args.execution_mode,
+            role=self._args.role,
+            coordinator_address=self._args.coordinator_address,
+            coordinator_token=self._args.coordinator_token,
+            browser_backend=self.create_browser_backend(),
+            metrics_port=self._args.metrics_port,
+            metrics_file=self._args.metrics_file,
+            network_report=self._args.network_report,
+            tile_planner=tile_planner,
+            adaptive_wait=not self._args.fixed_wait,
+            selector_file=self._args.selector_file,
+            canary_mode=self._args.canary_mode,
+            canary_url=self._args.canary_url,
             verbose=False if self._args.disable_verbose else True,
         )
 
-        algo_obj.fast_search_algorithm(queries_list)
+        if not algo_obj.fast_search_algorithm(queries_list):
+            sys.exit(2)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,770 @@
+from selenium.common.exceptions import (NoSuchElementException, StaleElementReferenceException,
+                                        NoSuchWindowException, InvalidSelectorException, WebDriverException)
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.common.keys import Keys
+from utils.resource_blocking import BlockingProfile
+from utils.google_maps_scraper import GoogleMaps
+from urllib.parse import quote_plus, unquote_plus
+from os.path import dirname, abspath, join, basename, exists
+from utils.maps_payload import MapsPayloadDecoder
+from bs4 import BeautifulSoup
+from hashlib import blake2b
+from threading import Lock
+from copy import copy
+from glob import glob
+from time import sleep, time
+from re import compile
+import json
+
+_default_fixtures_dir = join(dirname(dirname(abspath(__file__))), "benchmarks", "fixtures", "maps")
+
+
+class BrowserBackend:
+    """
+    Source of the browsers the scrapers drive.
+
+    A backend only has to hand out driver objects, the scrapers then navigate (get, current_url, window
+    handles), look elements up (find_element(s), WebElement text/attributes/clicks) and run scripts
+    (execute_script, execute_async_script) through the usual Selenium WebDriver methods. `settings` holds
+    plain values create_backend() rebuilds the backend from, so worker processes get the same backend.
+
+    Methods:
+        create_driver(self):
+            Launch a new browser.
+    """
+
+    name = ""
+
+    @property
+    def settings(self) -> dict:
+        return {"name": self.name}
+
+    def create_driver(self) -> any:
+        raise NotImplementedError
+
+
+class ChromeBackend(BrowserBackend):
+    """Real Chrome browsers driven by undetected-chromedriver against the live Google Maps."""
+
+    name = "chrome"
+
+    def __init__(self, headless: bool = False, block_profile: str = "none", network_log: bool = False) -> None:
+        """
+        Initialize the Chrome backend.
+            :param headless: If True, run the browsers in headless mode.
+            :param block_profile: Name of the BlockingProfile of the browsers ("none", "media" or "lean").
+            :param network_log: Enable the performance log read by NetworkMonitor.
+        """
+
+        self._headless = headless
+        self._blocking_profile = BlockingProfile(block_profile)
+        self._network_log = network_log
+
+    @property
+    def settings(self) -> dict:
+        return {"name": self.name, "headless": self._headless, "block_profile": self._blocking_profile.name,
+                "network_log": self._network_log}
+
+    def create_driver(self) -> any:
+        return GoogleMaps.build_chrome_driver(headless=self._headless, blocking_profile=self._blocking_profile,
+                                              performance_log=self._network_log)
+
+
+class _FixtureTab:
+    """One browser tab of a FixtureDriver: its URL, parsed document and scroll state."""
+
+    def __init__(self, handle: str) -> None:
+        self.handle = handle
+        self.url = "about:blank"
+        self.soup = BeautifulSoup("<html><head></head><body></body></html>", features="html.parser")
+        self.generation = 0
+        self.pending_cards = []
+        self.scroll_seen = set()
+        self.payload = None
+
+
+class FixtureElement:
+    """WebElement of a FixtureDriver, every call goes through FixtureDriver.execute like a remote element."""
+
+    def __init__(self, driver: "FixtureDriver", handle: str, generation: int, tag: any) -> None:
+        self._driver = driver
+        self.handle = handle
+        self.generation = generation
+        self.tag = tag
+
+    @property
+    def text(self) -> str:
+        return self._driver.execute(Command.GET_ELEMENT_TEXT, {"element": self})["value"]
+
+    def get_attribute(self, name: str) -> any:
+        return self._driver.execute(Command.GET_ELEMENT_ATTRIBUTE, {"element": self, "name": name})["value"]
+
+    def click(self) -> None:
+        self._driver.execute(Command.CLICK_ELEMENT, {"element": self})
+
+    def send_keys(self, *value: str) -> None:
+        self._driver.execute(Command.SEND_KEYS_TO_ELEMENT, {"element": self, "text": "".join(value)})
+
+    def clear(self) -> None:
+        self._driver.execute(Command.CLEAR_ELEMENT, {"element": self})
+
+    def find_element(self, by: str, value: str) -> "FixtureElement":
+        return self._driver.execute(Command.FIND_CHILD_ELEMENT, {"element": self, "using": by,
+                                                                 "value": value})["value"]
+
+    def find_elements(self, by: str, value: str) -> list:
+        return self._driver.execute(Command.FIND_CHILD_ELEMENTS, {"element": self, "using": by,
+                                                                  "value": value})["value"]
+
+
+class _FixtureSwitchTo:
+    def __init__(self, driver: "FixtureDriver") -> None:
+        self._driver = driver
+
+    def window(self, window_name: str) -> None:
+        self._driver.execute(Command.SWITCH_TO_WINDOW, {"handle": window_name})
+
+
+class FixtureDriver:
+    """
+    Offline stand-in for a Chrome WebDriver, replays saved Google Maps pages.
+
+    Every method goes through execute(), the single entry point of a real WebDriver, which sleeps
+    `command_latency` seconds per command (plus `page_load_latency` per navigation or loaded results page)
+    and counts the commands. Searching a query shows `results_per_query` generated places, revealed
+    `scroll_batch` at a time by the results feed script, every place link opens one of the place fixtures
+    with the place's name. The scraper scripts are recognised by their /* gms:... */ marker and run in
+    Python, so the whole scraper (scrolling, batch extraction, tabs) runs unchanged against it.
+
+    A place fixture with a payloads/<name>.txt payload also exposes it as the page's inline state, and with
+    `network_log` every navigation and page of results is written to the performance log, the results as
+    /search?tb=map responses whose bodies execute_cdp_cmd("Network.getResponseBody") returns.
+
+    Methods:
+        execute(self, driver_command, params):
+            Run one WebDriver command.
+
+        get(self, url):
+            Load a URL in the current tab.
+
+        find_element(self, by, value) / find_elements(self, by, value):
+            Look elements up in the current page (CSS, class name, id, tag name or a simple XPath).
+
+        execute_script(self, script, *args) / execute_async_script(self, script, *args):
+            Run one of the scraper scripts (batch extraction, results feed scrolling, page state, window.open).
+
+        execute_cdp_cmd(self, cmd, cmd_args) / get_log(self, log_type):
+            DevTools commands (response bodies, the others are accepted) and the performance log.
+
+        close(self) / quit(self):
+            Close the current tab / the whole browser.
+    """
+
+    _maps_url = GoogleMaps._maps_url
+    _feature_id_pattern = compile(r'!1s(0x[0-9a-fA-F]+:0x[0-9a-fA-F]+)')
+    _window_open_pattern = compile(r'window\.open\(\s*["\']([^"\']*)["\']')
+    _place_path_pattern = compile(r'/maps/place/([^/]+)')
+    _coordinates_pattern = compile(r'!3d(-?\d+(?:\.\d+)?)!4d(-?\d+(?:\.\d+)?)')
+    _viewport_pattern = compile(r'@(-?\d+(?:\.\d+)?),(-?\d+(?:\.\d+)?)')
+    _xpath_step_pattern = compile(r'(//|/)([^/\[]+)((?:\[[^\]]*\])*)')
+    _xpath_predicate_pattern = compile(r'\[([^\]]*)\]')
+    _xpath_attribute_pattern = compile(r'@([\w-]+)\s*=\s*["\']([^"\']*)["\']')
+    _max_response_bodies = 50
+
+    def __init__(self, fixtures_dir: str, command_latency: float = 0.0, page_load_latency: float = 0.0,
+                 results_per_query: int = 20, scroll_batch: int = 7, website_url: str = None,
+                 network_log: bool = False, session_id: int = 1) -> None:
+        """
+        Open a fixture browser with one empty tab.
+            :param fixtures_dir: Folder holding home.html, search.html and the place_*.html pages.
+            :param command_latency: Seconds every WebDriver command takes.
+            :param page_load_latency: Extra seconds a navigation or a scrolled results page takes.
+            :param results_per_query: Places listed for every search query.
+            :param scroll_batch: Places revealed by every call of the results feed script.
+            :param website_url: Website link shown on every place page (e.g. a local fixture server),
+                                the link of the place fixture if None.
+            :param network_log: Write the navigations and results responses to the performance log.
+            :param session_id: Number used in the window handles.
+        """
+
+        self._fixtures = {}
+        for name in ("home", "search"):
+            with open(join(fixtures_dir, f"{name}.html"), "r", encoding="utf-8") as f:
+                self._fixtures[name] = f.read()
+        self._place_fixtures = []
+        self._place_payloads = []
+        for path in sorted(glob(join(fixtures_dir, "place_*.html"))):
+            with open(path, "r", encoding="utf-8") as f:
+                self._place_fixtures.append(f.read())
+            payload_path = join(fixtures_dir, "payloads", basename(path)[:-len(".html")] + ".txt")
+            payload = None
+            if exists(payload_path):
+                with open(payload_path, "r", encoding="utf-8") as f:
+                    payload = MapsPayloadDecoder.place_from_preview(MapsPayloadDecoder.parse(f.read()))
+            self._place_payloads.append(payload)
+        if not self._place_fixtures:
+            raise FileNotFoundError(f"no place_*.html fixture in {fixtures_dir}")
+
+        self._command_latency = command_latency
+        self._page_load_latency = page_load_latency
+        self._results_per_query = results_per_query
+        self._scroll_batch = max(1, scroll_batch)
+        self._website_url = website_url
+        self._network_log = network_log
+        self._performance_log = []
+        self._response_bodies = {}
+        self._request_counter = 0
+        self._session_id = session_id
+        self._tabs = {}
+        self._current = None
+        self._tab_counter = 0
+        self._quit = False
+        self.commands = 0
+        self.switch_to = _FixtureSwitchTo(self)
+        self._handlers = {
+            Command.GET: self._cmd_get,
+            Command.GET_CURRENT_URL: lambda params: self._tab().url,
+            Command.GET_TITLE: lambda params: self._tab().soup.title.get_text() if self._tab().soup.title else "",
+            Command.GET_PAGE_SOURCE: lambda params: str(self._tab().soup),
+            Command.W3C_GET_CURRENT_WINDOW_HANDLE: lambda params: self._tab().handle,
+            Command.W3C_GET_WINDOW_HANDLES: lambda params: list(self._tabs),
+            Command.SWITCH_TO_WINDOW: self._cmd_switch_to_window,
+            Command.CLOSE: self._cmd_close,
+            Command.QUIT: self._cmd_quit,
+            Command.SET_TIMEOUTS: lambda params: None,
+            Command.FIND_ELEMENT: lambda params: self._find(params, single=True),
+            Command.FIND_ELEMENTS: lambda params: self._find(params, single=False),
+            Command.FIND_CHILD_ELEMENT: lambda params: self._find(params, single=True),
+            Command.FIND_CHILD_ELEMENTS: lambda params: self._find(params, single=False),
+            Command.GET_ELEMENT_TEXT: lambda params: self._inner_text(self._element_tag(params["element"])),
+            Command.GET_ELEMENT_ATTRIBUTE: self._cmd_get_attribute,
+            Command.CLICK_ELEMENT: lambda params: self._element_tag(params["element"]) and None,
+            Command.SEND_KEYS_TO_ELEMENT: self._cmd_send_keys,
+            Command.CLEAR_ELEMENT: self._cmd_clear,
+            Command.W3C_EXECUTE_SCRIPT: self._cmd_execute_script,
+            Command.W3C_EXECUTE_SCRIPT_ASYNC: self._cmd_execute_script,
+            Command.GET_LOG: self._cmd_get_log,
+            "executeCdpCommand": self._cmd_execute_cdp,
+        }
+        self._open_tab()
+
+    # WebDriver entry point
+
+    def execute(self, driver_command: str, params: dict = None) -> dict:
+        """
+        Run one WebDriver command.
+            :param driver_command: A selenium Command name.
+            :param params: The command parameters.
+            :return: {"value": result} like a remote WebDriver response.
+        """
+
+        self.commands += 1
+        if self._command_latency:
+            sleep(self._command_latency)
+        if self._quit and driver_command != Command.QUIT:
+            raise WebDriverException("the fixture browser was quit")
+        handler = self._handlers.get(driver_command)
+        if handler is None:
+            raise WebDriverException(f"command {driver_command} is not supported by the fixture backend")
+        return {"value": handler(params or {})}
+
+    # WebDriver methods used by the scrapers
+
+    def get(self, url: str) -> None:
+        self.execute(Command.GET, {"url": url})
+
+    @property
+    def current_url(self) -> str:
+        return self.execute(Command.GET_CURRENT_URL)["value"]
+
+    @property
+    def title(self) -> str:
+        return self.execute(Command.GET_TITLE)["value"]
+
+    @property
+    def page_source(self) -> str:
+        return self.execute(Command.GET_PAGE_SOURCE)["value"]
+
+    @property
+    def current_window_handle(self) -> str:
+        return self.execute(Command.W3C_GET_CURRENT_WINDOW_HANDLE)["value"]
+
+    @property
+    def window_handles(self) -> list:
+        return self.execute(Command.W3C_GET_WINDOW_HANDLES)["value"]
+
+    def find_element(self, by: str = "id", value: str = None) -> FixtureElement:
+        return self.execute(Command.FIND_ELEMENT, {"using": by, "value": value})["value"]
+
+    def find_elements(self, by: str = "id", value: str = None) -> list:
+        return self.execute(Command.FIND_ELEMENTS, {"using": by, "value": value})["value"]
+
+    def execute_script(self, script: str, *args) -> any:
+        return self.execute(Command.W3C_EXECUTE_SCRIPT, {"script": script, "args": list(args)})["value"]
+
+    def execute_async_script(self, script: str, *args) -> any:
+        return self.execute(Command.W3C_EXECUTE_SCRIPT_ASYNC, {"script": script, "args": list(args)})["value"]
+
+    def set_script_timeout(self, time_to_wait: float) -> None:
+        self.execute(Command.SET_TIMEOUTS, {"script": int(float(time_to_wait) * 1000)})
+
+    def implicitly_wait(self, time_to_wait: float) -> None:
+        self.execute(Command.SET_TIMEOUTS, {"implicit": int(float(time_to_wait) * 1000)})
+
+    def execute_cdp_cmd(self, cmd: str, cmd_args: dict) -> dict:
+        return self.execute("executeCdpCommand", {"cmd": cmd, "params": cmd_args})["value"]
+
+    def get_log(self, log_type: str) -> list:
+        return self.execute(Command.GET_LOG, {"type": log_type})["value"]
+
+    def close(self) -> None:
+        self.execute(Command.CLOSE)
+
+    def quit(self) -> None:
+        self.execute(Command.QUIT)
+
+    # Tabs and navigation
+
+    def _tab(self) -> _FixtureTab:
+        if self._current not in self._tabs:
+            raise NoSuchWindowException("no such window: target window already closed")
+        return self._tabs[self._current]
+
+    def _open_tab(self) -> _FixtureTab:
+        self._tab_counter += 1
+        tab = _FixtureTab(handle=f"FIXTURE-{self._session_id}-{self._tab_counter}")
+        self._tabs[tab.handle] = tab
+        self._current = tab.handle
+        return tab
+
+    def _cmd_switch_to_window(self, params: dict) -> None:
+        if params["handle"] not in self._tabs:
+            raise NoSuchWindowException(f"no such window: {params['handle']}")
+        self._current = params["handle"]
+
+    def _cmd_close(self, params: dict) -> None:
+        del self._tabs[self._tab().handle]
+
+    def _cmd_quit(self, params: dict) -> None:
+        self._tabs.clear()
+        self._quit = True
+
+    def _cmd_get(self, params: dict) -> None:
+        self._navigate(self._tab(), params["url"])
+
+    def _navigate(self, tab: _FixtureTab, url: str) -> None:
+        if self._page_load_latency:
+            sleep(self._page_load_latency)
+        tab.generation += 1
+        tab.pending_cards = []
+        tab.scroll_seen = set()
+        tab.payload = None
+        tab.url = url
+
+        if not url.startswith(self._maps_url):
+            tab.soup = BeautifulSoup("<html><head></head><body></body></html>", features="html.parser")
+        elif "/maps/place/" in url:
+            self._load_place(tab, url)
+        elif "/maps/search/" in url:
+            path = url.split("/maps/search/", 1)[1].split("?")[0].split("/")
+            viewport = path[1] if len(path) > 1 and path[1].startswith("@") else ""
+            self._load_search(tab, unquote_plus(path[0]), viewport)
+        else:
+            tab.soup = BeautifulSoup(self._fixtures["home"], features="html.parser")
+        self._log_response(url, len(str(tab.soup)))
+
+    def _place_fixture_index(self, name: str) -> int:
+        digest = blake2b(name.encode("utf-8"), digest_size=4).digest()
+        return int.from_bytes(digest, "little") % len(self._place_fixtures)
+
+    def _place_payload(self, name: str, url: str) -> list:
+        """
+        Payload place array of a place link, with the name, feature ID and coordinates of the link.
+            :param name: The place name.
+            :param url: The place link.
+            :return: The place array, None if the place fixture has no payload.
+        """
+
+        template = self._place_payloads[self._place_fixture_index(name)]
+        if template is None:
+            return None
+        place = list(template)
+        place[11] = name
+        feature_id = self._feature_id_pattern.search(url)
+        if feature_id:
+            place[10] = feature_id.group(1)
+        coordinates = self._coordinates_pattern.search(url)
+        if coordinates:
+            place[9] = [None, None, float(coordinates.group(1)), float(coordinates.group(2))]
+        return place
+
+    def _load_place(self, tab: _FixtureTab, url: str) -> None:
+        name = unquote_plus(self._place_path_pattern.search(url).group(1))
+        tab.soup = BeautifulSoup(self._place_fixtures[self._place_fixture_index(name)], features="html.parser")
+        title = tab.soup.find("h1")
+        if title is not None:
+            title.string = name
+        website = tab.soup.select_one('a[data-tooltip="Open website"]')
+        if website is not None and self._website_url:
+            website["href"] = self._website_url
+        place = self._place_payload(name, url)
+        if place is not None:
+            if self._website_url:
+                place[7] = [self._website_url, self._website_url]
+            tab.payload = ")]}'\n" + json.dumps([None] * 6 + [place], ensure_ascii=False)
+
+        # Maps rewrites the address bar with the map position once the place is shown
+        coordinates = self._coordinates_pattern.search(url)
+        if coordinates and "/@" not in url:
+            position = f"/@{coordinates.group(1)},{coordinates.group(2)},17z"
+            path_end = url.find("/", url.find("/maps/place/") + len("/maps/place/"))
+            tab.url = url + position if path_end == -1 else url[:path_end] + position + url[path_end:]
+
+    def _load_search(self, tab: _FixtureTab, query: str, viewport: str = "") -> None:
+        tab.soup = BeautifulSoup(self._fixtures["search"], features="html.parser")
+        search_box = tab.soup.find(id="searchboxinput")
+        if search_box is not None:
+            search_box["value"] = query
+
+        feed = tab.soup.find(attrs={"role": "feed"})
+        template = feed.find(class_="Nv2PK")
+        end_marker = feed.find(class_="PbZDve")
+        template.extract()
+        end_marker.extract()
+        tab.pending_cards = [self._result_card(template, query, index, viewport)
+                             for index in range(self._results_per_query)]
+        tab.pending_cards.append(end_marker)
+        self._reveal_cards(tab, feed)
+
+    def _result_card(self, template: any, query: str, index: int, viewport: str = "") -> any:
+        # a map viewport (@lat,lng,zoomz) lists its own places around its center
+        query_hash = blake2b((query.lower() + viewport).encode("utf-8"), digest_size=6).hexdigest()
+        name = f"{query.title()} {index + 1}"
+        center = self._viewport_pattern.match(viewport)
+        latitude = float(center.group(1)) if center else 40 + int(query_hash[:4], 16) % 2000 / 100
+        longitude = float(center.group(2)) if center else -5 + int(query_hash[4:8], 16) % 2000 / 100
+        latitude += index * 0.0007
+        longitude += index * 0.0011
+        link = (f"{self._maps_url}/place/{quote_plus(name)}/data=!4m7!3m6!1s0x{query_hash}:0x{index + 1:x}"
+                f"!8m2!3d{latitude:.7f}!4d{longitude:.7f}!16s%2Fg%2F11{query_hash[:8]}{index}"
+                f"!19sChIJ{query_hash}{index}?authuser=0&hl=en&rclk=1")
+
+        card = copy(template)
+        anchor = card.find(class_="hfpxzc")
+        anchor["href"] = link
+        anchor["aria-label"] = name
+        card.find(class_="qBF1Pd").string = name
+        return card
+
+    def _reveal_cards(self, tab: _FixtureTab, feed: any) -> None:
+        revealed = tab.pending_cards[:self._scroll_batch]
+        for card in revealed:
+            feed.append(card)
+        tab.pending_cards = tab.pending_cards[self._scroll_batch:]
+        if self._network_log:
+            # every page of results is a search response holding the place arrays
+            entries = [[None] * 14 + [self._place_payload(anchor["aria-label"], anchor["href"])]
+                       for anchor in (card.find(class_="hfpxzc") for card in revealed) if anchor is not None]
+            body = ")]}'\n" + json.dumps([[None, [None] + entries]], ensure_ascii=False)
+            self._log_response(f"{self._maps_url}/search?tb=map&authuser=0&hl=en", len(body), body=body)
+        # the end marker only shows once the last card is loaded
+        if len(tab.pending_cards) == 1 and tab.pending_cards[0].get("class") == ["PbZDve"]:
+            feed.append(tab.pending_cards.pop())
+
+    # Performance log
+
+    def _log_response(self, url: str, size: int, body: str = None) -> None:
+        if not self._network_log:
+            return
+        self._request_counter += 1
+        request_id = f"{self._session_id}.{self._request_counter}"
+        for method, params in (("Network.requestWillBeSent", {"request": {"url": url}}),
+                               ("Network.responseReceived", {"response": {"url": url, "status": 200}}),
+                               ("Network.loadingFinished", {"encodedDataLength": size})):
+            message = {"message": {"method": method, "params": {"requestId": request_id, **params}}}
+            self._performance_log.append({"level": "INFO", "message": json.dumps(message),
+                                          "timestamp": int(time() * 1000)})
+        if body is not None:
+            self._response_bodies[request_id] = body
+            # Chrome also drops the bodies of old responses
+            while len(self._response_bodies) > self._max_response_bodies:
+                del self._response_bodies[next(iter(self._response_bodies))]
+
+    def _cmd_get_log(self, params: dict) -> list:
+        if params.get("type") != "performance":
+            return []
+        entries, self._performance_log = self._performance_log, []
+        return entries
+
+    def _cmd_execute_cdp(self, params: dict) -> dict:
+        if params["cmd"] != "Network.getResponseBody":
+            return {}
+        body = self._response_bodies.pop(params["params"]["requestId"], None)
+        if body is None:
+            raise WebDriverException("No resource with given identifier found")
+        return {"body": body, "base64Encoded": False}
+
+    # Element lookup
+
+    def _element_tag(self, element: FixtureElement) -> any:
+        tab = self._tabs.get(element.handle)
+        if tab is None or tab.generation != element.generation or element.handle != self._current:
+            raise StaleElementReferenceException("stale element reference: element is not attached to the page")
+        return element.tag
+
+    def _select(self, root: any, by: str, value: str) -> list:
+        if by == "css selector":
+            return root.select(value)
+        if by == "class name":
+            return root.select(f".{value}")
+        if by == "id":
+            return root.select(f'[id="{value}"]')
+        if by == "tag name":
+            return root.find_all(value)
+        if by == "xpath":
+            return self._select_xpath(root, value)
+        raise InvalidSelectorException(f"locator strategy {by} is not supported by the fixture backend")
+
+    def _select_quietly(self, root: any, by: str, value: str) -> list:
+        # page scripts catch the selector errors
+        try:
+            return self._select(root, by, value)
+        except InvalidSelectorException:
+            return []
+
+    def _select_xpath(self, root: any, xpath: str) -> list:
+        """
+        Evaluate the XPath subset the scrapers use: / and // steps, tag or * tests, [n] and [@attr="v"].
+            :param root: The document or the context element.
+            :param xpath: The XPath expression.
+            :return: The matching tags in document order.
+        """
+
+        nodes = [root]
+        position = 0
+        for match in self._xpath_step_pattern.finditer(xpath):
+            if match.start() != position:
+                raise InvalidSelectorException(f"XPath {xpath} is not supported by the fixture backend")
+            position = match.end()
+            axis, name, predicates = match.groups()
+            parents = []
+            for node in nodes:
+                parents.extend([node] + node.find_all(True) if axis == "//" else [node])
+
+            selected = []
+            for parent in parents:
+                candidates = [child for child in parent.find_all(True, recursive=False)
+                              if name == "*" or child.name == name]
+                for predicate in self._xpath_predicate_pattern.findall(predicates):
+                    predicate = predicate.strip()
+                    if predicate.isdigit():
+                        index = int(predicate) - 1
+                        candidates = candidates[index:index + 1]
+                    else:
+                        attribute = self._xpath_attribute_pattern.fullmatch(predicate)
+                        if attribute is None:
+                            raise InvalidSelectorException(f"XPath predicate [{predicate}] is not supported")
+                        candidates = [candidate for candidate in candidates
+                                      if candidate.get(attribute.group(1)) == attribute.group(2)]
+                selected.extend(candidate for candidate in candidates
+                                if not any(candidate is known for known in selected))
+            nodes = selected
+
+        if position != len(xpath):
+            raise InvalidSelectorException(f"XPath {xpath} is not supported by the fixture backend")
+        return nodes
+
+    def _find(self, params: dict, single: bool) -> any:
+        tab = self._tab()
+        root = self._element_tag(params["element"]) if "element" in params else tab.soup
+        tags = self._select(root, params["using"], params["value"])
+        if single:
+            if not tags:
+                raise NoSuchElementException(f"no such element: {params['using']} {params['value']}")
+            return FixtureElement(self, tab.handle, tab.generation, tags[0])
+        return [FixtureElement(self, tab.handle, tab.generation, tag) for tag in tags]
+
+    @staticmethod
+    def _inner_text(tag: any) -> str:
+        if tag.name in ("table", "tbody"):
+            return "\n".join(" ".join(cell.get_text(" ", strip=True) for cell in row.find_all(["td", "th"]))
+                             for row in tag.find_all("tr"))
+        return " ".join(tag.get_text(" ", strip=True).split())
+
+    @staticmethod
+    def _attribute(tag: any, name: str) -> any:
+        value = tag.get(name)
+        if isinstance(value, list):
+            return " ".join(value)
+        return value
+
+    def _cmd_get_attribute(self, params: dict) -> any:
+        return self._attribute(self._element_tag(params["element"]), params["name"])
+
+    def _cmd_clear(self, params: dict) -> None:
+        tag = self._element_tag(params["element"])
+        if tag.name == "input":
+            tag["value"] = ""
+
+    def _cmd_send_keys(self, params: dict) -> None:
+        tag = self._element_tag(params["element"])
+        text = params["text"]
+        submit = Keys.RETURN in text or Keys.ENTER in text
+        typed = text.replace(Keys.RETURN, "").replace(Keys.ENTER, "")
+        if tag.name == "input":
+            tag["value"] = tag.get("value", "") + typed
+            if submit and tag.get("id") == "searchboxinput" and tag["value"].strip():
+                self._navigate(self._tab(), f"{self._maps_url}/search/{quote_plus(tag['value'].strip())}/")
+
+    # Scripts
+
+    def _cmd_execute_script(self, params: dict) -> any:
+        script, args = params["script"], params["args"]
+        if "gms:batch_extract" in script:
+            return self._batch_extract(args[0])
+        if "gms:scroll_feed" in script:
+            return self._scroll_feed(*args[:4])
+        if "gms:app_state" in script:
+            return self._tab().payload
+        if "gms:page_state" in script:
+            tab = self._tab()
+            title = any(self._select_quietly(tab.soup, by, selector) for _, by, selector in args[0])
+            return {"ready": True, "place": "/maps/place/" in tab.url, "title": title}
+        match = self._window_open_pattern.search(script)
+        if match:
+            opener = self._current
+            tab = self._open_tab()
+            self._navigate(tab, match.group(1))
+            # window.open() does not move the WebDriver focus to the new tab
+            self._current = opener
+            return None
+        return None
+
+    def _batch_extract(self, fields: list) -> dict:
+        soup = self._tab().soup
+        extracted = {"_matched": {}}
+        for field in fields:
+            nodes = []
+            extracted["_matched"][field["name"]] = None
+            for index, by, selector in field["locators"]:
+                nodes = self._select_quietly(soup, by, selector)
+                if nodes:
+                    extracted["_matched"][field["name"]] = index
+                    break
+            if not field["multiple"]:
+                nodes = nodes[:1]
+            values = [self._inner_text(node) if field["attribute"] == "text"
+                      else self._attribute(node, field["attribute"]) for node in nodes]
+            extracted[field["name"]] = values if field["multiple"] else (values[0] if values else None)
+        return extracted
+
+    def _scroll_feed(self, limit: int, budget_ms: int, idle_ms: int, reset: bool) -> dict:
+        tab = self._tab()
+        if reset:
+            tab.scroll_seen = set()
+        fresh = []
+
+        def collect():
+            for anchor in tab.soup.find_all(class_="hfpxzc"):
+                href = anchor.get("href")
+                if not href or href in tab.scroll_seen:
+                    continue
+                if limit and len(tab.scroll_seen) >= limit:
+                    break
+                tab.scroll_seen.add(href)
+                match = self._feature_id_pattern.search(href)
+                fresh.append([href, match.group(1).lower() if match else ""])
+
+        def reached_end():
+            marker = tab.soup.select_one('div.PbZDve > p.fontBodyMedium > span > span[class="HlvSq"]')
+            return marker is not None and "you've reached the end" in marker.get_text().lower()
+
+        feed = tab.soup.find(attrs={"role": "feed"})
+        collect()
+        if feed is None:
+            return {"results": fresh, "end": "no_feed"}
+        if limit and len(tab.scroll_seen) >= limit:
+            return {"results": fresh, "end": "limit"}
+        if reached_end():
+            return {"results": fresh, "end": "end"}
+
+        # one scroll loads the next page of results
+        if self._page_load_latency:
+            sleep(self._page_load_latency)
+        self._reveal_cards(tab, feed)
+        collect()
+        if limit and len(tab.scroll_seen) >= limit:
+            return {"results": fresh, "end": "limit"}
+        return {"results": fresh, "end": "end" if reached_end() else "idle"}
+
+
+class FixtureBackend(BrowserBackend):
+    """
+    Offline browsers replaying the saved Google Maps pages of `fixtures_dir`, for benchmarks and dry runs.
+
+    Nothing leaves the machine: searches list generated places, place links open the place fixtures and
+    every WebDriver command costs `command_latency` seconds, so the scheduler, the extraction and the
+    output layers can be measured and profiled without Chrome or the network.
+    """
+
+    name = "fixture"
+
+    def __init__(self, fixtures_dir: str = None, command_latency: float = 0.0, page_load_latency: float = 0.0,
+                 results_per_query: int = 20, scroll_batch: int = 7, website_url: str = None,
+                 network_log: bool = False) -> None:
+        """
+        Initialize the fixture backend.
+            :param fixtures_dir: Folder holding home.html, search.html and the place_*.html pages
+                                 (default: benchmarks/fixtures/maps).
+            :param command_latency: Seconds every WebDriver command takes.
+            :param page_load_latency: Extra seconds a navigation or a scrolled results page takes.
+            :param results_per_query: Places listed for every search query.
+            :param scroll_batch: Places revealed by every call of the results feed script.
+            :param website_url: Website link shown on every place page, the fixture's own link if None.
+            :param network_log: Write the navigations and results responses to the performance log.
+        """
+
+        self._fixtures_dir = fixtures_dir or _default_fixtures_dir
+        self._command_latency = command_latency
+        self._page_load_latency = page_load_latency
+        self._results_per_query = results_per_query
+        self._scroll_batch = scroll_batch
+        self._website_url = website_url
+        self._network_log = network_log
+        self._lock = Lock()
+        self.drivers_created = 0
+
+    @property
+    def settings(self) -> dict:
+        return {"name": self.name, "fixtures_dir": self._fixtures_dir, "command_latency": self._command_latency,
+                "page_load_latency": self._page_load_latency, "results_per_query": self._results_per_query,
+                "scroll_batch": self._scroll_batch, "website_url": self._website_url, "network_log": self._network_log}
+
+    def create_driver(self) -> FixtureDriver:
+        with self._lock:
+            self.drivers_created += 1
+            session_id = self.drivers_created
+        return FixtureDriver(fixtures_dir=self._fixtures_dir, command_latency=self._command_latency,
+                             page_load_latency=self._page_load_latency, results_per_query=self._results_per_query,
+                             scroll_batch=self._scroll_batch, website_url=self._website_url,
+                             network_log=self._network_log, session_id=session_id)
+
+
+def create_backend(name: str = "chrome", headless: bool = False, block_profile: str = "none",
+                   network_log: bool = False, **fixture_settings) -> BrowserBackend:
+    """
+    Create a browser backend by name, also accepts the `settings` of an existing backend.
+        :param name: "chrome" or "fixture".
+        :param headless: If True, run the Chrome browsers in headless mode.
+        :param block_profile: BlockingProfile name of the Chrome browsers.
+        :param network_log: Enable the performance log of the browsers.
+        :param fixture_settings: Keyword arguments of FixtureBackend (fixtures_dir, latencies...).
+        :return: The BrowserBackend.
+    """
+
+    name = name.lower()
+    if name == ChromeBackend.name:
+        return ChromeBackend(headless=headless, block_profile=block_profile, network_log=network_log)
+    if name == FixtureBackend.name:
+        return FixtureBackend(network_log=network_log, **fixture_settings)
+    raise ValueError(f"Unknown browser backend: {name}")
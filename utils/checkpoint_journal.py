@@ -0,0 +1,121 @@
+from utils.place_index import PlaceIndex
+from os.path import join, isfile
+from threading import Lock
+import json
+import os
+
+
+class CheckpointJournal:
+    """
+    Append-only log of the progress of a run, used by --resume to skip finished work.
+
+    The journal lives next to the output files and holds one JSON event per line:
+        {"event": "harvested", "query": ..., "places": [...]}  place links a query is responsible for
+        {"event": "written", "place_ids": [...]}               records handed to the output writers
+        {"event": "query_done", "query": ...}                  query finished in TAB mode (older journals)
+        {"event": "tile_split", "query": ..., "tiles": [...]}  dense map tile replaced by smaller tiles
+    It is registered with the OutputSink, which only journals a batch once the output writers have it, so
+    a place is never marked written before its record is, and a query is only done once every place it
+    harvested (or scraped itself in TAB mode) is written. Resuming replays the file once, startup cost grows
+    with the size of the journal and not with the number of queries.
+
+    Methods:
+        query_state(self, query):
+            Where a query stopped in the resumed run.
+
+        record_harvest(self, query, place_links):
+            Journal the place links a query is responsible for.
+
+        record_split(self, query, tiles):
+            Journal the tiles a dense map tile was split into.
+
+        create(self, list_of_dict_data):
+            Journal records written by the output writers.
+
+        close(self):
+            Flush and close the journal.
+    """
+
+    def __init__(self, output_path: str, resume: bool = False, file_name: str = "checkpoint_journal.jsonl") -> None:
+        """
+        Open the journal.
+            :param output_path: Folder the journal is stored in, usually the output folder.
+            :param resume: Replay the existing journal and keep appending to it, otherwise start a new one.
+            :param file_name: Name of the journal file.
+        """
+
+        self.file_path = join(output_path, file_name)
+        self._lock = Lock()
+        self.finished_queries = set()
+        self.harvested = {}
+        self.written_place_ids = set()
+        self.split_tiles = {}
+
+        if resume and isfile(self.file_path):
+            self._replay()
+        os.makedirs(output_path, exist_ok=True)
+        self._file_handler = open(self.file_path, "a" if resume else "w", encoding="utf-8")
+        if resume and self._file_handler.tell() > 0:
+            # start on a fresh line in case the last one was cut short
+            self._file_handler.write("\n")
+
+    def _replay(self) -> None:
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    # last line of a killed run may be cut short
+                    continue
+                if event.get("event") == "written":
+                    self.written_place_ids.update(event["place_ids"])
+                elif event.get("event") == "harvested":
+                    self.harvested[event["query"]] = event["places"]
+                elif event.get("event") == "query_done":
+                    self.finished_queries.add(event["query"])
+                elif event.get("event") == "tile_split":
+                    self.split_tiles[event["query"]] = event["tiles"]
+
+    def query_state(self, query: str) -> tuple[str, list]:
+        """
+        Where a query stopped in the resumed run.
+            :param query: The search query.
+            :return: ("done", []), ("harvested", place links not written yet) or ("pending", []).
+        """
+
+        if query in self.finished_queries:
+            return "done", []
+        if query in self.harvested:
+            remaining = [link for link in self.harvested[query]
+                         if PlaceIndex.canonical_id(link) not in self.written_place_ids]
+            return ("harvested", remaining) if remaining else ("done", [])
+        return "pending", []
+
+    def _append(self, events: list[dict]) -> None:
+        lines = "".join(json.dumps(event, ensure_ascii=False) + "\n" for event in events)
+        with self._lock:
+            if self._file_handler is None:
+                return
+            self._file_handler.write(lines)
+            self._file_handler.flush()
+
+    def record_harvest(self, query: str, place_links: list) -> None:
+        self._append([{"event": "harvested", "query": query, "places": place_links}])
+
+    def record_split(self, query: str, tiles: list) -> None:
+        self.split_tiles[query] = tiles
+        self._append([{"event": "tile_split", "query": query, "tiles": tiles}])
+
+    def create(self, list_of_dict_data: list[dict]) -> None:
+        place_ids = [PlaceIndex.canonical_id(data_dict["map_link"]) for data_dict in list_of_dict_data
+                     if data_dict.get("map_link")]
+        if place_ids:
+            self._append([{"event": "written", "place_ids": place_ids}])
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file_handler is not None:
+                self._file_handler.flush()
+                os.fsync(self._file_handler.fileno())
+                self._file_handler.close()
+                self._file_handler = None
@@ -0,0 +1,281 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from utils.query_scheduler import QueryScheduler, ScheduledQuery
+from threading import Thread, Lock, Event
+from hmac import compare_digest
+from secrets import token_urlsafe
+from itertools import count
+from time import time
+import json
+
+
+class _CoordinatorHandler(BaseHTTPRequestHandler):
+    """JSON over HTTP front of the Coordinator, one POST endpoint per call, every request carries the token."""
+
+    def _reply(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _authorized(self) -> bool:
+        given = self.headers.get("Authorization", "")
+        if compare_digest(given.encode("utf-8"), f"Bearer {self.server.coordinator.token}".encode("utf-8")):
+            return True
+        self._reply(401, {"error": "missing or wrong coordinator token"})
+        return False
+
+    def do_GET(self) -> None:
+        if not self._authorized():
+            return
+        if self.path == "/stats":
+            self._reply(200, self.server.coordinator.stats())
+        else:
+            self._reply(404, {"error": "unknown endpoint"})
+
+    def do_POST(self) -> None:
+        if not self._authorized():
+            return
+        coordinator = self.server.coordinator
+        routes = {"/lease": coordinator.lease, "/heartbeat": coordinator.heartbeat,
+                  "/records": coordinator.add_records, "/complete": coordinator.complete,
+                  "/goodbye": coordinator.goodbye}
+        if self.path not in routes:
+            self._reply(404, {"error": "unknown endpoint"})
+            return
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        except ValueError:
+            self._reply(400, {"error": "invalid JSON"})
+            return
+        self._reply(200, routes[self.path](payload))
+
+    def log_message(self, format: str, *args) -> None:
+        # the dashboard owns the console
+        ...
+
+
+class Coordinator:
+    """
+    Hands the tasks of a QueryScheduler out to remote workers over HTTP.
+
+    Workers lease tasks (a query, or a batch of place pages), renew their leases with heartbeats while they
+    work, stream their records back and report every outcome. A lease that is not renewed within
+    `lease_seconds` is taken back and its task requeued as a failure, so the work of a dead worker goes to
+    the others. Records are merged into the coordinator's own output sink, delivery is at least once. Every
+    request must carry the shared `token` (Authorization: Bearer), a random one is made up when none is given.
+
+    Methods:
+        start(self):
+            Start serving.
+
+        lease(self, payload):
+            Hand out up to `max_tasks` tasks to a worker.
+
+        heartbeat(self, payload):
+            Renew the leases a worker still holds.
+
+        add_records(self, payload):
+            Merge records sent by a worker into the output.
+
+        complete(self, payload):
+            Report the outcome of a leased task.
+
+        goodbye(self, payload):
+            A worker flushed its records and exits.
+
+        serve_until_finished(self, stop_event):
+            Block until every task is done and every worker left.
+
+        stats(self):
+            Scheduler counters, active leases and workers.
+
+        stop(self):
+            Stop serving.
+    """
+
+    def __init__(self, scheduler: QueryScheduler, file_creator: any, apply_outcome: callable,
+                 place_mode: str = "url", host: str = "0.0.0.0", port: int = 8765, lease_seconds: int = 60,
+                 dashboard: any = None, token: str = None) -> None:
+        """
+        Initialize the coordinator.
+            :param scheduler: The scheduler holding the queries of the run.
+            :param file_creator: Receives the records of every worker (usually the OutputSink).
+            :param apply_outcome: Callable(task, outcome) -> completed, applies a reported outcome (journal,
+                                  place index, harvested places) like for local workers.
+            :param place_mode: "url" or "tab", sent to the workers with their tasks.
+            :param host: Interface to listen on.
+            :param port: Port to listen on.
+            :param lease_seconds: Seconds a lease stays valid without a heartbeat.
+            :param dashboard: Optional StatusDashboard showing one line per worker.
+            :param token: Shared secret the workers send with every request, a random one when None.
+        """
+
+        self._scheduler = scheduler
+        self._file_creator = file_creator
+        self._apply_outcome = apply_outcome
+        self._place_mode = place_mode
+        self._lease_seconds = lease_seconds
+        self._dashboard = dashboard
+        self.token = token or token_urlsafe(16)
+        self._leases = {}
+        self._lease_ids = count(1)
+        self._workers = {}
+        self._lock = Lock()
+        self._stopped = Event()
+        self.records_received = 0
+        self.leases_expired = 0
+
+        self._server = ThreadingHTTPServer((host, port), _CoordinatorHandler)
+        self._server.daemon_threads = True
+        self._server.coordinator = self
+        self._server_thread = Thread(target=self._server.serve_forever, name="Coordinator", daemon=True)
+        self._reaper_thread = Thread(target=self._reap_expired, name="CoordinatorReaper", daemon=True)
+
+    @property
+    def address(self) -> tuple:
+        return self._server.server_address
+
+    def start(self) -> None:
+        self._server_thread.start()
+        self._reaper_thread.start()
+
+    def _seen(self, worker_id: str) -> None:
+        worker = self._workers.setdefault(worker_id, {"last_seen": 0, "left": False, "tasks": 0})
+        worker["last_seen"] = time()
+        worker["left"] = False
+
+    def _post(self, worker_id: str, task: ScheduledQuery, status: str) -> None:
+        if self._dashboard is not None:
+            self._dashboard.post(query=task.source_query or task.query, status=f"[{worker_id}] {status}",
+                                 mode="coordinator", results_indices=task.results_indices or "Calculating",
+                                 worker=worker_id)
+
+    @staticmethod
+    def _task_payload(lease_id: int, task: ScheduledQuery) -> dict:
+        # deadlines travel as remaining seconds, the clocks of the workers may differ
+        return {"lease_id": lease_id, "kind": task.kind, "query": task.query, "source_query": task.source_query,
+                "results_indices": task.results_indices,
+                "timeout": None if task.deadline is None else max(0.0, task.deadline - time())}
+
+    def lease(self, payload: dict) -> dict:
+        worker_id = str(payload.get("worker_id"))
+        max_tasks = max(1, int(payload.get("max_tasks", 1)))
+        tasks = []
+        with self._lock:
+            self._seen(worker_id)
+        while len(tasks) < max_tasks and not self._stopped.is_set():
+            task = self._scheduler.get(timeout=0)
+            if task is None:
+                break
+            with self._lock:
+                lease_id = next(self._lease_ids)
+                self._leases[lease_id] = {"task": task, "worker_id": worker_id,
+                                          "expires": time() + self._lease_seconds}
+            tasks.append(self._task_payload(lease_id, task))
+            self._post(worker_id, task, "Leased")
+            # a query is a long task on its own, only place pages are batched
+            if task.kind != "place":
+                break
+        return {"tasks": tasks, "finished": self._stopped.is_set() or (not tasks and self._scheduler.finished()),
+                "place_mode": self._place_mode, "lease_seconds": self._lease_seconds}
+
+    def heartbeat(self, payload: dict) -> dict:
+        worker_id = str(payload.get("worker_id"))
+        renewed, lost = [], []
+        with self._lock:
+            self._seen(worker_id)
+            for lease_id in payload.get("lease_ids", []):
+                lease = self._leases.get(lease_id)
+                if lease is not None and lease["worker_id"] == worker_id:
+                    lease["expires"] = time() + self._lease_seconds
+                    renewed.append(lease_id)
+                else:
+                    lost.append(lease_id)
+        return {"renewed": renewed, "lost": lost}
+
+    def add_records(self, payload: dict) -> dict:
+        records = payload.get("records", [])
+        with self._lock:
+            self._seen(str(payload.get("worker_id")))
+            self.records_received += len(records)
+        self._file_creator.create(list_of_dict_data=records)
+        return {"accepted": len(records)}
+
+    def complete(self, payload: dict) -> dict:
+        worker_id = str(payload.get("worker_id"))
+        with self._lock:
+            self._seen(worker_id)
+            lease = self._leases.get(payload.get("lease_id"))
+            if lease is None or lease["worker_id"] != worker_id:
+                # the lease expired and the task went to another worker
+                return {"accepted": False}
+            del self._leases[payload.get("lease_id")]
+            self._workers[worker_id]["tasks"] += 1
+
+        task = lease["task"]
+        if not payload.get("success"):
+            self._post(worker_id, task, f"Failed: {payload.get('error')}")
+            self._scheduler.task_done(task, success=False)
+            return {"accepted": True}
+        try:
+            completed = self._apply_outcome(task, payload.get("outcome") or {})
+        except Exception as e:
+            self._post(worker_id, task, f"Failed: {e}")
+            self._scheduler.task_done(task, success=False)
+            return {"accepted": True}
+        self._post(worker_id, task, "Done")
+        self._scheduler.task_done(task, success=True, timed_out=not completed)
+        return {"accepted": True}
+
+    def goodbye(self, payload: dict) -> dict:
+        with self._lock:
+            self._seen(str(payload.get("worker_id")))
+            self._workers[str(payload.get("worker_id"))]["left"] = True
+        return {"accepted": True}
+
+    def _reap_expired(self) -> None:
+        while not self._stopped.wait(1.0):
+            now = time()
+            with self._lock:
+                expired = [lease_id for lease_id, lease in self._leases.items() if lease["expires"] < now]
+                leases = [self._leases.pop(lease_id) for lease_id in expired]
+                self.leases_expired += len(leases)
+            for lease in leases:
+                self._post(lease["worker_id"], lease["task"], "Lease expired, task requeued")
+                self._scheduler.task_done(lease["task"], success=False)
+
+    def _workers_gone(self) -> bool:
+        now = time()
+        with self._lock:
+            return all(worker["left"] or now - worker["last_seen"] > self._lease_seconds
+                       for worker in self._workers.values())
+
+    def serve_until_finished(self, stop_event: Event = None) -> None:
+        """
+        Block until every task is done and every worker flushed its records and left (or went silent).
+            :param stop_event: Optional event that ends the wait early.
+        """
+
+        while not (stop_event is not None and stop_event.is_set()):
+            if self._scheduler.finished() and self._workers_gone():
+                return
+            self._stopped.wait(1.0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            workers = {worker_id: {"tasks": worker["tasks"], "left": worker["left"],
+                                   "idle_seconds": round(time() - worker["last_seen"], 1)}
+                       for worker_id, worker in self._workers.items()}
+            stats = {"leases": len(self._leases), "leases_expired": self.leases_expired,
+                     "records_received": self.records_received, "workers": workers}
+        stats.update(self._scheduler.stats())
+        return stats
+
+    def stop(self) -> None:
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,222 @@
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.webdriver import WebDriver
+from psutil import Process, NoSuchProcess
+from threading import Lock
+from queue import Queue
+from time import time
+
+
+class PooledDriver:
+    """
+    A browser owned by the DriverPool together with its bookkeeping counters.
+
+    Attributes:
+        driver_id (int): Stable slot number of this browser inside the pool.
+        driver (WebDriver): The live WebDriver instance (replaced on recycle).
+        launches (int): How many times a browser was started for this slot.
+        reuses (int): How many queries were served by an already warm browser.
+        queries_served (int): Search queries served by the current browser since its last launch, single place
+                              pages opened by URL are not counted.
+        launch_seconds (float): Total time spent launching browsers for this slot.
+    """
+
+    def __init__(self, driver_id: int) -> None:
+        self.driver_id = driver_id
+        self.driver = None
+        self.launches = 0
+        self.reuses = 0
+        self.queries_served = 0
+        self.launch_seconds = 0.0
+
+    def stats(self) -> dict:
+        return {
+            "driver_id": self.driver_id,
+            "launches": self.launches,
+            "reuses": self.reuses,
+            "queries_served": self.queries_served,
+            "launch_seconds": round(self.launch_seconds, 2),
+        }
+
+
+class DriverPool:
+    """
+    A pool of warm Chrome sessions shared by the scraper threads.
+
+    Browsers are launched lazily up to `size`, handed out one per query and reset (stray tabs closed,
+    back to `reset_url`) when they are returned. A browser is only relaunched after it has served
+    `max_queries` search queries (single place pages do not count), when its resident memory exceeds
+    `max_rss_mb` or when it was returned broken.
+
+    Methods:
+        acquire(self, query):
+            Get a warm PooledDriver, launching a new browser if the pool is not full yet.
+
+        release(self, pooled, healthy):
+            Return a PooledDriver to the pool, resetting or recycling its browser.
+
+        reset_driver(self, driver):
+            Close stray tabs and navigate the first tab back to the reset URL.
+
+        browser_rss_mb(driver):
+            Resident memory (MB) of the browser process tree behind a driver.
+
+        stats(self):
+            Per-driver launch and reuse counters.
+
+        close(self):
+            Quit every browser owned by the pool.
+    """
+
+    def __init__(self, driver_factory: callable, size: int = 1, reset_url: str = "https://www.google.com/maps",
+                 max_queries: int = 0, max_rss_mb: int = 0) -> None:
+        """
+        Initialize the driver pool.
+            :param driver_factory: Callable returning a new configured WebDriver.
+            :param size: Maximum number of browsers kept alive at the same time.
+            :param reset_url: URL every browser is sent back to between queries.
+            :param max_queries: Recycle a browser after this many search queries (0 disables the limit).
+            :param max_rss_mb: Recycle a browser once its memory exceeds this many MB (0 disables the limit).
+        """
+
+        self._driver_factory = driver_factory
+        self._size = max(1, size)
+        self._reset_url = reset_url
+        self._max_queries = max_queries
+        self._max_rss_mb = max_rss_mb
+
+        self._idle = Queue()
+        self._slots = []
+        self._slots_lock = Lock()
+        self._closed = False
+
+    def _launch(self, pooled: PooledDriver) -> None:
+        start_time = time()
+        driver = self._driver_factory()
+        try:
+            driver.get(self._reset_url)
+        except WebDriverException:
+            ...
+        pooled.driver = driver
+        pooled.launches += 1
+        pooled.queries_served = 0
+        pooled.launch_seconds += time() - start_time
+
+    @staticmethod
+    def _quit(driver: WebDriver) -> None:
+        try:
+            driver.quit()
+        except Exception as e:
+            _ = e
+
+    def acquire(self, query: bool = True) -> PooledDriver:
+        """
+        Get a warm driver from the pool. Blocks while every browser is busy and the pool is full.
+            :param query: False when the driver only opens one place page, it then does not count towards
+                          max_queries.
+            :return: A PooledDriver holding a ready to use WebDriver.
+        """
+
+        pooled = None
+        with self._slots_lock:
+            if self._idle.empty() and len(self._slots) < self._size:
+                pooled = PooledDriver(driver_id=len(self._slots) + 1)
+                self._slots.append(pooled)
+
+        if pooled is None:
+            pooled = self._idle.get()
+            if pooled.driver is not None:
+                pooled.reuses += 1
+
+        if pooled.driver is None:
+            try:
+                self._launch(pooled)
+            except Exception:
+                # keep the slot, the next acquire() tries to launch it again
+                self._idle.put(pooled)
+                raise
+
+        if query:
+            pooled.queries_served += 1
+        return pooled
+
+    def release(self, pooled: PooledDriver, healthy: bool = True, reset: bool = True) -> None:
+        """
+        Return a driver to the pool.
+            :param pooled: The PooledDriver obtained from acquire().
+            :param healthy: False if the browser crashed or was closed, it will be relaunched on next use.
+            :param reset: False to leave the current page loaded, for callers that navigate by URL right away.
+        """
+
+        if self._closed:
+            self._quit(pooled.driver)
+            pooled.driver = None
+            return
+
+        recycle = not healthy
+        if not recycle and self._max_queries and pooled.queries_served >= self._max_queries:
+            recycle = True
+        if not recycle and self._max_rss_mb and self.browser_rss_mb(pooled.driver) >= self._max_rss_mb:
+            recycle = True
+
+        if not recycle:
+            try:
+                self.reset_driver(pooled.driver, load_reset_url=reset)
+            except WebDriverException:
+                recycle = True
+
+        if recycle:
+            self._quit(pooled.driver)
+            pooled.driver = None
+
+        self._idle.put(pooled)
+
+    def reset_driver(self, driver: WebDriver, load_reset_url: bool = True) -> None:
+        """
+        Close stray tabs and send the remaining tab back to the reset URL.
+            :param driver: The WebDriver instance.
+            :param load_reset_url: False to only close the stray tabs.
+        """
+
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        if load_reset_url:
+            driver.get(self._reset_url)
+
+    @staticmethod
+    def browser_rss_mb(driver: WebDriver) -> float:
+        """
+        Resident memory of the browser process and all of its renderer children.
+            :param driver: The WebDriver instance.
+            :return: Memory in megabytes, 0 if the process can not be inspected.
+        """
+
+        browser_pid = getattr(driver, "browser_pid", None)
+        if browser_pid is None:
+            return 0
+        try:
+            browser = Process(browser_pid)
+            processes = [browser] + browser.children(recursive=True)
+            total_rss = 0
+            for process in processes:
+                try:
+                    total_rss += process.memory_info().rss
+                except NoSuchProcess:
+                    continue
+        except NoSuchProcess:
+            return 0
+        return total_rss / 1024 / 1024
+
+    def stats(self) -> list[dict]:
+        with self._slots_lock:
+            return [pooled.stats() for pooled in self._slots]
+
+    def close(self) -> None:
+        self._closed = True
+        with self._slots_lock:
+            for pooled in self._slots:
+                if pooled.driver is not None:
+                    self._quit(pooled.driver)
+                    pooled.driver = None
@@ -0,0 +1,94 @@
+from concurrent.futures import ThreadPoolExecutor
+from utils.web_site_scraper import PatternScrapper
+from threading import BoundedSemaphore, Lock, Condition
+from utils.metrics import MetricsRegistry
+
+
+class EnrichmentStage:
+    """
+    Website enrichment running beside the Maps scrapers instead of inside them.
+
+    Scraper threads call create() with records that still have placeholder site_email/social fields, a pool
+    of `workers` threads downloads the contact pages of each record's `webpage` over HTTP, fills the fields
+    in and passes the record on to the downstream writer (usually the OutputSink). create() only blocks when
+    `max_pending` records are already waiting, so the Maps browsers never wait for third-party websites.
+
+    Methods:
+        create(self, list_of_dict_data):
+            Queue records for enrichment.
+
+        drain(self):
+            Wait until every record queued so far has been handed downstream.
+
+        close(self):
+            Wait for every queued record to be enriched and handed downstream.
+    """
+
+    def __init__(self, downstream: any, pattern_scraper: PatternScrapper, suggested_ext: list,
+                 unavailable_text: str = "Not Available", workers: int = 32, max_pending: int = 1000,
+                 metrics: MetricsRegistry = None) -> None:
+        """
+        Initialize the enrichment stage.
+            :param downstream: Object exposing create(list_of_dict_data) that receives the enriched records.
+            :param pattern_scraper: A PatternScrapper configured with an HTTPPageFetcher.
+            :param suggested_ext: URL extensions tried on every website (e.g. contact, about).
+            :param unavailable_text: Placeholder text for unavailable data.
+            :param workers: Number of websites enriched at the same time.
+            :param max_pending: Maximum records waiting for enrichment before create() blocks.
+            :param metrics: Optional MetricsRegistry receiving the time spent per record.
+        """
+
+        self._downstream = downstream
+        self._pattern_scraper = pattern_scraper
+        self._suggested_ext = suggested_ext
+        self._unavailable_text = unavailable_text
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="Enrichment")
+        self._pending = BoundedSemaphore(max_pending)
+        self._counter_lock = Lock()
+        self._idle = Condition(self._counter_lock)
+        self._queued = 0
+        self._metrics = metrics or MetricsRegistry()
+        self.records_enriched = 0
+
+    def create(self, list_of_dict_data: list[dict]) -> None:
+        for data_dict in list_of_dict_data:
+            self._pending.acquire()
+            with self._counter_lock:
+                self._queued += 1
+            try:
+                self._executor.submit(self._enrich, data_dict)
+            except RuntimeError:
+                # Executor already shut down, keep the record with its placeholders
+                self._pending.release()
+                self._downstream.create(list_of_dict_data=[data_dict])
+                self._done()
+
+    def _done(self) -> None:
+        with self._counter_lock:
+            self._queued -= 1
+            if not self._queued:
+                self._idle.notify_all()
+
+    def _enrich(self, data_dict: dict) -> None:
+        try:
+            webpage = data_dict.get("webpage", self._unavailable_text)
+            with self._metrics.timer("gmaps_stage_seconds", stage="enrichment", worker="enrichment"):
+                website_data = self._pattern_scraper.find_patterns(None, webpage, self._suggested_ext,
+                                                                   self._unavailable_text)
+            data_dict.update(website_data)
+        except Exception as e:
+            _ = e
+        finally:
+            self._downstream.create(list_of_dict_data=[data_dict])
+            with self._counter_lock:
+                self.records_enriched += 1
+            self._pending.release()
+            self._done()
+
+    def drain(self) -> None:
+        with self._idle:
+            while self._queued:
+                self._idle.wait()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
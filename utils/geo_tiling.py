@@ -0,0 +1,198 @@
+from urllib.parse import quote_plus, unquote_plus
+from os.path import dirname, abspath, join, isfile
+from math import ceil, cos, radians
+from threading import Lock
+from re import compile
+import csv
+
+_default_gazetteer = join(dirname(dirname(abspath(__file__))), "data", "gazetteer.csv")
+
+
+class Gazetteer:
+    """
+    Bounding boxes of named areas (cities, regions) read from a local CSV file.
+
+    The file has a header and one area per line: name,south,west,north,east in decimal degrees. Names are
+    matched case-insensitively, so "berlin" and "Berlin" find the same box.
+
+    Methods:
+        lookup(self, name):
+            Bounding box of a named area.
+    """
+
+    def __init__(self, file_path: str = None) -> None:
+        """
+        Load the gazetteer.
+            :param file_path: Path of the CSV file (default: data/gazetteer.csv).
+        """
+
+        self.file_path = file_path or _default_gazetteer
+        self._areas = {}
+        if not isfile(self.file_path):
+            return
+        with open(self.file_path, "r", encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                try:
+                    self._areas[row["name"].strip().lower()] = (float(row["south"]), float(row["west"]),
+                                                                float(row["north"]), float(row["east"]))
+                except (KeyError, TypeError, ValueError):
+                    continue
+
+    def lookup(self, name: str) -> tuple:
+        return self._areas.get(name.strip().lower())
+
+    def __len__(self) -> int:
+        return len(self._areas)
+
+
+class TilePlanner:
+    """
+    Splits a query over a grid of map viewports, each one a Google Maps search URL the scrapers accept as a query.
+
+    Maps stops a results list at about 120 places, so a city-wide query only ever shows part of the city. The
+    planner covers a bounding box with viewports of `zoom` (https://www.google.com/maps/search/<query>/@lat,lng,zoomz)
+    that the scheduler hands to every worker like any other query. A tile whose list comes back with at least
+    `split_at` places is probably cut short, it is replaced by its four quarters one zoom level closer, down to
+    `max_zoom`. Tiles overlap at their edges, the place index merges the places found by several tiles by their
+    place ID.
+
+    Methods:
+        resolve_area(self, area):
+            Bounding box of "south,west,north,east" or of a gazetteer name.
+
+        tile_url(self, query, latitude, longitude, zoom):
+            Search URL of one viewport.
+
+        plan(self, query, bounding_box):
+            Tile URLs covering a bounding box for one query.
+
+        expand(self, queries, bounding_box):
+            Tile URLs of every query.
+
+        subdivide(self, tile_url, results_found):
+            The four quarters of a dense tile.
+
+        stats(self):
+            Counters of planned and split tiles.
+    """
+
+    _maps_url = "https://www.google.com/maps"
+    _tile_pattern = compile(r'/maps/search/([^/]+)/@(-?\d+(?:\.\d+)?),(-?\d+(?:\.\d+)?),(\d+(?:\.\d+)?)z')
+
+    def __init__(self, zoom: int = 14, split_at: int = 100, max_zoom: int = 18, gazetteer: Gazetteer = None,
+                 viewport: tuple = (1280, 800), max_tiles: int = 2000) -> None:
+        """
+        Initialize the planner.
+            :param zoom: Zoom level of the first grid, 14 covers about 3 x 2 km per tile around 50° of latitude.
+            :param split_at: Places in a results list from which a tile is split (0 never splits).
+            :param max_zoom: Closest zoom level a tile is split to.
+            :param gazetteer: Gazetteer the area names are looked up in.
+            :param viewport: Width and height in pixels of the browser map, the size of a tile on the map.
+            :param max_tiles: Most tiles a single query may be planned into, the zoom is lowered to stay below.
+        """
+
+        self._zoom = zoom
+        self._split_at = split_at
+        self._max_zoom = max_zoom
+        self._gazetteer = gazetteer or Gazetteer()
+        self._viewport = viewport
+        self._max_tiles = max_tiles
+        self._lock = Lock()
+        self._planned = 0
+        self._split = 0
+
+    def resolve_area(self, area: str) -> tuple:
+        """
+        Bounding box of "south,west,north,east" or of a gazetteer name.
+            :param area: The area.
+            :return: (south, west, north, east).
+            :raises ValueError: The area is neither a valid box nor in the gazetteer.
+        """
+
+        parts = [part.strip() for part in area.split(",")]
+        if len(parts) == 4:
+            try:
+                south, west, north, east = (float(part) for part in parts)
+            except ValueError:
+                pass
+            else:
+                if south >= north or west >= east:
+                    raise ValueError(f"Empty bounding box: {area} (expected south,west,north,east)")
+                return south, west, north, east
+        bounding_box = self._gazetteer.lookup(area)
+        if bounding_box is None:
+            raise ValueError(f"Unknown area {area!r}: not a south,west,north,east box and not in the gazetteer "
+                             f"{self._gazetteer.file_path}")
+        return bounding_box
+
+    def _span(self, latitude: float, zoom: float) -> tuple[float, float]:
+        # degrees covered by the viewport, 256 px per world width at zoom 0 (Web Mercator)
+        longitude_span = 360 / 2 ** zoom * self._viewport[0] / 256
+        latitude_span = 360 / 2 ** zoom * self._viewport[1] / 256 * cos(radians(latitude))
+        return latitude_span, longitude_span
+
+    def tile_url(self, query: str, latitude: float, longitude: float, zoom: float) -> str:
+        return f"{self._maps_url}/search/{quote_plus(query)}/@{latitude:.6f},{longitude:.6f},{zoom:g}z"
+
+    def plan(self, query: str, bounding_box: tuple) -> list[str]:
+        """
+        Tile URLs covering a bounding box for one query.
+            :param query: The search query.
+            :param bounding_box: (south, west, north, east).
+            :return: The tile URLs, row by row from the north-west corner.
+        """
+
+        south, west, north, east = bounding_box
+        zoom = self._zoom
+        while True:
+            latitude_span, longitude_span = self._span((south + north) / 2, zoom)
+            rows = max(1, ceil((north - south) / latitude_span))
+            columns = max(1, ceil((east - west) / longitude_span))
+            if rows * columns <= self._max_tiles or zoom <= 1:
+                break
+            zoom -= 1
+
+        # cells shrink a little so the grid ends exactly on the box
+        cell_height, cell_width = (north - south) / rows, (east - west) / columns
+        tiles = [self.tile_url(query, north - (row + 0.5) * cell_height, west + (column + 0.5) * cell_width, zoom)
+                 for row in range(rows) for column in range(columns)]
+        with self._lock:
+            self._planned += len(tiles)
+        return tiles
+
+    def expand(self, queries: list[str], bounding_box: tuple) -> list[str]:
+        # URLs are already a viewport or a place, they are kept as they are
+        expanded = []
+        for query in queries:
+            if not query:
+                continue
+            expanded.extend([query] if query.lower().startswith("http") else self.plan(query, bounding_box))
+        return expanded
+
+    def subdivide(self, tile_url: str, results_found: int) -> list[str]:
+        """
+        The four quarters of a dense tile.
+            :param tile_url: URL of a tile planned by this planner.
+            :param results_found: Places the results list of the tile showed.
+            :return: The URLs of the quarters, empty if the tile is not dense, already at max_zoom or not a tile.
+        """
+
+        match = self._tile_pattern.search(tile_url)
+        if not self._split_at or results_found < self._split_at or match is None:
+            return []
+        query, latitude, longitude, zoom = (unquote_plus(match.group(1)), float(match.group(2)),
+                                            float(match.group(3)), float(match.group(4)))
+        if zoom >= self._max_zoom:
+            return []
+        latitude_span, longitude_span = self._span(latitude, zoom)
+        quarters = [self.tile_url(query, latitude + latitude_offset * latitude_span / 4,
+                                  longitude + longitude_offset * longitude_span / 4, zoom + 1)
+                    for latitude_offset in (1, -1) for longitude_offset in (-1, 1)]
+        with self._lock:
+            self._planned += len(quarters)
+            self._split += 1
+        return quarters
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"planned": self._planned, "split": self._split}
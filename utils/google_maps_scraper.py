@@ -1,18 +1,26 @@
 from selenium.common.exceptions import (TimeoutException, NoSuchElementException, StaleElementReferenceException,
-                                        NoSuchWindowException)
-from utils.output_files_formats import CSVCreator, XLSXCreator, JSONCreator
+                                        NoSuchWindowException, WebDriverException)
+from utils.output_files_formats import create_file_creator
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.webdriver import WebDriver
 from selenium.webdriver.support.ui import WebDriverWait
 from utils.web_site_scraper import PatternScrapper
+from utils.resource_blocking import BlockingProfile
+from utils.maps_payload import PayloadCapture
+from utils.selector_registry import SelectorRegistry
+from utils.wait_policy import WaitPolicy
+from utils.network_monitor import NetworkMonitor
+from utils.http_fetcher import HTTPPageFetcher
+from utils.place_index import PlaceIndex
+from utils.driver_pool import DriverPool
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.by import By
 import undetected_chromedriver as uc
-from utils.pprints import PPrints
-from threading import Lock, Event
-from time import time, sleep
+from utils.pprints import PPrints, StatusDashboard
+from threading import Lock, Event, current_thread
+from utils.metrics import MetricsRegistry
+from time import time, perf_counter
 from os.path import exists
-from random import uniform
 from os import mkdir
 
 
@@ -23,6 +31,12 @@ class GoogleMaps:
     Attributes:
         _maps_url (str): The base URL for Google Maps.
         _finger_print_defender_ext (str): Path to the fingerprint defender browser extension.
+        results_found (int): Places listed by the last results list, before the already scraped ones are dropped.
+        results_complete (bool): False when the deadline or the stop event cut the scrolling of the last results
+                                 list short.
+        query_places (list): Links of the places the last query is responsible for: the claimed links of its
+                             results list, or the single place it opened. The query is finished once they are all
+                             written.
 
     Methods:
         __init__(self, driver_path, unavailable_text, headless, wait_time, suggested_ext,
@@ -32,8 +46,14 @@ class GoogleMaps:
         is_path_available(self):
             Check if the output directory exists and create it if not.
 
+        build_chrome_driver(cls, headless, blocking_profile, performance_log):
+            Launch a configured Chrome WebDriver instance.
+
         create_chrome_driver(self):
-            Create and configure a Chrome WebDriver instance.
+            Create a WebDriver instance with the driver factory (a Chrome browser by default).
+
+        attach_driver(self, driver):
+            Bind the explicit wait helper to a driver.
 
         load_url(self, driver, url):
             Load a URL in the given WebDriver instance.
@@ -41,10 +61,10 @@ class GoogleMaps:
         search_query(self, query):
             Perform a search query on Google Maps.
 
-        validate_result_link(self, result, driver):
+        validate_result_link(self, result, driver, open_in_tab):
             Validate and process a search result link.
 
-        get_cover_image(self):
+        get_cover_image(self, driver):
             Get the cover image source URL from a search result.
 
         get_title(self, driver):
@@ -80,29 +100,241 @@ class GoogleMaps:
         get_about_description(self, driver):
             Get the description of a search result card.
 
+        get_place_fields_batch(self, driver):
+            Read every passive field of a place card with a single script call.
+
+        parse_batch_fields(self, raw_fields):
+            Convert the raw values returned by the batch script into output values.
+
         reset_driver_for_next_run(self, result, driver):
             Reset the driver to its main window after processing a search result.
 
+        page_settled(self, driver, place):
+            Whether the page finished loading and shows a place card.
+
+        _find_field(self, driver, field):
+            First element of a field found by the selector registry.
+
+        _wait_for_field(self, driver, field, probe, settled):
+            Wait for a field with the wait policy, recorded by the selector registry.
+
         scroll_to_the_end_event(self, driver):
             Scroll to the end of search results and collect them.
 
+        _read_field(self, name, batch_fields, getter, *args):
+            Take a field from the batch extraction or look it up with its getter, timed per field.
+
         _scrape_result_and_store(self, driver, mode, result, query, results_indices):
             Scrape and store data from a search result.
 
-        start_scrapper(self, query):
+        start_scrapper(self, query, deadline, skip_place_ids):
             Start the scraping process for a given query.
+
+        harvest_links(self, query, deadline):
+            Collect the place links of a query without opening them (two-phase mode).
+
+        scrape_place(self, place_url, query, results_indices, deadline):
+            Scrape one harvested place page by navigating straight to it (two-phase mode).
+
+        place_id(self, map_link):
+            Canonical place ID of a result link.
     """
 
     _maps_url = "https://www.google.com/maps"
     _finger_print_defender_ext = "./extensions/finger_print_defender.crx"
 
+    # Field name -> (attribute to read, read every match instead of the first one)
+    _batch_fields = {
+        "cover_image": ("src", False),
+        "title": ("text", False),
+        "rating": ("text", False),
+        "privacy_price": ("text", False),
+        "category": ("text", False),
+        "address": ("text", False),
+        "menu_link": ("href", False),
+        "webpage": ("href", False),
+        "phone_number": ("text", True),
+        "related_images": ("src", True),
+    }
+
+    # Fields expected in the Maps payload, the hours and about tabs need clicks in the DOM
+    _payload_fields = (*_batch_fields, "working_hours", "about")
+
+    # Whether the page finished loading, shows a place URL and has a place title (arguments: title locators)
+    _page_state_script = """
+        /* gms:page_state */
+        var locators = arguments[0], title = false;
+        for (var i = 0; i < locators.length && !title; i++) {
+            var by = locators[i][1], selector = locators[i][2];
+            try {
+                if (by === "xpath") {
+                    title = document.evaluate(selector, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE,
+                                              null).singleNodeValue !== null;
+                } else {
+                    selector = by === "class name" ? "." + selector : by === "id" ? "#" + selector : selector;
+                    title = document.querySelector(selector) !== null;
+                }
+            } catch (error) {}
+        }
+        return {
+            ready: document.readyState === "complete",
+            place: location.pathname.indexOf("/maps/place/") !== -1,
+            title: title
+        };
+    """
+
+    # Seconds a single in-page scroll call may run and milliseconds it waits for new cards before returning
+    _scroll_call_seconds = 10
+    _scroll_idle_ms = 3000
+
+    # Scrolls the results feed inside the page and resolves with the links that appeared since the last call.
+    # arguments: result limit (0 = none), time budget (ms), idle timeout (ms), reset the seen links
+    _scroll_feed_script = """
+        /* gms:scroll_feed */
+        var done = arguments[arguments.length - 1];
+        var limit = arguments[0], budget = arguments[1], idle = arguments[2];
+        if (arguments[3] || !window.__gmsScroll) {
+            window.__gmsScroll = {seen: {}, count: 0};
+        }
+        var state = window.__gmsScroll;
+        var feed = document.querySelector('div[role="feed"]');
+        var endMarker = 'div.PbZDve > p.fontBodyMedium > span > span[class="HlvSq"]';
+        var fresh = [], finished = false, observer = null, idleTimer = null, budgetTimer = null;
+
+        function collect() {
+            var links = document.getElementsByClassName("hfpxzc");
+            for (var i = 0; i < links.length; i++) {
+                var href = links[i].href;
+                if (!href || state.seen[href]) {
+                    continue;
+                }
+                if (limit && state.count >= limit) {
+                    break;
+                }
+                state.seen[href] = true;
+                state.count++;
+                // same feature ID PlaceIndex.canonical_id reads first
+                var id = href.match(/!1s(0x[0-9a-f]+:0x[0-9a-f]+)/i);
+                fresh.push([href, id ? id[1].toLowerCase() : ""]);
+            }
+        }
+        function reachedEnd() {
+            var marker = document.querySelector(endMarker);
+            return !!marker && marker.textContent.toLowerCase().indexOf("you've reached the end") !== -1;
+        }
+        function finish(reason) {
+            if (finished) {
+                return;
+            }
+            finished = true;
+            if (observer) {
+                observer.disconnect();
+            }
+            clearTimeout(idleTimer);
+            clearTimeout(budgetTimer);
+            done({results: fresh, end: reason});
+        }
+        function check() {
+            collect();
+            if (limit && state.count >= limit) {
+                finish("limit");
+            } else if (reachedEnd()) {
+                finish("end");
+            } else {
+                clearTimeout(idleTimer);
+                idleTimer = setTimeout(function () { finish("idle"); }, idle);
+                feed.scrollTop = feed.scrollHeight;
+            }
+        }
+
+        if (!feed) {
+            collect();
+            finish("no_feed");
+            return;
+        }
+        observer = new MutationObserver(check);
+        observer.observe(feed, {childList: true, subtree: true});
+        budgetTimer = setTimeout(function () { finish("budget"); }, budget);
+        check();
+    """
+
+    # Reads every field of `arguments[0]` in one round trip, mirrors WebElement.text / get_attribute. Every field
+    # lists its [position, by, selector] locators, the position of the one that matched is returned in _matched
+    _batch_extract_script = """
+        /* gms:batch_extract */
+        var fields = arguments[0];
+        var extracted = {_matched: {}};
+        function lookup(by, selector) {
+            if (by === "xpath") {
+                var snapshot = document.evaluate(selector, document, null,
+                                                 XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+                var found = [];
+                for (var i = 0; i < snapshot.snapshotLength; i++) {
+                    found.push(snapshot.snapshotItem(i));
+                }
+                return found;
+            }
+            if (by === "class name") {
+                selector = "." + selector;
+            } else if (by === "id") {
+                selector = "#" + selector;
+            }
+            return Array.prototype.slice.call(document.querySelectorAll(selector));
+        }
+        for (var f = 0; f < fields.length; f++) {
+            var field = fields[f];
+            var values = [];
+            var nodes = [];
+            extracted._matched[field.name] = null;
+            for (var l = 0; l < field.locators.length && !nodes.length; l++) {
+                try {
+                    nodes = lookup(field.locators[l][1], field.locators[l][2]);
+                } catch (error) {
+                    nodes = [];
+                }
+                if (nodes.length) {
+                    extracted._matched[field.name] = field.locators[l][0];
+                }
+            }
+            for (var n = 0; n < nodes.length; n++) {
+                var value;
+                if (field.attribute === "text") {
+                    value = nodes[n].innerText;
+                } else {
+                    value = nodes[n][field.attribute];
+                    if (value === undefined || value === null) {
+                        value = nodes[n].getAttribute(field.attribute);
+                    }
+                }
+                values.push(value === undefined ? null : value);
+            }
+            extracted[field.name] = field.multiple ? values : (values.length ? values[0] : null);
+        }
+        return extracted;
+    """
+
     def __init__(self, unavailable_text: str = "Not Available", output_format: str = "CSV",
                  headless: bool = False,
                  wait_time: int = 15, suggested_ext: list = None,
                  output_path: str = "./OUTPUT_FILES", verbose: bool = True,
                  print_lock: Lock = None, result_range: int = None,
                  stop_event: Event = Event(),
-                 scroll_minutes: int = 1
+                 scroll_minutes: int = 1,
+                 driver_pool: DriverPool = None,
+                 extraction_mode: str = "batch",
+                 file_creator: any = None,
+                 page_fetcher: HTTPPageFetcher = None,
+                 defer_enrichment: bool = False,
+                 dashboard: StatusDashboard = None,
+                 place_index: PlaceIndex = None,
+                 driver_factory: callable = None,
+                 metrics: MetricsRegistry = None,
+                 worker_name: str = None,
+                 network_report: bool = False,
+                 wait_policy: WaitPolicy = None,
+                 adaptive_wait: bool = True,
+                 selector_registry: SelectorRegistry = None,
+                 selector_file: str = None
                  ) -> None:
         """
         Initialize the GoogleMaps scraper instance.
@@ -116,6 +348,29 @@ class GoogleMaps:
             :param print_lock: A threading.Lock instance for synchronized printing.
             :param result_range: Limit the number of results to be scraped.
             :param stop_event: A threading.Event instance for stopping the scraping process.
+            :param scroll_minutes: Maximum minutes spent scrolling the results list.
+            :param driver_pool: Optional DriverPool to borrow warm browsers from instead of launching one per query.
+            :param extraction_mode: "batch" reads the place card in one script call, "field" uses one getter per field,
+                                    "payload" decodes the JSON payload of the page and reads the missing
+                                    fields in batch.
+            :param file_creator: Optional shared output writer, one is created from output_format if omitted.
+            :param page_fetcher: Optional HTTP client for the website pages, they are opened in browser tabs if omitted.
+            :param defer_enrichment: Leave the website fields as placeholders, file_creator is then an EnrichmentStage.
+            :param dashboard: Optional shared StatusDashboard, statuses are printed with PPrints if omitted.
+            :param place_index: Optional shared PlaceIndex, places it already knows are not scraped again.
+            :param driver_factory: Callable returning a new WebDriver when there is no driver_pool, a Chrome
+                                   browser by default (see utils.browser_backends for the offline one).
+            :param metrics: Optional shared MetricsRegistry receiving the stage and field timings.
+            :param worker_name: Worker label of the metrics, the name of the thread by default.
+            :param network_report: Record the bytes and requests of every place in the metrics, the browsers
+                                   need the performance log (build_chrome_driver(performance_log=True)).
+            :param wait_policy: Optional shared WaitPolicy of the cover image, about tab and results list waits,
+                                one is created from wait_time and adaptive_wait if omitted.
+            :param adaptive_wait: Learn short timeouts per element and skip the waits for elements a loaded page
+                                  does not have, False waits the full wait_time every time.
+            :param selector_registry: Optional shared SelectorRegistry of the field locators, one is loaded from
+                                      selector_file if omitted.
+            :param selector_file: JSON file of the field locators (default: data/selectors.json).
         """
 
         if suggested_ext is None:
@@ -133,15 +388,31 @@ class GoogleMaps:
         self._thread_lock = print_lock
         self.__output_format = output_format
         self._scroll_minutes = scroll_minutes
-
-        self._web_pattern_scraper = PatternScrapper()
-        if self.__output_format.lower() == "json":
-            self._file_creator = JSONCreator(file_lock=print_lock, output_path=output_path)
-        elif self.__output_format.lower() == "excel":
-            self._file_creator = XLSXCreator(file_lock=print_lock, output_path=output_path)
-        else:
-            self._file_creator = CSVCreator(file_lock=print_lock, output_path=output_path)
+        self._driver_pool = driver_pool
+        self._deadline = None
+        self._place_ids = {}
+        self.results_found = 0
+        self.results_complete = True
+        self.query_places = []
+        self._extraction_mode = extraction_mode.lower()
+
+        self._web_pattern_scraper = PatternScrapper(page_fetcher=page_fetcher)
+        self._defer_enrichment = defer_enrichment
+        if file_creator is None:
+            file_creator = create_file_creator(output_format=self.__output_format, file_lock=print_lock,
+                                               output_path=output_path)
+        self._file_creator = file_creator
         self._print = PPrints(print_lock=print_lock)
+        self._dashboard = dashboard
+        self._place_index = place_index
+        self._driver_factory = driver_factory
+        self._metrics = metrics or MetricsRegistry()
+        self._worker_name = worker_name or current_thread().name
+        self._network_monitor = NetworkMonitor(self._metrics) if network_report else None
+        self._payload_capture = PayloadCapture() if self._extraction_mode == "payload" else None
+        self._wait_policy = wait_policy or WaitPolicy(wait_time=wait_time, metrics=self._metrics,
+                                                      adaptive=adaptive_wait)
+        self._selectors = selector_registry or SelectorRegistry(file_path=selector_file, metrics=self._metrics)
         self._stop_event = stop_event
         self.__mode = "headless" if self._headless else "windowed"
 
@@ -156,23 +427,54 @@ class GoogleMaps:
         if not exists(self._output_path):
             mkdir(self._output_path)
 
-    def create_chrome_driver(self) -> WebDriver:
+    @classmethod
+    def build_chrome_driver(cls, headless: bool = False, blocking_profile: BlockingProfile = None,
+                            performance_log: bool = False) -> WebDriver:
         """
-        Create and configure a Chrome WebDriver instance.
+        Launch a configured Chrome WebDriver instance.
+            :param headless: If True, run the browser in headless mode.
+            :param blocking_profile: Optional BlockingProfile, the resources it lists are never downloaded.
+            :param performance_log: Enable the Chrome performance log read by NetworkMonitor.
             :return: A configured Chrome WebDriver instance.
         """
 
         options = uc.ChromeOptions()
         options.add_argument(argument='--title=Developer - Abdul Moez')
         options.add_argument(argument='--disable-popup-blocking')
-        options.add_extension(extension=self._finger_print_defender_ext)
-        if self._headless:
+        options.add_extension(extension=cls._finger_print_defender_ext)
+        if blocking_profile is not None and blocking_profile.chrome_prefs():
+            options.add_experimental_option("prefs", blocking_profile.chrome_prefs())
+        if performance_log:
+            options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        if headless:
             driver = uc.Chrome(options=options, headless=True, use_subprocess=False)
         else:
             driver = uc.Chrome(options=options, headless=False, use_subprocess=False)
+        if blocking_profile is not None:
+            blocking_profile.apply(driver)
+        return driver
+
+    def create_chrome_driver(self) -> WebDriver:
+        """
+        Create a WebDriver instance with the driver factory, a configured Chrome browser by default.
+            :return: The WebDriver instance.
+        """
+
+        if self._driver_factory is not None:
+            driver = self._driver_factory()
+        else:
+            driver = self.build_chrome_driver(headless=self._headless)
+        self.attach_driver(driver)
+        return driver
+
+    def attach_driver(self, driver: WebDriver) -> None:
+        """
+        Bind the explicit wait helper to a driver.
+            :param driver: The WebDriver instance.
+        """
+
         self._wait = WebDriverWait(driver, self._wait_time, ignored_exceptions=(NoSuchElementException,
                                                                                 StaleElementReferenceException))
-        return driver
 
     @staticmethod
     def load_url(driver: WebDriver, url: str) -> None:
@@ -189,22 +491,28 @@ class GoogleMaps:
             :param query: The search query to perform.
         """
         search_box = self._wait.until(EC.presence_of_element_located((By.ID, "searchboxinput")))
+        # a pooled browser may still show the previous place in the box
+        search_box.clear()
         search_box.send_keys(query)
         search_box.send_keys(Keys.RETURN)
 
-    def validate_result_link(self, result: any, driver: WebDriver) -> tuple[str, str, str]:
+    def validate_result_link(self, result: any, driver: WebDriver, open_in_tab: bool = True) -> tuple[str, str, str]:
         """
         Validate and process a search result link.
-            :param result: The search result link element.
+            :param result: The search result link (or its element).
             :param driver: The WebDriver instance.
+            :param open_in_tab: Open the link in a new tab next to the results list, or navigate the current one.
             :return: A tuple containing latitude, longitude, and the link.
         """
 
         if result != "continue":
-            get_link = result.get_attribute("href")
+            get_link = result if isinstance(result, str) else result.get_attribute("href")
 
-            driver.execute_script(f'''window.open("{get_link}", "_blank");''')
-            driver.switch_to.window(driver.window_handles[-1])
+            if open_in_tab:
+                driver.execute_script(f'''window.open("{get_link}", "_blank");''')
+                driver.switch_to.window(driver.window_handles[-1])
+            else:
+                self.load_url(driver, get_link)
         else:
             get_link = driver.current_url
 
@@ -217,17 +525,16 @@ class GoogleMaps:
 
         return lat_lng[0], lat_lng[1], get_link
 
-    def get_cover_image(self) -> str:
+    def get_cover_image(self, driver: WebDriver) -> str:
         """
         Get the cover image source URL from a search result.
+            :param driver: The WebDriver instance.
             :return: The cover image source URL.
         """
         try:
-            cover_image = self._wait.until(EC.presence_of_element_located((By.XPATH, '//*[@id="QA0Szd"]/div/div/div['
-                                                                                     '1]/div[2]/div/div['
-                                                                                     '1]/div/div/div[1]/div['
-                                                                                     '1]/button/img')))
-            cover_image_src = cover_image.get_attribute("src")
+            # a loaded place card without the image has no cover photo, no need to wait for it
+            cover_image = self._wait_for_field(driver, "cover_image", settled=self.page_settled)
+            cover_image_src = cover_image.get_attribute("src") if cover_image else self._unavailable_text
         except Exception as e:
             _ = e
             cover_image_src = self._unavailable_text
@@ -241,11 +548,7 @@ class GoogleMaps:
         """
 
         try:
-            title = driver.find_element(
-                By.CSS_SELECTOR, '#QA0Szd > div > div > div.w6VYqd > div.bJzME.tTVLSc > div > '
-                                 'div.e07Vkf.kA9KIf > div > div > div.TIHn2 > div > '
-                                 'div.lMbq3e > div:nth-child(1) > h1'
-            )
+            title = self._find_field(driver, "title")
             title_text = title.text
         except Exception as e:
             _ = e
@@ -260,12 +563,7 @@ class GoogleMaps:
         """
 
         try:
-            rating = driver.find_element(
-                By.CSS_SELECTOR, '#QA0Szd > div > div > div.w6VYqd > div.bJzME.tTVLSc > div '
-                                 '> div.e07Vkf.kA9KIf > div > div > div.TIHn2 > div > '
-                                 'div.lMbq3e > div.LBgpqf > div > div.fontBodyMedium.dmRWX > '
-                                 'div.F7nice > span:nth-child(1) > span:nth-child(1)'
-            )
+            rating = self._find_field(driver, "rating")
             rating_text = rating.text
         except Exception as e:
             _ = e
@@ -280,10 +578,7 @@ class GoogleMaps:
         """
 
         try:
-            price_privacy = driver.find_element(By.XPATH,
-                                                '//*[@id="QA0Szd"]/div/div/div[1]/div[2]/div/div[1]/div/div/div['
-                                                '2]/div/div[1]/div[2]/div/div[1]/span/span/span/span[2]/span/span'
-                                                )
+            price_privacy = self._find_field(driver, "privacy_price")
 
             price_privacy_text = price_privacy.text
         except Exception as e:
@@ -299,11 +594,7 @@ class GoogleMaps:
         """
 
         try:
-            category = driver.find_element(By.CSS_SELECTOR,
-                                           '#QA0Szd > div > div > div.w6VYqd > div.bJzME.tTVLSc > div > '
-                                           'div.e07Vkf.kA9KIf > div > div > div.TIHn2 > div > div.lMbq3e '
-                                           '> '
-                                           'div.LBgpqf > div > div:nth-child(2) > span > span > button')
+            category = self._find_field(driver, "category")
             category_text = category.text
 
         except Exception as e:
@@ -319,7 +610,7 @@ class GoogleMaps:
         """
 
         try:
-            address = driver.find_element(By.CLASS_NAME, 'rogA2c')
+            address = self._find_field(driver, "address")
             address_text = address.text
         except Exception as e:
             _ = e
@@ -334,11 +625,9 @@ class GoogleMaps:
         """
 
         try:
-            driver.find_element(
-                By.CSS_SELECTOR, 'div.OqCZI.fontBodyMedium.WVXvdc > div.OMl5r.hH0dDd.jBYmhd'
-            ).click()
+            self._find_field(driver, "hours_button").click()
 
-            working_hours = driver.find_element(By.CSS_SELECTOR, 'div.t39EBf.GUrTXd > div > table')
+            working_hours = self._find_field(driver, "working_hours")
             working_hours_text = working_hours.text.strip().split("\n")
             working_hours_text = [x.strip() for x in working_hours_text if x]
             working_hours_text = ",".join(working_hours_text)
@@ -355,9 +644,7 @@ class GoogleMaps:
         """
 
         try:
-            menu_link = driver.find_element(
-                By.CSS_SELECTOR,
-                'div.UCw5gc > div > div:nth-child(1) > a[data-tooltip="Open menu link"]')
+            menu_link = self._find_field(driver, "menu_link")
             menu_link_href = menu_link.get_attribute("href")
 
         except Exception as e:
@@ -373,8 +660,7 @@ class GoogleMaps:
         """
 
         try:
-            website = driver.find_element(By.CSS_SELECTOR, 'div.UCw5gc > div > div:nth-child(1) > a['
-                                                           'data-tooltip="Open website"]')
+            website = self._find_field(driver, "webpage")
             website_href = website.get_attribute("href")
 
         except Exception as e:
@@ -390,7 +676,7 @@ class GoogleMaps:
         """
 
         try:
-            phone = driver.find_elements(By.CLASS_NAME, 'rogA2c')
+            phone = self._selectors.find(driver, "phone_number", multiple=True)
             try:
                 for ph in phone:
                     ph_text = ph.text.replace("(", "").replace(")", "").replace(
@@ -416,7 +702,7 @@ class GoogleMaps:
         """
 
         try:
-            related_images = driver.find_elements(By.CLASS_NAME, "DaSXdd")
+            related_images = self._selectors.find(driver, "related_images", multiple=True)
             if related_images:
                 related_images_src = [image.get_attribute("src") for image in related_images]
                 related_images_data = ",".join(related_images_src)
@@ -436,24 +722,14 @@ class GoogleMaps:
         """
 
         try:
-            driver.find_element(By.CSS_SELECTOR, '#QA0Szd > div > div > div.w6VYqd > div.bJzME.tTVLSc > div > '
-                                                 'div.e07Vkf.kA9KIf > div > div > div:nth-child(3) > div > div > '
-                                                 'button:nth-child(3)').click()
+            self._find_field(driver, "about_tab").click()
 
-            self._wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, '#QA0Szd > div > div > '
-                                                                              'div.w6VYqd > div.bJzME.tTVLSc '
-                                                                              '> div > div.e07Vkf.kA9KIf > '
-                                                                              'div > div > '
-                                                                              'div.m6QErb.DxyBCb.kA9KIf.dS8AEf')))
+            self._wait_for_field(driver, "about_panel", probe="about_tab")
 
             # about_data = driver.find_elements(By.CSS_SELECTOR, 'div.iP2t7d.fontBodyMedium')
             about_dict = {}
             try:
-                about_text = driver.find_element(By.CSS_SELECTOR,
-                                                 '#QA0Szd > div > div > div.w6VYqd > div.bJzME.tTVLSc > '
-                                                 'div > div.e07Vkf.kA9KIf > div > div > '
-                                                 'div.m6QErb.DxyBCb.kA9KIf.dS8AEf > div.PbZDve > p > '
-                                                 'span > span')
+                about_text = self._find_field(driver, "about_text")
                 about_dict["about_desc"] = about_text.text
             except NoSuchElementException:
                 about_dict["about_desc"] = self._unavailable_text
@@ -470,6 +746,54 @@ class GoogleMaps:
             about_dict = {"about_desc": self._unavailable_text}
         return about_dict
 
+    def get_place_fields_batch(self, driver: WebDriver) -> dict:
+        """
+        Read every passive field of a place card with a single script call.
+            :param driver: The WebDriver instance.
+            :return: A dict of the fields that were found, missing fields are left out.
+        """
+
+        try:
+            self._wait.until(lambda waited_driver: self._selectors.lookup(waited_driver, "title")[1])
+        except TimeoutException:
+            ...
+
+        fields = []
+        for name, (attribute, multiple) in self._batch_fields.items():
+            fields.append({"name": name, "locators": self._selectors.locators(name), "attribute": attribute,
+                           "multiple": multiple})
+        try:
+            raw_fields = driver.execute_script(self._batch_extract_script, fields) or {}
+        except WebDriverException:
+            return {}
+        for name, index in raw_fields.pop("_matched", {}).items():
+            self._selectors.record_lookup(name, index)
+        return self.parse_batch_fields(raw_fields)
+
+    @staticmethod
+    def parse_batch_fields(raw_fields: dict) -> dict:
+        """
+        Convert the raw values returned by the batch script into output values.
+            :param raw_fields: Field name -> raw text/attribute (or list of them for multiple fields).
+            :return: A dict containing only the fields with a usable value.
+        """
+
+        parsed = {}
+        for name, value in raw_fields.items():
+            if name == "phone_number":
+                for text in value or []:
+                    text = (text or "").strip()
+                    digits = text.replace("(", "").replace(")", "").replace(" ", "").replace("+", "").replace("-", "")
+                    if digits.isnumeric():
+                        parsed[name] = text
+            elif name == "related_images":
+                sources = [source for source in value or [] if source]
+                if sources:
+                    parsed[name] = ",".join(sources)
+            elif isinstance(value, str) and value.strip():
+                parsed[name] = value.strip()
+        return parsed
+
     def reset_driver_for_next_run(self, result: any, driver: WebDriver) -> None:
         """
         Reset the driver to its main window after processing a search result.
@@ -479,49 +803,112 @@ class GoogleMaps:
         if result != "continue":
             driver.close()
             driver.switch_to.window(self._main_handler)
-            self._wait.until(EC.presence_of_element_located((By.CLASS_NAME, "hfpxzc")))
+            self._wait_policy.wait(driver, "results_list_reset",
+                                   EC.presence_of_element_located((By.CLASS_NAME, "hfpxzc")), required=True)
+
+    def page_settled(self, driver: WebDriver, place: bool = False) -> bool:
+        """
+        Whether the page finished loading and shows a place card.
+
+        A settled place page will not render the elements it is still missing (cover photo), and a query
+        that settled on a place page will never show a results list.
+            :param driver: The WebDriver instance.
+            :param place: Also require a place URL (/maps/place/), not only a place title.
+            :return: True if the page is loaded and shows a place.
+        """
+
+        try:
+            state = driver.execute_script(self._page_state_script, self._selectors.locators("title")) or {}
+        except WebDriverException:
+            return False
+        return bool(state.get("ready") and state.get("title") and (state.get("place") or not place))
+
+    def _find_field(self, driver: WebDriver, field: str) -> any:
+        """
+        First element of a field found by the selector registry.
+            :param driver: The WebDriver instance.
+            :param field: The field name in the selector file.
+            :return: The element.
+            :raises NoSuchElementException: No locator of the field matched.
+        """
+
+        element = self._selectors.find(driver, field)
+        if element is None:
+            raise NoSuchElementException(f"No selector of {field} matched")
+        return element
+
+    def _wait_for_field(self, driver: WebDriver, field: str, probe: str = None, settled: callable = None) -> any:
+        """
+        Wait for a field with the wait policy, recorded by the selector registry.
+            :param driver: The WebDriver instance.
+            :param field: The field name in the selector file.
+            :param probe: Wait policy probe, the field name by default.
+            :param settled: Optional page check that ends the wait early (see WaitPolicy.wait).
+            :return: The element, None if it did not show.
+        """
+
+        matched = [None]
+
+        def field_shown(waited_driver: WebDriver) -> any:
+            matched[0], element = self._selectors.lookup(waited_driver, field)
+            return element
+
+        element = self._wait_policy.wait(driver, probe or field, field_shown, settled=settled)
+        self._selectors.record_lookup(field, matched[0] if element else None)
+        return element
 
     def scroll_to_the_end_event(self, driver: WebDriver) -> list:
         """
-        Scroll to the end of search results and collect them.
+        Scroll to the end of search results and collect their links.
+
+        The scrolling runs inside the page (see _scroll_feed_script), every call returns only the links that
+        appeared since the previous one, so no WebElement is ever sent back over the wire.
             :param driver: The WebDriver instance.
-            :return: A list of collected search result elements.
+            :return: A list of result links, or ["continue"] when the query opened a single place.
         """
 
         try:
-            self._wait.until(EC.presence_of_element_located((By.CLASS_NAME, "hfpxzc")))
+            self._wait_policy.wait(driver, "results_list", EC.presence_of_element_located((By.CLASS_NAME, "hfpxzc")),
+                                   settled=lambda settled_driver: self.page_settled(settled_driver, place=True),
+                                   required=True)
         except TimeoutException:
             results = ["continue"]
             return results
 
-        scroll_end = 'div.PbZDve  > p.fontBodyMedium  > span > span[class="HlvSq"]'
+        results = []
+        self._place_ids = {}
+        self.results_complete = True
         start_time = time()
-        scroll_wait = 1
-        while True:
-            results = driver.find_elements(By.CLASS_NAME, 'hfpxzc')
-            if self._results_range:
-                if len(results) >= self._results_range:
-                    temp_results = results[:self._results_range + 1]
-                    results = temp_results
-                    break
-
-            driver.execute_script('arguments[0].scrollIntoView(true);', results[-1])
-            driver.implicitly_wait(scroll_wait)
-            try:
-                text_span = driver.find_element(By.CSS_SELECTOR, scroll_end)
-                if "you've reached the end" in text_span.text.lower():
-                    break
-            except NoSuchElementException:
-                ...
-            sleep(uniform(0.2, 0.6))
-            elapsed_time = time() - start_time
-            if elapsed_time > (int(self._scroll_minutes) * 60):  # 60 seconds = 1 minutes
+        scroll_budget = int(self._scroll_minutes) * 60  # 60 seconds = 1 minutes
+        driver.set_script_timeout(self._scroll_call_seconds + 10)
+        idle_rounds = 0
+        reset = True
+        while idle_rounds < 3:
+            remaining = scroll_budget - (time() - start_time)
+            if self._stop_event.is_set() or self._deadline_passed():
+                self.results_complete = False
                 break
+            if remaining <= 0:
+                break
+
+            harvest = driver.execute_async_script(self._scroll_feed_script, self._results_range or 0,
+                                                  int(min(remaining, self._scroll_call_seconds) * 1000),
+                                                  self._scroll_idle_ms, reset)
+            reset = False
+            for href, place_id in harvest["results"]:
+                results.append(href)
+                self._place_ids[href] = place_id
+
+            if harvest["end"] in ("limit", "end", "no_feed"):
+                break
+            idle_rounds = 0 if harvest["results"] else idle_rounds + 1
 
         return results
 
     def __pprint_override(self, query: str, status: str, results_indices: any([str, list[int]]) = "Calculating"):
-        if self._verbose:
+        if self._dashboard is not None:
+            self._dashboard.post(query=query, status=status, mode=self.__mode, results_indices=results_indices)
+        elif self._verbose:
             self._print.print_with_lock(
                 query=query, status=status, mode=self.__mode, results_indices=results_indices
             )
@@ -531,78 +918,143 @@ class GoogleMaps:
                 mode=self.__mode, results_indices=results_indices
             )
 
+    def _stage(self, stage: str):
+        return self._metrics.timer("gmaps_stage_seconds", stage=stage, worker=self._worker_name)
+
+    def _read_field(self, name: str, batch_fields: dict, getter: callable, *args) -> any:
+        """
+        Take a field from the batch extraction or look it up with its getter, timed per field.
+
+        Fields the batch missed and fields left unavailable are counted, a selector that stops matching
+        after a Maps DOM change shows up there first.
+            :param name: Field name, also the metrics label.
+            :param batch_fields: Fields read by get_place_fields_batch or decoded from the payload (empty in FIELD
+                                 mode).
+            :param getter: The field getter.
+            :param args: Arguments of the getter.
+            :return: The field value.
+        """
+
+        value = batch_fields.get(name)
+        if not value:
+            if self._extraction_mode != "field" and name in self._batch_fields:
+                self._metrics.inc("gmaps_field_fallbacks_total", field=name)
+            with self._metrics.timer("gmaps_field_seconds", field=name, worker=self._worker_name):
+                value = getter(*args)
+        unavailable = value.get("about_desc") if isinstance(value, dict) else value
+        if unavailable == self._unavailable_text:
+            self._metrics.inc("gmaps_field_missing_total", field=name)
+        return value
+
     def _scrape_result_and_store(self, driver: WebDriver, result: any, query: str,
-                                 results_indices: list[int]):
+                                 results_indices: list[int], open_in_tab: bool = True):
         """
         Scrape and store data from a search result.
             :param driver: The WebDriver instance.
             :param result: The search result link element.
             :param query: The search query.
             :param results_indices: A list containing the current and total indices of results being processed.
+            :param open_in_tab: Open the result in a new tab and go back to the results list afterwards.
         """
 
         temp_data = {}
+        start_time = perf_counter()
 
         # latitude and longitude
         self.__pprint_override(query=query, status="Getting Latitude and longitude", results_indices=results_indices)
-        lat, long, map_link = self.validate_result_link(result, driver)
+        with self._stage("open_place"):
+            lat, long, map_link = self.validate_result_link(result, driver, open_in_tab=open_in_tab)
+        load_seconds = perf_counter() - start_time
+
+        # read all the passive fields in one round trip, the getters below only run for missing ones
+        batch_fields = {}
+        network_events = []
+        if self._payload_capture:
+            self.__pprint_override(query=query, status="Decoding place payload", results_indices=results_indices)
+            with self._stage("payload_extract"):
+                network_events = NetworkMonitor.read_events(driver)
+                self._payload_capture.collect(driver, network_events)
+                payload_fields = self._payload_capture.place_fields(driver, self.place_id(map_link))
+            missing = [name for name in self._payload_fields if name not in payload_fields]
+            for name in missing:
+                self._metrics.inc("gmaps_payload_misses_total", field=name)
+            if any(name in self._batch_fields for name in missing):
+                with self._stage("batch_extract"):
+                    batch_fields = self.get_place_fields_batch(driver)
+            batch_fields.update(payload_fields)
+            if lat == self._unavailable_text and "latitude" in payload_fields:
+                lat, long = payload_fields["latitude"], payload_fields.get("longitude", self._unavailable_text)
+        elif self._extraction_mode == "batch":
+            self.__pprint_override(query=query, status="Extracting place fields", results_indices=results_indices)
+            with self._stage("batch_extract"):
+                batch_fields = self.get_place_fields_batch(driver)
 
         # get cover image
         self.__pprint_override(query=query, status="Getting cover image", results_indices=results_indices)
-        cover_image = self.get_cover_image()
+        cover_image = self._read_field("cover_image", batch_fields, self.get_cover_image, driver)
 
         # get title
         self.__pprint_override(query=query, status="Getting title", results_indices=results_indices)
-        card_title = self.get_title(driver)
+        card_title = self._read_field("title", batch_fields, self.get_title, driver)
 
         # get rating
         self.__pprint_override(query=query, status="Getting rating", results_indices=results_indices)
-        card_rating = self.get_rating_in_card(driver)
+        card_rating = self._read_field("rating", batch_fields, self.get_rating_in_card, driver)
 
         # Get privacy price
         self.__pprint_override(query=query, status="Getting privacy price", results_indices=results_indices)
-        privacy_price = self.get_privacy_price(driver)
+        privacy_price = self._read_field("privacy_price", batch_fields, self.get_privacy_price, driver)
 
         # get category
         self.__pprint_override(query=query, status="Getting Category", results_indices=results_indices)
-        card_category = self.get_category(driver)
+        card_category = self._read_field("category", batch_fields, self.get_category, driver)
 
         # get address
         self.__pprint_override(query=query, status="Getting Address", results_indices=results_indices)
-        card_address = self.get_address(driver)
+        card_address = self._read_field("address", batch_fields, self.get_address, driver)
 
         # get working hours
         self.__pprint_override(query=query, status="Getting Working hours", results_indices=results_indices)
-        card_hours = self.get_working_hours(driver)
+        card_hours = self._read_field("working_hours", batch_fields, self.get_working_hours, driver)
 
         # get menu link
         self.__pprint_override(query=query, status="Getting Menu Links", results_indices=results_indices)
-        card_menu_link = self.get_menu_link(driver)
+        card_menu_link = self._read_field("menu_link", batch_fields, self.get_menu_link, driver)
 
         # get website link
         self.__pprint_override(query=query, status="Getting WebLink", results_indices=results_indices)
-        card_website_link = self.get_website_link(driver)
+        card_website_link = self._read_field("webpage", batch_fields, self.get_website_link, driver)
 
-        # get website data
-        self.__pprint_override(query=query, status="Getting WebLink Data", results_indices=results_indices)
-        website_data = self._web_pattern_scraper.find_patterns(driver, card_website_link, self._suggested_ext,
-                                                               self._unavailable_text)
+        # get website data, or leave it to the enrichment stage
+        if self._defer_enrichment:
+            website_data = self._web_pattern_scraper.unavailable_patterns(self._unavailable_text)
+        else:
+            self.__pprint_override(query=query, status="Getting WebLink Data", results_indices=results_indices)
+            with self._stage("website_enrichment"):
+                website_data = self._web_pattern_scraper.find_patterns(driver, card_website_link,
+                                                                       self._suggested_ext, self._unavailable_text)
 
         # get phone number
         self.__pprint_override(query=query, status="Getting Phone Number", results_indices=results_indices)
-        card_phone_number = self.get_phone_number(driver)
+        card_phone_number = self._read_field("phone_number", batch_fields, self.get_phone_number, driver)
 
         # get card images
         self.__pprint_override(query=query, status="Getting Images links", results_indices=results_indices)
-        card_related_images = self.get_related_images_list(driver)
+        card_related_images = self._read_field("related_images", batch_fields, self.get_related_images_list, driver)
 
         # get card about
         self.__pprint_override(query=query, status="Getting About data", results_indices=results_indices)
-        card_about = self.get_about_description(driver)
+        card_about = self._read_field("about", batch_fields, self.get_about_description, driver)
+
+        if self._network_monitor:
+            self._network_monitor.account(driver, self._worker_name, "place", load_seconds=load_seconds,
+                                          events=network_events + NetworkMonitor.read_events(driver))
 
         # Reset driver again
-        self.__pprint_override(query=query, status="Resetting Driver", results_indices=results_indices)
-        self.reset_driver_for_next_run(result, driver)
+        if open_in_tab:
+            self.__pprint_override(query=query, status="Resetting Driver", results_indices=results_indices)
+            with self._stage("reset"):
+                self.reset_driver_for_next_run(result, driver)
 
         # Store scrapped data
         self.__pprint_override(query=query, status="Storing Data in List", results_indices=results_indices)
@@ -631,52 +1083,259 @@ class GoogleMaps:
         # Store data in runtime
         temp_list = [temp_data]
         self.__pprint_override(query=query, status="Dumping data in CSV file", results_indices=results_indices)
-        self._file_creator.create(list_of_dict_data=temp_list)
+        with self._stage("store"):
+            self._file_creator.create(list_of_dict_data=temp_list)
+        self._metrics.observe("gmaps_place_seconds", perf_counter() - start_time, worker=self._worker_name)
+        self._metrics.inc("gmaps_places_total", worker=self._worker_name)
 
-    def start_scrapper(self, query: str) -> None:
+    def place_id(self, map_link: str) -> str:
         """
-        Start the scraping process for a given query.
-            :param query: The search query.
+        Canonical place ID of a result link.
+            :param map_link: The place link.
+            :return: The ID read by the scroll script, or PlaceIndex.canonical_id of the link.
         """
 
-        try:
-            if self._verbose:
-                self.__pprint_override(query=query, status="Initializing Browser")
+        return self._place_ids.get(map_link) or PlaceIndex.canonical_id(map_link)
+
+    def _claim_places(self, links: list, query: str) -> list:
+        """
+        Drop the links of places the place index already knows and record the query for all of them.
+            :param links: Place links.
+            :param query: The query the links were found by.
+            :return: The links to scrape, every one of them is claimed and must be completed or released.
+        """
+
+        if self._place_index is None or not links:
+            return links
+        claims = self._place_index.claim_many([self.place_id(link) for link in links], query)
+        kept = [link for link, claimed in zip(links, claims) if claimed]
+        if len(kept) < len(links):
+            self.__pprint_override(query=query, status=f"Skipping {len(links) - len(kept)} already scraped places")
+        return kept
+
+    def _deadline_passed(self) -> bool:
+        return self._deadline is not None and time() > self._deadline
+
+    def _acquire_driver(self, query: bool = True) -> tuple:
+        """
+        Get a browser from the pool, or launch one when the scrapper has no pool.
+            :param query: False when the browser only opens one place page (not counted as a pooled query).
+            :return: The PooledDriver (None without a pool) and its WebDriver.
+        """
+
+        with self._stage("driver_start"):
+            if self._driver_pool:
+                pooled = self._driver_pool.acquire(query=query)
+                driver = pooled.driver
+                self.attach_driver(driver)
             else:
-                self.__pprint_override(query=query, status="Running the script")
+                pooled = None
+                driver = self.create_chrome_driver()
+        return pooled, driver
+
+    def _release_driver(self, query: str, pooled: any, driver: WebDriver, reset: bool = True) -> None:
+        """
+        Give a healthy browser back to the pool, or close it when the scrapper has no pool.
+            :param query: The query shown in the status line.
+            :param pooled: The PooledDriver returned by _acquire_driver (None without a pool).
+            :param driver: The WebDriver instance.
+            :param reset: Send the pooled browser back to the Maps home page.
+        """
+
+        if pooled:
+            self.__pprint_override(query=query, status="Driver Returned To Pool")
+            self._driver_pool.release(pooled, reset=reset)
+        else:
+            self.__pprint_override(query=query, status="Driver Closed")
+            driver.close()
+
+    def _open_results(self, driver: WebDriver, query: str, pooled: any) -> list:
+        """
+        Run a query and scroll through its results list.
+            :param driver: The WebDriver instance.
+            :param query: The search query or Google Maps URL.
+            :param pooled: The PooledDriver the driver belongs to (None without a pool).
+            :return: The result links, or ["continue"] when the query opened a single place.
+        """
 
-            driver = self.create_chrome_driver()
-            self.__pprint_override(query=query, status="Loading URL")
+        self.__pprint_override(query=query, status="Loading URL")
 
+        with self._stage("load_url"):
             if query.lower().strip().startswith("http"):
                 self.load_url(driver, query)
-            else:
+            elif not (pooled and driver.current_url.startswith(self._maps_url)):
                 self.load_url(driver, self._maps_url)
 
-            self.__pprint_override(query=query, status="Searching query")
+        self.__pprint_override(query=query, status="Searching query")
 
-            if not query.lower().strip().startswith("http"):
+        if not query.lower().strip().startswith("http"):
+            with self._stage("search"):
                 self.search_query(query)
-            self._main_handler = driver.current_window_handle
+        self._main_handler = driver.current_window_handle
 
-            self.__pprint_override(query=query, status="Loading Links from GMAPS")
+        self.__pprint_override(query=query, status="Loading Links from GMAPS")
 
-            # load all the results
+        # load all the results
+        self.results_complete = True
+        with self._stage("scroll"):
             results = self.scroll_to_the_end_event(driver)
+        self.results_found = 0 if results == ["continue"] else len(results)
+        if results != ["continue"]:
+            self._metrics.inc("gmaps_links_found_total", len(results), worker=self._worker_name)
+            if self._network_monitor or self._payload_capture:
+                # one drain of the log feeds both, the result pages are decoded before their tab is left
+                network_events = NetworkMonitor.read_events(driver)
+                if self._payload_capture:
+                    self._payload_capture.collect(driver, network_events)
+                if self._network_monitor:
+                    self._network_monitor.account(driver, self._worker_name, "search", events=network_events)
+        return results
+
+    def start_scrapper(self, query: str, deadline: float = None, skip_place_ids: set = None) -> bool:
+        """
+        Start the scraping process for a given query.
+            :param query: The search query.
+            :param deadline: Optional epoch time after which the query is cut short.
+            :param skip_place_ids: Optional place IDs whose records were already written (resumed runs).
+            :return: False if the query was stopped early by the deadline or the stop event, True otherwise.
+        """
+
+        self._deadline = deadline
+        self.query_places = []
+        completed = True
+        pooled = None
+        try:
+            if self._verbose:
+                self.__pprint_override(query=query, status="Initializing Browser")
+            else:
+                self.__pprint_override(query=query, status="Running the script")
+
+            pooled, driver = self._acquire_driver()
+            results = self._open_results(driver, query, pooled)
+            # a results list cut short is not finished even if every place of it gets scraped
+            completed = self.results_complete
+            if skip_place_ids and results != ["continue"]:
+                results = [result for result in results if self.place_id(result) not in skip_place_ids]
+            links = [driver.current_url] if results == ["continue"] else results
+            claimed = self._claim_places(links, query)
+            self.query_places = list(claimed)
+            if results != ["continue"]:
+                results = claimed
+            elif not claimed:
+                results = []
 
             result_indices = [len(results), 1]
-            for result in results:
-                if self._stop_event.is_set():
-                    break
-                # Scrape and store data
-                self._scrape_result_and_store(driver=driver, result=result, query=query,
-                                              results_indices=result_indices)
-                result_indices[1] += 1
+            try:
+                for result in results:
+                    if self._stop_event.is_set() or self._deadline_passed():
+                        completed = False
+                        break
+                    # Scrape and store data
+                    # the claim is completed by the output once the record is written
+                    self._scrape_result_and_store(driver=driver, result=result, query=query,
+                                                  results_indices=result_indices)
+                    result_indices[1] += 1
+            finally:
+                # claims of places that were not scraped, so a retry of the query can take them again
+                if self._place_index:
+                    for link in claimed[result_indices[1] - 1:]:
+                        self._place_index.release(self.place_id(link))
+
+            self._release_driver(query, pooled, driver)
+        except NoSuchWindowException:
+            self._metrics.inc("gmaps_task_errors_total", worker=self._worker_name, error="NoSuchWindowException")
+            self.__pprint_override(query=query, status="Browser Closed")
+            if pooled:
+                self._driver_pool.release(pooled, healthy=False)
+            raise
+        except Exception as e:
+            self._metrics.inc("gmaps_task_errors_total", worker=self._worker_name, error=type(e).__name__)
+            if pooled:
+                self._driver_pool.release(pooled, healthy=False)
+            raise
+        return completed
 
-            self.__pprint_override(query=query, status="Driver Closed")
-            driver.close()
+    def harvest_links(self, query: str, deadline: float = None) -> list:
+        """
+        First phase of the two-phase mode: collect the place links of a query without opening them.
+
+        A query that lands straight on a single place is scraped right away since the page is already open.
+            :param query: The search query or Google Maps URL.
+            :param deadline: Optional epoch time after which scrolling is cut short.
+            :return: The place page URLs, to be scraped with scrape_place().
+        """
+
+        self._deadline = deadline
+        self.query_places = []
+        pooled = None
+        try:
+            self.__pprint_override(query=query, status="Harvesting links")
+            pooled, driver = self._acquire_driver()
+            results = self._open_results(driver, query, pooled)
+
+            if results == ["continue"]:
+                place_link = driver.current_url
+                self.query_places = self._claim_places([place_link], query)
+                if self.query_places:
+                    self._scrape_result_and_store(driver=driver, result="continue", query=query,
+                                                  results_indices=[1, 1], open_in_tab=False)
+                results = []
+            else:
+                self.__pprint_override(query=query, status=f"Harvested {len(results)} links")
+                # claimed here, completed by the output once the record of the place is written
+                results = self._claim_places(results, query)
+                self.query_places = list(results)
+
+            self._release_driver(query, pooled, driver)
         except NoSuchWindowException:
+            self._metrics.inc("gmaps_task_errors_total", worker=self._worker_name, error="NoSuchWindowException")
             self.__pprint_override(query=query, status="Browser Closed")
+            if pooled:
+                self._driver_pool.release(pooled, healthy=False)
+            raise
+        except Exception as e:
+            self._metrics.inc("gmaps_task_errors_total", worker=self._worker_name, error=type(e).__name__)
+            if pooled:
+                self._driver_pool.release(pooled, healthy=False)
+            raise
+        return results
+
+    def scrape_place(self, place_url: str, query: str, results_indices: list[int] = None,
+                     deadline: float = None) -> bool:
+        """
+        Second phase of the two-phase mode: scrape one harvested place page by navigating straight to it.
+            :param place_url: The place page URL returned by harvest_links().
+            :param query: The query the place was harvested from, shown in the status line.
+            :param results_indices: [number of harvested places, position of this one].
+            :param deadline: Optional epoch time, the place is skipped once it has passed.
+            :return: False if the place was skipped because of the deadline or the stop event, True otherwise.
+        """
+
+        self._deadline = deadline
+        if results_indices is None:
+            results_indices = [1, 1]
+        if self._stop_event.is_set() or self._deadline_passed():
+            return False
+
+        pooled = None
+        try:
+            pooled, driver = self._acquire_driver(query=False)
+            self._scrape_result_and_store(driver=driver, result=place_url, query=query,
+                                          results_indices=results_indices, open_in_tab=False)
+            # the next place is loaded by URL as well, no need to go back to the Maps home page
+            self._release_driver(query, pooled, driver, reset=False)
+        except NoSuchWindowException:
+            self._metrics.inc("gmaps_task_errors_total", worker=self._worker_name, error="NoSuchWindowException")
+            self.__pprint_override(query=query, status="Browser Closed")
+            if pooled:
+                self._driver_pool.release(pooled, healthy=False)
+            raise
+        except Exception as e:
+            self._metrics.inc("gmaps_task_errors_total", worker=self._worker_name, error=type(e).__name__)
+            if pooled:
+                self._driver_pool.release(pooled, healthy=False)
+            raise
+        return True
 
 if __name__ == '__main__':
     App = GoogleMaps()
@@ -0,0 +1,151 @@
+from requests.exceptions import RequestException
+from requests.adapters import HTTPAdapter
+from threading import Lock, BoundedSemaphore
+from utils.random_users import users
+from urllib.parse import urlparse
+from urllib3.util import Retry
+from random import choice
+from requests import Session
+
+
+class FetchedPage:
+    """
+    Result of an HTTP fetch.
+
+    Attributes:
+        url (str): The requested URL.
+        status (int): HTTP status code, 0 when the request failed.
+        text (str): Decoded body, empty when the request failed or the page is not HTML.
+        needs_browser (bool): True when the page only renders with JavaScript or is behind a bot challenge.
+    """
+
+    def __init__(self, url: str, status: int = 0, text: str = "", needs_browser: bool = False) -> None:
+        self.url = url
+        self.status = status
+        self.text = text
+        self.needs_browser = needs_browser
+
+
+class HTTPPageFetcher:
+    """
+    Pooled HTTP client used to download website pages without opening browser tabs.
+
+    One keep-alive connection pool is shared by every thread, the number of parallel requests to the same
+    host is capped by `per_host_limit`, redirects are followed and each request has a connect/read timeout.
+    Bodies are streamed: a page that is not text (PDF, video...) is dropped from its headers without being
+    downloaded, and a page is cut after `max_bytes`.
+
+    Methods:
+        fetch(self, url):
+            Download one page.
+
+        fetch_all(self, urls):
+            Download several pages, in order.
+
+        needs_browser(self, status, text):
+            Decide whether a page has to be rendered by a browser to be useful.
+
+        close(self):
+            Close the pooled connections.
+    """
+
+    _javascript_markers = ("enable javascript", "requires javascript", "javascript is required",
+                           "javascript is disabled", "please turn on javascript")
+    _challenge_markers = ("cf-chl", "challenge-platform", "just a moment...", "checking your browser")
+
+    def __init__(self, timeout: float = 10.0, connect_timeout: float = 5.0, pool_size: int = 50,
+                 per_host_limit: int = 4, max_redirects: int = 5, retries: int = 1,
+                 max_bytes: int = 3 * 1024 * 1024) -> None:
+        """
+        Initialize the fetcher.
+            :param timeout: Seconds to wait for the server to send data.
+            :param connect_timeout: Seconds to wait for a connection.
+            :param pool_size: Maximum connections kept alive per host pool.
+            :param per_host_limit: Maximum parallel requests to the same host.
+            :param max_redirects: Maximum redirects followed per request.
+            :param retries: Retries on connection errors and 502/503/504 answers.
+            :param max_bytes: Bytes of a body read at most, the rest of a bigger page is not downloaded.
+        """
+
+        self._timeout = (connect_timeout, timeout)
+        self._max_bytes = max_bytes
+        self._per_host_limit = per_host_limit
+        self._host_slots = {}
+        self._host_slots_lock = Lock()
+
+        self._session = Session()
+        self._session.max_redirects = max_redirects
+        self._session.headers.update({
+            "User-Agent": choice(users),
+            "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": "en-US,en;q=0.9",
+        })
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                              max_retries=Retry(total=retries, backoff_factor=0.3,
+                                                status_forcelist=(502, 503, 504), raise_on_status=False))
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    def _host_slot(self, url: str) -> BoundedSemaphore:
+        host = urlparse(url).netloc.lower()
+        with self._host_slots_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = BoundedSemaphore(self._per_host_limit)
+            return self._host_slots[host]
+
+    def needs_browser(self, status: int, text: str) -> bool:
+        """
+        Decide whether a page has to be rendered by a browser to be useful.
+            :param status: HTTP status code.
+            :param text: Decoded body.
+            :return: True for bot challenges and for near-empty pages asking for JavaScript.
+        """
+
+        lowered = text[:20000].lower()
+        if status in (403, 429, 503) and any(marker in lowered for marker in self._challenge_markers):
+            return True
+        if status == 200 and len(text) < 5000 and any(marker in lowered for marker in self._javascript_markers):
+            return True
+        return False
+
+    def fetch(self, url: str) -> FetchedPage:
+        """
+        Download one page.
+            :param url: Page URL.
+            :return: A FetchedPage, with status 0 if the request failed.
+        """
+
+        if not urlparse(url).scheme:
+            url = "http://" + url
+
+        with self._host_slot(url):
+            try:
+                response = self._session.get(url, timeout=self._timeout, allow_redirects=True, stream=True)
+            except RequestException:
+                return FetchedPage(url=url)
+
+            try:
+                content_type = response.headers.get("Content-Type", "text/html").lower()
+                if "html" not in content_type and "text" not in content_type:
+                    return FetchedPage(url=url, status=response.status_code)
+
+                body = bytearray()
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    body += chunk
+                    if len(body) >= self._max_bytes:
+                        del body[self._max_bytes:]
+                        break
+            except RequestException:
+                return FetchedPage(url=url, status=response.status_code)
+            finally:
+                response.close()
+
+        text = bytes(body).decode(response.encoding or "utf-8", errors="replace")
+        return FetchedPage(url=url, status=response.status_code, text=text if response.ok else "",
+                           needs_browser=self.needs_browser(response.status_code, text))
+
+    def fetch_all(self, urls: list) -> list:
+        return [self.fetch(url) for url in urls]
+
+    def close(self) -> None:
+        self._session.close()
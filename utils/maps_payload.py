@@ -0,0 +1,275 @@
+from selenium.common.exceptions import WebDriverException
+from urllib.parse import urlparse, parse_qs
+from base64 import b64decode
+from re import compile
+import json
+
+
+class MapsPayloadDecoder:
+    """
+    Decodes the place data of the JSON payloads Google Maps renders its pages from.
+
+    A place page embeds its data as a `)]}'`-prefixed JSON string in window.APP_INITIALIZATION_STATE, the
+    same payload the /maps/preview/place requests return, and every page of results comes from a
+    /search?tb=map response holding one such place array per result. The arrays are positional and
+    undocumented, every field lists the index paths it is known under and the first one holding a value
+    wins, a field found under no path is left out so the caller can fall back to the DOM.
+
+    Methods:
+        parse(body):
+            JSON data of a raw payload body.
+
+        place_from_preview(data):
+            Place array of a place page / preview payload.
+
+        places_from_search(data):
+            Place arrays of a search response.
+
+        decode_place(self, place):
+            Output fields of a place array.
+    """
+
+    _xssi_prefix = ")]}'"
+
+    # Output field -> index paths in the place array, tried in order
+    _field_paths = {
+        "title": [(11,)],
+        "rating": [(4, 7)],
+        "privacy_price": [(4, 2), (4, 10)],
+        "category": [(13, 0)],
+        "address": [(39,), (37, 0, 0, 17, 0)],
+        "menu_link": [(38, 0)],
+        "webpage": [(7, 0)],
+        "phone_number": [(178, 0, 0)],
+        "cover_image": [(72, 0, 0, 6, 0), (37, 0, 0, 6, 0)],
+        "about": [(32, 1, 1), (32, 0, 1)],
+        "latitude": [(9, 2)],
+        "longitude": [(9, 3)],
+        "feature_id": [(10,)],
+        "google_place_id": [(78,)],
+    }
+    _hours_path = (34, 1)
+    _photos_path = (72, 0)
+    _address_parts_path = (2,)
+
+    @classmethod
+    def parse(cls, body: str) -> any:
+        """
+        JSON data of a raw payload body.
+            :param body: The body, with or without the XSSI prefix, or a {"d": "..."} search envelope.
+            :return: The decoded data, None if the body is not a Maps payload.
+        """
+
+        if not body:
+            return None
+        body = body.strip()
+        if body.endswith('/*""*/'):
+            body = body[:-len('/*""*/')]
+        try:
+            if body.startswith("{"):
+                body = json.loads(body).get("d", "")
+            if body.startswith(cls._xssi_prefix):
+                body = body[len(cls._xssi_prefix):]
+            return json.loads(body)
+        except (ValueError, AttributeError, TypeError):
+            return None
+
+    @staticmethod
+    def _get(node: any, path: tuple) -> any:
+        for index in path:
+            if not isinstance(node, list) or index >= len(node):
+                return None
+            node = node[index]
+        return node
+
+    @classmethod
+    def place_from_preview(cls, data: any) -> list:
+        place = cls._get(data, (6,))
+        return place if isinstance(place, list) else None
+
+    @classmethod
+    def places_from_search(cls, data: any) -> list:
+        places = []
+        for entry in cls._get(data, (0, 1)) or cls._get(data, (64,)) or []:
+            place = cls._get(entry, (14,)) if isinstance(entry, list) else None
+            if isinstance(place, list):
+                places.append(place)
+            elif isinstance(cls._get(entry, (1,)), list) and isinstance(cls._get(entry, (1, 11)), str):
+                places.append(entry[1])
+        return places
+
+    @staticmethod
+    def _clean_link(link: str) -> str:
+        # some links go through the Google redirect
+        if link.startswith("/url?"):
+            return parse_qs(urlparse(link).query).get("q", [link])[0]
+        return link
+
+    def _working_hours(self, days: any) -> str:
+        rows = []
+        for day in days if isinstance(days, list) else []:
+            if not isinstance(day, list) or not day or not isinstance(day[0], str):
+                continue
+            hours = []
+            for part in day[1:]:
+                if isinstance(part, list) and part and all(isinstance(text, str) for text in part):
+                    hours = part
+                    break
+                # newer payloads: [[text, [[from], [to]]], ...]
+                if isinstance(part, list) and part and all(isinstance(slot, list) and slot
+                                                           and isinstance(slot[0], str) for slot in part):
+                    hours = [slot[0] for slot in part]
+                    break
+            rows.append(f"{day[0]} {', '.join(hours)}".strip())
+        return ",".join(rows)
+
+    def decode_place(self, place: list) -> dict:
+        """
+        Output fields of a place array.
+            :param place: A place array (see place_from_preview and places_from_search).
+            :return: Field name -> value for the fields that were found, "about" as {"about_desc": ...}.
+        """
+
+        fields = {}
+        for name, paths in self._field_paths.items():
+            for path in paths:
+                value = self._get(place, path)
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    fields[name] = str(value)
+                    break
+                if isinstance(value, str) and value.strip():
+                    fields[name] = value.strip()
+                    break
+
+        if "address" not in fields:
+            parts = [part for part in self._get(place, self._address_parts_path) or [] if isinstance(part, str)]
+            if parts:
+                fields["address"] = ", ".join(parts)
+        for name in ("webpage", "menu_link"):
+            if name in fields:
+                fields[name] = self._clean_link(fields[name])
+        if "about" in fields:
+            fields["about"] = {"about_desc": fields["about"]}
+
+        hours = self._working_hours(self._get(place, self._hours_path))
+        if hours:
+            fields["working_hours"] = hours
+        photos = [self._get(photo, (6, 0)) for photo in (self._get(place, self._photos_path) or [])[1:]]
+        photos = [photo for photo in photos if isinstance(photo, str) and photo]
+        if photos:
+            fields["related_images"] = ",".join(photos)
+        return fields
+
+
+class PayloadCapture:
+    """
+    Place payloads of one browser: the inline state of the current page and the search and place
+    responses captured from its performance log.
+
+    Place pages are read from their inline state with one script call. The /search?tb=map and
+    /maps/preview/place responses are read from the DevTools network events (the browser needs the
+    performance log, see GoogleMaps.build_chrome_driver) and kept per feature ID, so the places of a
+    results list scrolled by the same browser are already decoded when they are opened.
+
+    Methods:
+        collect(self, driver, events):
+            Decode the Maps responses listed in a batch of network events.
+
+        page_fields(self, driver):
+            Fields of the place shown in the current tab.
+
+        place_fields(self, driver, feature_id):
+            Fields of a place from the current page and the captured responses.
+    """
+
+    _response_url_pattern = compile(r'/maps/preview/place|/search\?tb=map|/maps/preview/entity')
+    _max_cached_places = 2000
+
+    # Returns the `)]}'`-prefixed place payload the page was rendered from
+    _app_state_script = """
+        /* gms:app_state */
+        var state = window.APP_INITIALIZATION_STATE;
+        var holders = state && state[3];
+        if (!holders) {
+            return null;
+        }
+        // an array with the payload at 6, or an object of such arrays
+        var candidates = [holders].concat(Object.keys(holders).map(function (key) { return holders[key]; }));
+        for (var c = 0; c < candidates.length; c++) {
+            var holder = candidates[c];
+            if (holder && typeof holder[6] === "string" && holder[6].indexOf(")]}'") === 0) {
+                return holder[6];
+            }
+        }
+        return null;
+    """
+
+    def __init__(self, decoder: MapsPayloadDecoder = None) -> None:
+        """
+        Initialize an empty capture.
+            :param decoder: The MapsPayloadDecoder.
+        """
+
+        self._decoder = decoder or MapsPayloadDecoder()
+        self._places = {}
+
+    def _store(self, place: list) -> None:
+        fields = self._decoder.decode_place(place)
+        feature_id = fields.get("feature_id", "").lower()
+        if not feature_id:
+            return
+        self._places.pop(feature_id, None)
+        self._places[feature_id] = fields
+        if len(self._places) > self._max_cached_places:
+            del self._places[next(iter(self._places))]
+
+    def collect(self, driver: any, events: list[dict]) -> int:
+        """
+        Decode the Maps responses listed in a batch of network events.
+            :param driver: The WebDriver instance the events come from.
+            :param events: DevTools events (see NetworkMonitor.read_events).
+            :return: The number of places decoded.
+        """
+
+        decoded = 0
+        for event in events:
+            if event.get("method") != "Network.responseReceived":
+                continue
+            params = event.get("params", {})
+            if not self._response_url_pattern.search(params.get("response", {}).get("url", "")):
+                continue
+            try:
+                response = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": params["requestId"]})
+            except (WebDriverException, KeyError):
+                # the body is gone once the page that loaded it navigated away
+                continue
+            body = response.get("body", "")
+            if response.get("base64Encoded"):
+                body = b64decode(body).decode("utf-8", errors="replace")
+            data = self._decoder.parse(body)
+            preview = self._decoder.place_from_preview(data)
+            places = [preview] if preview else self._decoder.places_from_search(data)
+            for place in places:
+                self._store(place)
+            decoded += len(places)
+        return decoded
+
+    def page_fields(self, driver: any) -> dict:
+        try:
+            body = driver.execute_script(self._app_state_script)
+        except WebDriverException:
+            return {}
+        place = self._decoder.place_from_preview(self._decoder.parse(body))
+        return self._decoder.decode_place(place) if place else {}
+
+    def place_fields(self, driver: any, feature_id: str = None) -> dict:
+        """
+        Fields of a place from the current page and the captured responses.
+            :param driver: The WebDriver instance showing the place.
+            :param feature_id: Feature ID of the place ("0x...:0x..."), to look the captured responses up.
+            :return: The decoded fields, the page state wins over the captured responses.
+        """
+
+        fields = dict(self._places.get((feature_id or "").lower(), {}))
+        fields.update(self.page_fields(driver))
+        return fields
@@ -0,0 +1,279 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from contextlib import contextmanager
+from threading import Thread, Event, Lock
+from time import perf_counter, time
+from bisect import bisect_left
+import json
+import os
+
+# Help text of the metrics written by the scrapers, shown in the Prometheus output
+_metric_help = {
+    "gmaps_stage_seconds": "Duration of a scraping stage (driver_start, load_url, search, scroll, open_place, "
+                           "payload_extract, batch_extract, website_enrichment, reset, store, enrichment, "
+                           "file_write)",
+    "gmaps_field_seconds": "Duration of a place field getter",
+    "gmaps_place_seconds": "Duration of the whole extraction of one place",
+    "gmaps_field_fallbacks_total": "Fields the batch extraction missed and a getter had to look up",
+    "gmaps_field_missing_total": "Fields left unavailable after every lookup",
+    "gmaps_payload_misses_total": "Fields the Maps payload did not hold, read from the DOM instead",
+    "gmaps_places_total": "Places scraped and handed to the output",
+    "gmaps_links_found_total": "Place links collected from the results lists",
+    "gmaps_task_errors_total": "Tasks that failed with an exception",
+    "gmaps_records_written_total": "Records written by the output writers",
+    "gmaps_records_dropped_total": "Records handed to the output after it was closed, not written",
+    "gmaps_network_bytes_total": "Bytes downloaded by the browsers (encoded size on the wire)",
+    "gmaps_network_requests_total": "Requests sent by the browsers",
+    "gmaps_network_blocked_total": "Requests dropped by the blocking profile",
+    "gmaps_place_load_seconds": "Time from opening a place to its page being ready",
+    "gmaps_wait_seconds": "Duration of an explicit wait for an element, by probe",
+    "gmaps_waits_total": "Explicit waits by probe and outcome (found, absent: the loaded page lacks it, timeout)",
+    "gmaps_wait_saved_seconds_total": "Seconds the short and skipped waits saved against waiting the full wait_time",
+    "gmaps_selector_lookups_total": "Lookups of a field selector by field, position in the selector file and outcome",
+    "gmaps_selector_seconds": "Duration of a matching field selector lookup",
+}
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count of observed durations, Prometheus style."""
+
+    def __init__(self, buckets: tuple) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    Thread-safe counters and duration histograms, labelled by stage, field, worker...
+
+    Scrapers record into one shared registry, worker processes send theirs to the parent with
+    snapshot(reset=True) and merge(). The registry is exported as Prometheus text or as JSON, see
+    MetricsExporter.
+
+    Methods:
+        inc(self, name, value, **labels):
+            Increase a counter.
+
+        observe(self, name, seconds, **labels):
+            Record a duration in a histogram.
+
+        timer(self, name, **labels):
+            Context manager observing the duration of its block.
+
+        snapshot(self, reset):
+            Plain dict of every counter and histogram.
+
+        merge(self, snapshot):
+            Add a snapshot of another registry to this one.
+
+        render_prometheus(self):
+            Prometheus text exposition of the registry.
+    """
+
+    _default_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self, buckets: tuple = None) -> None:
+        """
+        Initialize an empty registry.
+            :param buckets: Upper bounds (seconds) of the histogram buckets.
+        """
+
+        self._buckets = tuple(buckets or self._default_buckets)
+        self._lock = Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> tuple:
+        return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self._buckets)
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        start_time = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, perf_counter() - start_time, **labels)
+
+    def snapshot(self, reset: bool = False) -> dict:
+        """
+        Plain dict of every counter and histogram.
+            :param reset: Start from zero afterwards, so the next snapshot only holds what happened since.
+            :return: {"counters": [...], "histograms": [...]}, each entry with its "name" and "labels".
+        """
+
+        with self._lock:
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in self._counters.items()]
+            histograms = [{"name": name, "labels": dict(labels), "buckets": list(histogram.buckets),
+                           "counts": list(histogram.counts), "sum": histogram.sum, "count": histogram.count}
+                          for (name, labels), histogram in self._histograms.items()]
+            if reset:
+                self._counters = {}
+                self._histograms = {}
+        return {"counters": counters, "histograms": histograms}
+
+    def merge(self, snapshot: dict) -> None:
+        with self._lock:
+            for counter in snapshot["counters"]:
+                key = self._key(counter["name"], counter["labels"])
+                self._counters[key] = self._counters.get(key, 0) + counter["value"]
+            for entry in snapshot["histograms"]:
+                key = self._key(entry["name"], entry["labels"])
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram(tuple(entry["buckets"]))
+                if list(histogram.buckets) != list(entry["buckets"]):
+                    continue
+                histogram.counts = [own + other for own, other in zip(histogram.counts, entry["counts"])]
+                histogram.sum += entry["sum"]
+                histogram.count += entry["count"]
+
+    @staticmethod
+    def _format_labels(labels: dict, extra: tuple = ()) -> str:
+        pairs = list(labels.items()) + list(extra)
+        if not pairs:
+            return ""
+        escaped = []
+        for key, value in pairs:
+            value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+            escaped.append(f'{key}="{value}"')
+        return "{" + ",".join(escaped) + "}"
+
+    def render_prometheus(self) -> str:
+        snapshot = self.snapshot()
+        lines = []
+        described = set()
+
+        def describe(name: str, metric_type: str) -> None:
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {_metric_help.get(name, name)}")
+                lines.append(f"# TYPE {name} {metric_type}")
+
+        for counter in sorted(snapshot["counters"], key=lambda entry: entry["name"]):
+            describe(counter["name"], "counter")
+            lines.append(f"{counter['name']}{self._format_labels(counter['labels'])} {counter['value']}")
+        for entry in sorted(snapshot["histograms"], key=lambda entry: entry["name"]):
+            describe(entry["name"], "histogram")
+            cumulative = 0
+            for bound, count in zip(list(entry["buckets"]) + ["+Inf"], entry["counts"]):
+                cumulative += count
+                lines.append(f"{entry['name']}_bucket{self._format_labels(entry['labels'], (('le', bound),))} "
+                             f"{cumulative}")
+            lines.append(f"{entry['name']}_sum{self._format_labels(entry['labels'])} {entry['sum']:.6f}")
+            lines.append(f"{entry['name']}_count{self._format_labels(entry['labels'])} {entry['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, file_path: str) -> None:
+        """
+        Write the snapshot to a JSON file, replaced atomically so readers never see half a file.
+            :param file_path: Path of the JSON file.
+        """
+
+        temporary_path = file_path + ".tmp"
+        with open(temporary_path, "w", encoding="utf-8") as f:
+            json.dump({"updated_at": time(), **self.snapshot()}, f)
+        os.replace(temporary_path, file_path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = None
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        ...
+
+
+class MetricsExporter(Thread):
+    """
+    Publishes a MetricsRegistry while a run is going: a Prometheus endpoint on http://host:port/metrics
+    and/or a JSON file rewritten every `interval` seconds (and once more when stopped).
+
+    Methods:
+        run(self):
+            Periodic JSON writer loop.
+
+        stop(self):
+            Write the final JSON file and shut the endpoint down.
+    """
+
+    def __init__(self, registry: MetricsRegistry, port: int = 0, host: str = "0.0.0.0", json_path: str = None,
+                 interval: float = 10.0) -> None:
+        """
+        Initialize the exporter.
+            :param registry: The MetricsRegistry to publish.
+            :param port: Port of the Prometheus endpoint (0 disables it).
+            :param host: Interface the endpoint listens on.
+            :param json_path: Path of the JSON metrics file (None disables it).
+            :param interval: Seconds between two JSON files.
+        """
+
+        super().__init__(name="MetricsExporter", daemon=True)
+        self._registry = registry
+        self._json_path = json_path
+        self._interval = interval
+        self._stop_event = Event()
+        self._server = None
+        self._server_thread = None
+        if port:
+            handler = type("RegistryHandler", (_MetricsHandler,), {"registry": registry})
+            self._server = ThreadingHTTPServer((host, port), handler)
+            self._server.daemon_threads = True
+            self._server_thread = Thread(target=self._server.serve_forever, name="MetricsEndpoint", daemon=True)
+
+    def start(self) -> None:
+        if self._server_thread is not None:
+            self._server_thread.start()
+        super().start()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self._interval):
+            self._write_json()
+
+    def _write_json(self) -> None:
+        if self._json_path:
+            try:
+                self._registry.write_json(self._json_path)
+            except OSError as e:
+                print(f"[-] Failed to write the metrics file {self._json_path}: {e}")
+
+    def stop(self) -> None:
+        if self._stop_event.is_set():
+            return
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
+        self._write_json()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
@@ -0,0 +1,88 @@
+from selenium.common.exceptions import WebDriverException
+from utils.metrics import MetricsRegistry
+import json
+
+
+class NetworkMonitor:
+    """
+    Network accounting of a browser from its Chrome performance log.
+
+    The browser has to be launched with the performance log enabled (see GoogleMaps.build_chrome_driver).
+    Every call of account() drains the log of the driver and adds what was downloaded since the previous
+    call to the metrics: bytes on the wire, requests and requests dropped by the blocking profile, with a
+    "phase" label telling the results list ("search") from the place pages ("place").
+
+    Methods:
+        read_events(driver):
+            Drain the performance log of a driver.
+
+        summarize(events):
+            Bytes, requests and blocked requests of a list of log events.
+
+        account(self, driver, worker, phase, load_seconds, events):
+            Drain the log of a driver and record the traffic in the metrics.
+    """
+
+    def __init__(self, metrics: MetricsRegistry = None) -> None:
+        """
+        Initialize the monitor.
+            :param metrics: MetricsRegistry receiving the counters.
+        """
+
+        self._metrics = metrics or MetricsRegistry()
+
+    @staticmethod
+    def read_events(driver: any) -> list[dict]:
+        """
+        Drain the performance log of a driver.
+            :param driver: The WebDriver instance.
+            :return: The DevTools events ({"method", "params"}), empty if the log is not available.
+        """
+
+        try:
+            entries = driver.get_log("performance")
+        except (WebDriverException, AttributeError, ValueError):
+            return []
+
+        events = []
+        for entry in entries:
+            try:
+                events.append(json.loads(entry["message"])["message"])
+            except (KeyError, TypeError, ValueError):
+                continue
+        return events
+
+    @staticmethod
+    def summarize(events: list[dict]) -> dict:
+        # Chrome does not report the size of a blocked request, the savings come from comparing profiles
+        summary = {"bytes": 0, "requests": 0, "blocked": 0}
+        for event in events:
+            method = event.get("method")
+            params = event.get("params", {})
+            if method == "Network.requestWillBeSent":
+                summary["requests"] += 1
+            elif method == "Network.loadingFinished":
+                summary["bytes"] += int(params.get("encodedDataLength", 0))
+            elif method == "Network.loadingFailed" and params.get("blockedReason"):
+                summary["blocked"] += 1
+        return summary
+
+    def account(self, driver: any, worker: str, phase: str, load_seconds: float = None,
+                events: list[dict] = None) -> dict:
+        """
+        Drain the log of a driver and record the traffic in the metrics.
+            :param driver: The WebDriver instance.
+            :param worker: Worker label of the metrics.
+            :param phase: "search" for the results list, "place" for a place page.
+            :param load_seconds: Time the page took to show, recorded for places.
+            :param events: Events already drained from the log by the caller, the log is not read again.
+            :return: The bytes, requests and blocked requests since the previous call.
+        """
+
+        summary = self.summarize(self.read_events(driver) if events is None else events)
+        self._metrics.inc("gmaps_network_bytes_total", summary["bytes"], worker=worker, phase=phase)
+        self._metrics.inc("gmaps_network_requests_total", summary["requests"], worker=worker, phase=phase)
+        self._metrics.inc("gmaps_network_blocked_total", summary["blocked"], worker=worker, phase=phase)
+        if load_seconds is not None:
+            self._metrics.observe("gmaps_place_load_seconds", load_seconds, worker=worker)
+        return summary
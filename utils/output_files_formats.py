@@ -1,6 +1,7 @@
 from openpyxl import Workbook, load_workbook
 from threading import Lock
 from csv import DictWriter
+from time import time
 import json
 import os
 
@@ -9,26 +10,38 @@ class CSVCreator:
     def __init__(self, file_lock: Lock, output_path: str = "./CSV_FILES"):
         self._output_path = output_path
         self._file_lock = file_lock
+        self._file_handler = None
+        self._writer = None
 
     def create(self, list_of_dict_data: list[dict]):
         with self._file_lock:
-            os.makedirs(self._output_path, exist_ok=True)
-            file_name = "google_maps_data.csv"
-            _isheader_file = False
-            if not os.path.isfile(self._output_path + "/" + file_name):
-                _isheader_file = True
+            if self._file_handler is None:
+                os.makedirs(self._output_path, exist_ok=True)
+                file_name = "google_maps_data.csv"
+                _isheader_file = False
+                if not os.path.isfile(self._output_path + "/" + file_name):
+                    _isheader_file = True
 
-            if _isheader_file:
-                file_handler = open(self._output_path + "/" + file_name, "w", newline="", encoding="utf-8-sig")
-            else:
-                file_handler = open(self._output_path + "/" + file_name, "a", newline="", encoding="utf-8-sig")
+                if _isheader_file:
+                    file_handler = open(self._output_path + "/" + file_name, "w", newline="", encoding="utf-8-sig")
+                else:
+                    file_handler = open(self._output_path + "/" + file_name, "a", newline="", encoding="utf-8-sig")
 
-            writer = DictWriter(file_handler, fieldnames=list_of_dict_data[0].keys(), extrasaction='ignore')
-            if _isheader_file:
-                writer.writeheader()
+                self._writer = DictWriter(file_handler, fieldnames=list_of_dict_data[0].keys(),
+                                          extrasaction='ignore')
+                if _isheader_file:
+                    self._writer.writeheader()
+                self._file_handler = file_handler
 
-            writer.writerows(list_of_dict_data)
-            file_handler.close()
+            self._writer.writerows(list_of_dict_data)
+            self._file_handler.flush()
+
+    def close(self):
+        with self._file_lock:
+            if self._file_handler is not None:
+                self._file_handler.close()
+                self._file_handler = None
+                self._writer = None
 
 
 class JSONCreator:
@@ -56,38 +69,194 @@ class JSONCreator:
                     f.truncate()
                     json.dump(existing_data, f, ensure_ascii=False, indent=4)
 
+    def close(self):
+        ...
+
+
+class JSONLCreator:
+    """
+    Append-only JSON Lines writer, one record per line.
+
+    The file is opened once and written through a buffer, so every record costs the same no matter how
+    large the file already is. The buffer is flushed and fsync'ed every `fsync_interval` seconds and on
+    close(), which can also rewrite the lines as a JSON array (google_maps_data.json).
+    """
+
+    def __init__(self, file_lock: Lock, output_path: str = "./JSON_FILES", fsync_interval: float = 5.0,
+                 finalize_array: bool = False, file_name: str = "google_maps_data.jsonl"):
+        self._file_lock = file_lock
+        self._output_path = output_path
+        self._fsync_interval = fsync_interval
+        self._finalize_array = finalize_array
+        self._file_path = os.path.join(self._output_path, file_name)
+        self._file_handler = None
+        self._last_sync = time()
+
+    @property
+    def file_path(self):
+        return self._file_path
+
+    def _sync(self):
+        self._file_handler.flush()
+        os.fsync(self._file_handler.fileno())
+        self._last_sync = time()
+
+    def create(self, list_of_dict_data: list[dict]):
+        lines = "".join(json.dumps(data_dict, ensure_ascii=False) + "\n" for data_dict in list_of_dict_data)
+
+        with self._file_lock:
+            if self._file_handler is None:
+                os.makedirs(self._output_path, exist_ok=True)
+                self._file_handler = open(self._file_path, "a", encoding="utf-8", buffering=1024 * 1024)
+            self._file_handler.write(lines)
+            if time() - self._last_sync >= self._fsync_interval:
+                self._sync()
+
+    def flush_buffer(self):
+        """Hand the buffered lines to the OS so they survive the process being killed."""
+        with self._file_lock:
+            if self._file_handler is not None:
+                self._file_handler.flush()
+
+    def close(self):
+        with self._file_lock:
+            if self._file_handler is not None:
+                self._sync()
+                self._file_handler.close()
+                self._file_handler = None
+
+        if self._finalize_array and os.path.isfile(self._file_path):
+            self.to_json_array(self._file_path, os.path.join(self._output_path, "google_maps_data.json"))
+
+    @staticmethod
+    def to_json_array(jsonl_path: str, json_path: str):
+        """
+        Stream a JSON Lines file into a JSON array file without loading it in memory.
+            :param jsonl_path: Source .jsonl file.
+            :param json_path: Destination .json file.
+        """
+
+        with open(jsonl_path, "r", encoding="utf-8") as source, open(json_path, "w", encoding="utf-8") as target:
+            target.write("[")
+            first = True
+            for line in source:
+                line = line.strip()
+                if not line:
+                    continue
+                target.write("\n    " + line if first else ",\n    " + line)
+                first = False
+            target.write("\n]\n" if not first else "]\n")
+
 
 
 class XLSXCreator:
-    def __init__(self, file_lock: Lock, output_path: str = "./XLSX_FILES"):
+    """
+    Excel writer that never reloads the workbook while scraping.
+
+    Rows are appended to an on-disk JSON Lines spool next to the workbook and the .xlsx is written once
+    with openpyxl's write-only mode when flush() runs: every `flush_rows` rows (0 = only at the end) and
+    on close(). Rows already in an existing workbook, or left in the spool by a crashed run, are kept.
+    An xlsx file cannot be appended to, every flush rewrites the whole workbook, so a flush also waits
+    for the spool to hold as many rows as the workbook: the rewrites stay linear in the row count instead
+    of quadratic on large runs.
+    """
+
+    def __init__(self, file_lock: Lock, output_path: str = "./XLSX_FILES", flush_rows: int = 0):
         self._file_lock = file_lock
         self._output_path = output_path
+        self._flush_rows = flush_rows
+        self._file_path = os.path.join(self._output_path, "google_maps_data.xlsx")
+        self._spool = JSONLCreator(file_lock=Lock(), output_path=output_path,
+                                   file_name="google_maps_data.xlsx.spool.jsonl")
+        self._spooled_rows = 0
+        self._workbook_rows = 0
 
     def create(self, list_of_dict_data: list[dict]):
-        file_name = "google_maps_data.xlsx"
-        file_path = os.path.join(self._output_path, file_name)
+        self._spool.create(list_of_dict_data=list_of_dict_data)
+        with self._file_lock:
+            self._spooled_rows += len(list_of_dict_data)
+            if self._flush_rows and self._spooled_rows >= max(self._flush_rows, self._workbook_rows):
+                self._flush()
+
+    def _read_existing_rows(self):
+        # the read-only workbook keeps its file open until close(), the caller closes it
+        if not os.path.isfile(self._file_path):
+            return None, None, []
+        existing_wb = load_workbook(self._file_path, read_only=True)
+        rows = existing_wb.active.iter_rows(values_only=True)
+        headers = next(rows, None)
+        return existing_wb, (list(headers) if headers else None), rows
+
+    def _flush(self):
+        self._spool.close()
+        spool_path = self._spool.file_path
+        if not os.path.isfile(spool_path) or os.path.getsize(spool_path) == 0:
+            return
 
+        existing_wb, headers, existing_rows = self._read_existing_rows()
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(title="Data")
+        workbook_rows = 0
+        temp_path = self._file_path + ".tmp"
+        try:
+            with open(spool_path, "r", encoding="utf-8") as spool:
+                if headers is not None:
+                    ws.append(headers)
+                    for row_values in existing_rows:
+                        ws.append(row_values)
+                        workbook_rows += 1
+                for line in spool:
+                    if not line.strip():
+                        continue
+                    data_dict = json.loads(line)
+                    if headers is None:
+                        headers = list(data_dict.keys())
+                        ws.append(headers)
+                    ws.append([data_dict.get(h, "") for h in headers])
+                    workbook_rows += 1
+            wb.save(temp_path)
+        finally:
+            # the old workbook must be closed before it is replaced (Windows refuses to replace an open file)
+            if existing_wb is not None:
+                existing_wb.close()
+        os.replace(temp_path, self._file_path)
+        os.remove(spool_path)
+        self._spooled_rows = 0
+        self._workbook_rows = workbook_rows
+
+    def flush(self):
         with self._file_lock:
             os.makedirs(self._output_path, exist_ok=True)
-            if not os.path.isfile(file_path):
-                wb = Workbook()
-                ws = wb.active
-                ws.title = "Data"
-                headers = list(list_of_dict_data[0].keys())
-                ws.append(headers)
-                for data_dict in list_of_dict_data:
-                    row_values = [data_dict.get(h, "") for h in headers]
-                    ws.append(row_values)
-
-                wb.save(file_path)
-            else:
-                wb = load_workbook(file_path)
-                ws = wb.active
-                headers = list(ws.iter_rows(min_row=1, max_row=1, values_only=True))[0]
-                for data_dict in list_of_dict_data:
-                    row_values = [data_dict.get(h, "") for h in headers]
-                    ws.append(row_values)
-                wb.save(file_path)
+            self._flush()
+
+    def flush_buffer(self):
+        self._spool.flush_buffer()
+
+    def close(self):
+        self.flush()
+
+
+def create_file_creator(output_format: str, file_lock: Lock, output_path: str, finalize_array: bool = False,
+                        excel_flush_rows: int = 0):
+    """
+    Build the writer for an output format.
+        :param output_format: One of CSV, EXCEL, JSON, JSONL (case-insensitive).
+        :param file_lock: Lock shared by every thread writing to the output.
+        :param output_path: Folder the output file is written to.
+        :param finalize_array: JSONL only, also write the records as a JSON array when the writer is closed.
+        :param excel_flush_rows: EXCEL only, rewrite the workbook every this many rows, and never before the new
+                                 rows are as many as the rows already written (0 = only on close).
+        :return: An object exposing create(list_of_dict_data) and close().
+    """
+
+    output_format = output_format.lower()
+    if output_format == "json":
+        return JSONCreator(file_lock=file_lock, output_path=output_path)
+    elif output_format == "jsonl":
+        return JSONLCreator(file_lock=file_lock, output_path=output_path, finalize_array=finalize_array)
+    elif output_format == "excel":
+        return XLSXCreator(file_lock=file_lock, output_path=output_path, flush_rows=excel_flush_rows)
+    return CSVCreator(file_lock=file_lock, output_path=output_path)
 
 
 if __name__ == '__main__':
@@ -99,13 +268,20 @@ if __name__ == '__main__':
     file_thread_lock = Lock()
     csv_creator = CSVCreator(file_thread_lock, output_path="./CSV_FILES")
     csv_creator.create(data)
+    csv_creator.close()
 
     # JSON usage
     json_creator = JSONCreator(file_thread_lock, output_path="./JSON_FILES")
     json_creator.create(data)
 
+    # JSON Lines usage
+    jsonl_creator = JSONLCreator(file_thread_lock, output_path="./JSON_FILES", finalize_array=True)
+    jsonl_creator.create(data)
+    jsonl_creator.close()
+
     # XLSX usage
     xlsx_creator = XLSXCreator(file_thread_lock, output_path="./XLSX_FILES")
     xlsx_creator.create(data)
+    xlsx_creator.close()
 
 
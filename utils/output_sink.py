@@ -0,0 +1,170 @@
+from utils.place_index import PlaceIndex
+from utils.metrics import MetricsRegistry
+from threading import Thread, Event, Lock
+from queue import Queue, Empty, Full
+from time import time
+
+
+class OutputSink(Thread):
+    """
+    A single long-lived writer thread in front of the output writers.
+
+    Scraper threads call create() exactly like they would call a writer, the records are put on a bounded
+    queue and this thread writes them in batches of `batch_size` records or every `batch_interval` seconds,
+    whichever comes first. The writers keep their files open for the whole run and are closed by close().
+    Records handed to create() once close() has started are not written, they are counted in `records_dropped`.
+    A place is only marked as scraped in the place index once its record is written, the claim of a record that
+    is dropped or fails to write is released so the place can be scraped again.
+
+    Methods:
+        create(self, list_of_dict_data):
+            Queue records for writing, only blocks when the queue is full.
+
+        run(self):
+            Writer loop, drains the queue into batched writes.
+
+        close(self, timeout):
+            Flush every queued record, close the writers and stop the thread.
+    """
+
+    _stop_marker = object()
+
+    def __init__(self, writers: list, max_queue: int = 10000, batch_size: int = 100,
+                 batch_interval: float = 1.0, journal: any = None, metrics: MetricsRegistry = None,
+                 place_index: PlaceIndex = None) -> None:
+        """
+        Initialize the output sink.
+            :param writers: Objects exposing create(list_of_dict_data) and close().
+            :param journal: Optional CheckpointJournal, gets every batch once the writers have flushed it.
+            :param place_index: Optional PlaceIndex, the places of every batch are completed once the writers
+                                have flushed it.
+            :param max_queue: Maximum number of queued records before create() blocks.
+            :param batch_size: Write as soon as this many records are waiting.
+            :param batch_interval: Write at least every this many seconds while records are waiting.
+            :param metrics: Optional MetricsRegistry receiving the time spent per batch and the records written.
+        """
+
+        super().__init__(name="OutputSink", daemon=True)
+        self._writers = writers
+        self._queue = Queue(maxsize=max_queue)
+        self._batch_size = batch_size
+        self._batch_interval = batch_interval
+        self._journal = journal
+        self._place_index = place_index
+        self._metrics = metrics or MetricsRegistry()
+        self._closed = Event()
+        # held around every put, so that nothing is queued behind the stop marker
+        self._put_lock = Lock()
+        self.records_written = 0
+        self.records_dropped = 0
+
+    def create(self, list_of_dict_data: list[dict]) -> None:
+        for index, data_dict in enumerate(list_of_dict_data):
+            while True:
+                with self._put_lock:
+                    if self._closed.is_set():
+                        self._drop(list_of_dict_data[index:])
+                        return
+                    try:
+                        self._queue.put(data_dict, timeout=0.5)
+                        break
+                    except Full:
+                        continue
+
+    def _drop(self, records: list[dict]) -> None:
+        self.records_dropped += len(records)
+        self._metrics.inc("gmaps_records_dropped_total", len(records))
+        self._release(records)
+
+    @staticmethod
+    def _place_ids(records: list[dict]) -> list[str]:
+        return [PlaceIndex.canonical_id(data_dict["map_link"]) for data_dict in records if data_dict.get("map_link")]
+
+    def _release(self, records: list[dict]) -> None:
+        if self._place_index is not None:
+            for place_id in self._place_ids(records):
+                self._place_index.release(place_id)
+
+    def _write(self, batch: list[dict]) -> None:
+        if not batch:
+            return
+        failed = False
+        with self._metrics.timer("gmaps_stage_seconds", stage="file_write", worker="sink"):
+            for writer in self._writers:
+                try:
+                    writer.create(list_of_dict_data=batch)
+                except Exception as e:
+                    failed = True
+                    print(f"[-] Failed to write {len(batch)} records with {type(writer).__name__}: {e}")
+        self.records_written += len(batch)
+        self._metrics.inc("gmaps_records_written_total", len(batch))
+
+        if failed:
+            self._release(batch)
+            return
+
+        # a place is only journaled and completed once its record is out of the writers' buffers
+        if self._journal is not None or self._place_index is not None:
+            for writer in self._writers:
+                if hasattr(writer, "flush_buffer"):
+                    writer.flush_buffer()
+        if self._journal is not None:
+            self._journal.create(list_of_dict_data=batch)
+        if self._place_index is not None:
+            self._place_index.complete_many(self._place_ids(batch))
+
+    def run(self) -> None:
+        batch = []
+        batch_started = time()
+        while True:
+            timeout = max(0.0, self._batch_interval - (time() - batch_started)) if batch else self._batch_interval
+            try:
+                data_dict = self._queue.get(timeout=timeout)
+            except Empty:
+                data_dict = None
+
+            if data_dict is self._stop_marker:
+                self._write(batch)
+                return
+
+            if data_dict is not None:
+                if not batch:
+                    batch_started = time()
+                batch.append(data_dict)
+
+            if len(batch) >= self._batch_size or (batch and time() - batch_started >= self._batch_interval):
+                self._write(batch)
+                batch = []
+
+    def close(self, timeout: float = None) -> None:
+        """
+        Write every queued record, then close the writers.
+            :param timeout: Maximum seconds to wait for the queue to drain.
+        """
+
+        with self._put_lock:
+            if self._closed.is_set():
+                return
+            self._closed.set()
+        if self.is_alive():
+            self._queue.put(self._stop_marker)
+            self.join(timeout=timeout)
+
+        # records still queued when the thread never started or did not finish within the timeout
+        leftover = []
+        while True:
+            try:
+                data_dict = self._queue.get_nowait()
+            except Empty:
+                break
+            if data_dict is not self._stop_marker:
+                leftover.append(data_dict)
+        if self.is_alive():
+            self._drop(leftover)
+        else:
+            self._write(leftover)
+
+        for writer in self._writers:
+            writer.close()
+        if self._journal is not None:
+            self._journal.close()
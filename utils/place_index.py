@@ -0,0 +1,211 @@
+from urllib.parse import urlparse, unquote
+from os.path import join, exists
+from hashlib import blake2b
+from threading import Lock
+from re import compile
+from time import time
+from os import mkdir
+import sqlite3
+
+
+class BloomFilter:
+    """
+    A fixed size in-memory Bloom filter of strings.
+
+    A miss means the key was never added, a hit still has to be confirmed against the real set.
+
+    Methods:
+        add(self, key):
+            Add a key to the filter.
+
+        __contains__(self, key):
+            True if the key may have been added.
+    """
+
+    def __init__(self, capacity: int = 1_000_000, hashes: int = 7) -> None:
+        """
+        Initialize the filter.
+            :param capacity: Expected number of keys, about 1% false positives at this size.
+            :param hashes: Number of bit positions per key.
+        """
+
+        self._size = max(1024, capacity * 10)
+        self._hashes = hashes
+        self._bits = bytearray(self._size // 8 + 1)
+
+    def _positions(self, key: str):
+        digest = blake2b(key.encode("utf-8"), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little")
+        for i in range(self._hashes):
+            yield (first + i * second) % self._size
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class PlaceIndex:
+    """
+    Persistent index of the places already scraped, shared by every worker and kept between runs.
+
+    Places are keyed by a canonical place ID read from their Maps link. A worker claims a place before
+    opening its detail page, the claim fails when the place was scraped before (by another query or an
+    earlier run) or is being scraped right now, and the query -> place association is recorded either way.
+    The SQLite file sits in the output folder, a Bloom filter in front of it answers most lookups for new
+    places without touching the disk.
+
+    Methods:
+        canonical_id(map_link):
+            Canonical place ID of a Maps place link.
+
+        claim(self, place_id, query):
+            Reserve a place for scraping, False if it is already known.
+
+        claim_many(self, place_ids, query):
+            Claim several places of a query in one transaction.
+
+        complete(self, place_id, query):
+            Mark a claimed place as scraped.
+
+        complete_many(self, place_ids, query):
+            Mark several places as scraped in one transaction.
+
+        release(self, place_id):
+            Give up a claim so the place can be claimed again.
+
+        stats(self):
+            Counters of known, claimed and skipped places.
+
+        close(self):
+            Close the database.
+    """
+
+    _feature_id_pattern = compile(r'!1s(0x[0-9a-fA-F]+:0x[0-9a-fA-F]+)')
+    _place_id_pattern = compile(r'!19s([^!?&/]+)')
+    _name_pattern = compile(r'/maps/place/([^/]+)/@(-?\d+\.\d+),(-?\d+\.\d+)')
+
+    def __init__(self, output_path: str, file_name: str = "place_index.sqlite3",
+                 bloom_capacity: int = 1_000_000) -> None:
+        """
+        Open (or create) the place index.
+            :param output_path: Folder the index file is stored in, usually the output folder.
+            :param file_name: Name of the SQLite file.
+            :param bloom_capacity: Expected number of places, sizes the in-memory Bloom filter.
+        """
+
+        if not exists(output_path):
+            mkdir(output_path)
+        self.file_path = join(output_path, file_name)
+        self._lock = Lock()
+        self._in_flight = set()
+        self._bloom = BloomFilter(capacity=bloom_capacity)
+        self._claimed = 0
+        self._skipped = 0
+
+        self._connection = sqlite3.connect(self.file_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS places "
+                                 "(place_id TEXT PRIMARY KEY, first_query TEXT, scraped_at REAL)")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS place_queries "
+                                 "(place_id TEXT, query TEXT, PRIMARY KEY (place_id, query))")
+        self._connection.commit()
+
+        self._known = 0
+        for (place_id,) in self._connection.execute("SELECT place_id FROM places"):
+            self._bloom.add(place_id)
+            self._known += 1
+
+    @classmethod
+    def canonical_id(cls, map_link: str) -> str:
+        """
+        Canonical place ID of a Maps place link.
+            :param map_link: Place link as found in the results feed or the address bar.
+            :return: The feature ID (!1s0x...:0x...), else the place ID (!19s...), else "name@lat,lng"
+                     rounded to about a meter, else the link itself.
+        """
+
+        match = cls._feature_id_pattern.search(map_link)
+        if match:
+            return match.group(1).lower()
+        match = cls._place_id_pattern.search(map_link)
+        if match:
+            return unquote(match.group(1))
+        match = cls._name_pattern.search(urlparse(map_link).path)
+        if match:
+            name = unquote(match.group(1)).replace("+", " ").strip().lower()
+            return f"{name}@{float(match.group(2)):.5f},{float(match.group(3)):.5f}"
+        return map_link
+
+    def _is_known(self, place_id: str) -> bool:
+        if place_id in self._in_flight:
+            return True
+        if place_id not in self._bloom:
+            return False
+        row = self._connection.execute("SELECT 1 FROM places WHERE place_id = ?", (place_id,)).fetchone()
+        return row is not None
+
+    def claim_many(self, place_ids: list[str], query: str) -> list[bool]:
+        """
+        Claim several places of a query in one transaction.
+            :param place_ids: Canonical place IDs.
+            :param query: The query the places were found by, recorded for every place.
+            :return: One flag per place, True if the caller should scrape it.
+        """
+
+        claimed = []
+        with self._lock:
+            self._connection.executemany("INSERT OR IGNORE INTO place_queries (place_id, query) VALUES (?, ?)",
+                                         [(place_id, query) for place_id in place_ids])
+            self._connection.commit()
+            for place_id in place_ids:
+                if self._is_known(place_id):
+                    self._skipped += 1
+                    claimed.append(False)
+                else:
+                    self._in_flight.add(place_id)
+                    self._claimed += 1
+                    claimed.append(True)
+        return claimed
+
+    def claim(self, place_id: str, query: str) -> bool:
+        return self.claim_many([place_id], query)[0]
+
+    def complete(self, place_id: str, query: str = None) -> None:
+        self.complete_many([place_id], query)
+
+    def complete_many(self, place_ids: list[str], query: str = None) -> None:
+        """
+        Mark several places as scraped in one transaction, once their records are written.
+            :param place_ids: Canonical place IDs.
+            :param query: The query the places were scraped for, None for the first query that claimed each one.
+        """
+
+        scraped_at = time()
+        with self._lock:
+            known = self._connection.total_changes
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO places (place_id, first_query, scraped_at) VALUES "
+                "(?, COALESCE(?, (SELECT query FROM place_queries WHERE place_id = ? LIMIT 1)), ?)",
+                [(place_id, query, place_id, scraped_at) for place_id in place_ids]
+            )
+            self._known += self._connection.total_changes - known
+            self._connection.commit()
+            for place_id in place_ids:
+                self._in_flight.discard(place_id)
+                self._bloom.add(place_id)
+
+    def release(self, place_id: str) -> None:
+        with self._lock:
+            self._in_flight.discard(place_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"known": self._known, "claimed": self._claimed, "skipped": self._skipped}
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
@@ -1,7 +1,9 @@
-from threading import Lock, active_count
+from threading import Lock, Thread, Event, active_count, get_ident
 from psutil import Process
 from platform import system as system_platform
+from time import time
 from os import system
+import sys
 
 
 class PPrints:
@@ -57,3 +59,100 @@ class PPrints:
                   f"{self.RED}Warning: Don't open the output file while script is running\n"
                   f"{self.RESET}", end="\r")
 
+
+class StatusDashboard(Thread):
+    """
+    Terminal dashboard redrawn at a fixed rate by a single renderer thread.
+
+    Workers call post() which only stores the latest status of the calling thread in a dict, no lock, no
+    psutil call and no terminal clearing. The renderer samples memory once per tick and redraws the whole
+    frame in place with ANSI cursor control, one line per worker.
+
+    Methods:
+        post(self, query, status, mode, results_indices):
+            Record the latest status of the calling worker.
+
+        render(self):
+            Build the current frame as a string.
+
+        run(self):
+            Redraw loop.
+
+        stop(self):
+            Draw the final frame and stop the renderer.
+    """
+
+    _cursor_home = "\033[H"
+    _clear_line = "\033[K"
+    _clear_below = "\033[J"
+
+    def __init__(self, refresh_rate: float = 4.0, output_format: str = "CSV", progress: callable = None,
+                 verbose: bool = True) -> None:
+        """
+        Initialize the dashboard.
+            :param refresh_rate: Redraws per second.
+            :param output_format: Output format shown in the header.
+            :param progress: Optional callable returning a dict with "processed", "total" and "places" task counters.
+            :param verbose: If False, statuses are prefixed with "[Verbose is off]".
+        """
+
+        super().__init__(name="StatusDashboard", daemon=True)
+        self._interval = 1 / refresh_rate
+        self._output_format = output_format
+        self._progress = progress
+        self._verbose = verbose
+        self._process = Process()
+        self._workers = {}
+        self._stop_event = Event()
+
+    def post(self, query: str, status: str, mode: str, results_indices: any([str, list[int]]) = "Calculating",
+             worker: any = None):
+        # A single dict assignment is atomic, the renderer only ever reads a snapshot
+        self._workers[get_ident() if worker is None else worker] = (query, status, mode, results_indices, time())
+
+    def render(self) -> str:
+        current_memory_usage = self._process.memory_info().rss / 1024 / 1024
+        workers = list(self._workers.values())
+        mode = workers[0][2] if workers else "-"
+        lines = [
+            f"{PPrints.WARNING}Platform: {system_platform()}  {PPrints.CYAN}Developer: AbdulMoez  "
+            f"{PPrints.WARNING}GitHub: github.com/Anonym0usWork1221/GMapsScraper",
+            f"{PPrints.BLUE}Mode: {mode}  {PPrints.GREEN}OutPutFile: {self._output_format}  "
+            f"{PPrints.CYAN}RunningThreads: {active_count() - 1}  "
+            f"{PPrints.RED}MemoryUsageByScript: {current_memory_usage: .2f}MB",
+        ]
+        if self._progress is not None:
+            progress = self._progress()
+            lines.append(f"{PPrints.GREEN}Tasks: {progress['processed']}/{progress['total']} processed "
+                         f"({progress.get('places', 0)} places)")
+        lines.append(f"{PPrints.RED}Warning: Don't open the output file while script is running")
+
+        now = time()
+        for index, (query, status, _, results_indices, updated) in enumerate(workers, start=1):
+            if not isinstance(results_indices, str):
+                results_indices = f"{results_indices[1]}/{results_indices[0]}"
+            if not self._verbose:
+                status = f"[Verbose is off] {status}"
+            lines.append(f"{PPrints.BLUE}Worker {index}: {PPrints.RESET}{query[:50]:<50} "
+                         f"{PPrints.GREEN}{status:<32} {PPrints.CYAN}Results: {results_indices:<12} "
+                         f"{PPrints.RESET}{now - updated:4.0f}s ago")
+        return "".join(line + self._clear_line + "\n" for line in lines) + PPrints.RESET + self._clear_below
+
+    def _draw(self) -> None:
+        sys.stdout.write(self._cursor_home + self.render())
+        sys.stdout.flush()
+
+    def run(self) -> None:
+        if system_platform().lower() == "windows":
+            system("")  # Enables ANSI escape sequences in the Windows console
+        sys.stdout.write("\033[2J")
+        while not self._stop_event.wait(self._interval):
+            self._draw()
+
+    def stop(self) -> None:
+        if self._stop_event.is_set():
+            return
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
+            self._draw()
@@ -0,0 +1,326 @@
+from utils.enrichment_stage import EnrichmentStage
+from utils.browser_backends import create_backend
+from utils.web_site_scraper import PatternScrapper
+from utils.google_maps_scraper import GoogleMaps
+from utils.metrics import MetricsRegistry
+from utils.http_fetcher import HTTPPageFetcher
+from utils.place_index import PlaceIndex
+from multiprocessing import get_context
+from utils.driver_pool import DriverPool
+from signal import signal, SIGINT, SIG_IGN
+from threading import Lock
+from queue import Empty
+from time import time
+
+
+class WorkerCrashed(RuntimeError):
+    """Raised when a worker process died or stopped answering while it was running a task."""
+
+
+class _QueueWriter:
+    """File creator of a worker process, hands the records to the parent process."""
+
+    def __init__(self, result_queue) -> None:
+        self._result_queue = result_queue
+
+    def create(self, list_of_dict_data: list[dict]) -> None:
+        self._result_queue.put(("records", list_of_dict_data))
+
+    def close(self) -> None:
+        ...
+
+
+class _ParentPlaceIndex:
+    """Place index of a worker process, the places are claimed in the parent's PlaceIndex."""
+
+    def __init__(self, result_queue, claim_queue) -> None:
+        self._result_queue = result_queue
+        self._claim_queue = claim_queue
+
+    def claim_many(self, place_ids: list[str], query: str) -> list[bool]:
+        self._result_queue.put(("claim", (place_ids, query)))
+        return self._claim_queue.get()
+
+    def claim(self, place_id: str, query: str) -> bool:
+        return self.claim_many([place_id], query)[0]
+
+    def release(self, place_id: str) -> None:
+        self._result_queue.put(("release", place_id))
+
+
+class _QueueDashboard:
+    """Dashboard of a worker process, forwards the statuses to the parent's StatusDashboard."""
+
+    def __init__(self, result_queue) -> None:
+        self._result_queue = result_queue
+
+    def post(self, query: str, status: str, mode: str, results_indices: any([str, list[int]]) = "Calculating"):
+        self._result_queue.put(("status", {"query": query, "status": status, "mode": mode,
+                                           "results_indices": results_indices}))
+
+
+def run_scraper_task(maps_obj: GoogleMaps, task: dict, place_mode: str, skip_place_ids: set = None) -> dict:
+    """
+    Run a scheduler task described by plain values, for scrappers living away from the scheduler.
+        :param maps_obj: The GoogleMaps scrapper.
+        :param task: "kind", "query", "source_query", "results_indices" and "deadline" of the task.
+        :param place_mode: "url" or "tab".
+        :param skip_place_ids: Optional place IDs already written (TAB mode of resumed runs).
+        :return: The outcome: "completed", for queries the "results_found" by the results list and the
+                 "query_places" the query is responsible for and, for harvested queries, the "place_urls" (not
+                 claimed yet) and whether the results list was scrolled to its end ("results_complete").
+    """
+
+    if place_mode == "tab":
+        return {"completed": maps_obj.start_scrapper(task["query"], deadline=task["deadline"],
+                                                     skip_place_ids=skip_place_ids),
+                "results_found": maps_obj.results_found, "query_places": maps_obj.query_places}
+
+    if task["kind"] == "place":
+        return {"completed": maps_obj.scrape_place(task["query"], query=task["source_query"],
+                                                   results_indices=task["results_indices"],
+                                                   deadline=task["deadline"])}
+
+    place_urls = maps_obj.harvest_links(task["query"], deadline=task["deadline"])
+    return {"completed": maps_obj.results_complete and (task["deadline"] is None or time() <= task["deadline"]),
+            "place_urls": place_urls, "results_found": maps_obj.results_found,
+            "results_complete": maps_obj.results_complete, "query_places": maps_obj.query_places}
+
+
+def _worker_main(worker_id: int, settings: dict, task_queue, result_queue, stop_event, claim_queue=None) -> None:
+    """
+    Entry point of a worker process: one browser, one GoogleMaps scrapper and its own enrichment stage.
+        :param worker_id: Number of the worker, used in the metrics labels.
+        :param settings: Plain values describing the scrapper, see ProcessWorker.
+        :param task_queue: Tasks from the parent, None stops the worker.
+        :param result_queue: Records, statuses, metrics, place claims and task outcomes sent to the parent.
+        :param stop_event: Set by the parent to cut the running task short.
+        :param claim_queue: Answers of the parent to the place claims, None when the worker does not deduplicate.
+    """
+
+    # Ctrl+C is handled by the parent, which stops the workers in order
+    signal(SIGINT, SIG_IGN)
+
+    file_creator = _QueueWriter(result_queue)
+    metrics = MetricsRegistry()
+    page_fetcher = HTTPPageFetcher(pool_size=max(10, settings["enrichment_workers"])) \
+        if settings["enrichment_mode"] == "http" else None
+    enrichment_stage = None
+    if page_fetcher and settings["enrichment_workers"] > 0 and settings["scraper"]["suggested_ext"]:
+        enrichment_stage = EnrichmentStage(downstream=file_creator,
+                                           pattern_scraper=PatternScrapper(page_fetcher=page_fetcher),
+                                           suggested_ext=settings["scraper"]["suggested_ext"],
+                                           unavailable_text=settings["scraper"]["unavailable_text"],
+                                           workers=settings["enrichment_workers"], metrics=metrics)
+
+    browser_backend = create_backend(**settings["browser_backend"])
+    driver_pool = DriverPool(driver_factory=browser_backend.create_driver, size=1, reset_url=GoogleMaps._maps_url,
+                             max_queries=settings["recycle_queries"], max_rss_mb=settings["recycle_rss_mb"])
+    maps_obj = GoogleMaps(**settings["scraper"], print_lock=Lock(), stop_event=stop_event, driver_pool=driver_pool,
+                          file_creator=enrichment_stage or file_creator, page_fetcher=page_fetcher,
+                          defer_enrichment=enrichment_stage is not None, dashboard=_QueueDashboard(result_queue),
+                          place_index=_ParentPlaceIndex(result_queue, claim_queue) if claim_queue else None,
+                          metrics=metrics, worker_name=f"process-{worker_id}")
+
+    try:
+        while True:
+            task = task_queue.get()
+            if task is None:
+                break
+            try:
+                outcome = ("done", run_scraper_task(maps_obj, task, settings["place_mode"],
+                                                    settings["skip_place_ids"]))
+            except Exception as e:
+                outcome = ("failed", f"{type(e).__name__}: {e}")
+            # the records of the task reach the parent before its outcome, a worker that dies later loses none
+            if enrichment_stage:
+                enrichment_stage.drain()
+            # only what happened since the last task, the parent adds it to its registry
+            result_queue.put(("metrics", metrics.snapshot(reset=True)))
+            result_queue.put(outcome)
+    finally:
+        driver_pool.close()
+        if enrichment_stage:
+            enrichment_stage.close()
+        if page_fetcher:
+            page_fetcher.close()
+        result_queue.put(("metrics", metrics.snapshot(reset=True)))
+        result_queue.put(("stopped", None))
+
+
+class ProcessWorker:
+    """
+    Parent side handle of a scrapper running in its own process.
+
+    The process owns its browser, parses and enriches in its own interpreter and sends the finished records
+    back over a queue, so a crash or a fatal error only takes that worker down. A dead worker, one that is
+    still busy `hang_grace` seconds after its task deadline, or one that sent nothing for `silence_timeout`
+    seconds during a task without deadline, is killed and relaunched on the next task. With a place index the
+    worker claims its places in the parent's index, like a scraper thread would; the worker sends every record
+    of a task before its outcome, and the claims of a task that crashed or failed without sending the record of
+    the place are released, so its retry scrapes them again.
+
+    Methods:
+        run_task(self, task, file_creator, dashboard, stop_event):
+            Run one scheduler task in the worker process and forward what it sends back.
+
+        stop(self, file_creator, dashboard, timeout):
+            Let the worker finish its pending records and exit.
+
+        interrupt(self):
+            Ask the running task to stop as soon as possible.
+    """
+
+    def __init__(self, worker_id: int, settings: dict, hang_grace: float = 120.0, silence_timeout: float = 600.0,
+                 metrics: MetricsRegistry = None, place_index: PlaceIndex = None) -> None:
+        """
+        Initialize the worker handle, the process is started by the first task.
+            :param worker_id: Number shown in the stats.
+            :param settings: Plain (picklable) values: "scraper" (GoogleMaps keyword arguments),
+                             "browser_backend" (BrowserBackend.settings), "place_mode", "enrichment_mode",
+                             "enrichment_workers", "recycle_queries", "recycle_rss_mb" and "skip_place_ids".
+            :param hang_grace: Seconds past a task deadline before the worker is considered stuck.
+            :param silence_timeout: Seconds without any message from the worker before it is considered stuck,
+                                    for tasks without deadline.
+            :param metrics: Optional MetricsRegistry the metrics of the worker process are added to.
+            :param place_index: Optional PlaceIndex the worker claims its places in (TAB place mode).
+        """
+
+        self.worker_id = worker_id
+        self._settings = settings
+        self._hang_grace = hang_grace
+        self._silence_timeout = silence_timeout
+        self._metrics = metrics
+        self._place_index = place_index
+        self._context = get_context("spawn")
+        self._process = None
+        self._task_queue = None
+        self._result_queue = None
+        self._claim_queue = None
+        self._task_claims = set()
+        self._stop_event = self._context.Event()
+        self.launches = 0
+        self.tasks_run = 0
+
+    @property
+    def restarts(self) -> int:
+        return max(0, self.launches - 1)
+
+    def _start(self) -> None:
+        self._task_queue = self._context.Queue()
+        self._result_queue = self._context.Queue()
+        self._claim_queue = self._context.Queue() if self._place_index is not None else None
+        self._process = self._context.Process(target=_worker_main, name=f"GMapsWorker-{self.worker_id}",
+                                              args=(self.worker_id, self._settings, self._task_queue,
+                                                    self._result_queue, self._stop_event, self._claim_queue))
+        self._process.start()
+        self.launches += 1
+
+    def _kill(self) -> None:
+        if self._process is not None and self._process.is_alive():
+            self._process.kill()
+            self._process.join(timeout=5)
+        self._process = None
+
+    def _forward(self, message: tuple, file_creator: any, dashboard: any) -> None:
+        kind, payload = message
+        if kind == "records":
+            file_creator.create(list_of_dict_data=payload)
+        elif kind == "status" and dashboard is not None:
+            dashboard.post(**payload)
+        elif kind == "metrics" and self._metrics is not None:
+            self._metrics.merge(payload)
+        elif kind == "claim":
+            place_ids, query = payload
+            claims = self._place_index.claim_many(place_ids, query)
+            self._task_claims.update(place_id for place_id, claimed in zip(place_ids, claims) if claimed)
+            self._claim_queue.put(claims)
+        elif kind == "release":
+            self._place_index.release(payload)
+            self._task_claims.discard(payload)
+        if kind == "records" and self._task_claims:
+            self._task_claims.difference_update(PlaceIndex.canonical_id(data_dict["map_link"])
+                                                for data_dict in payload if data_dict.get("map_link"))
+
+    def _release_task_claims(self) -> None:
+        # places claimed by a task whose record never arrived
+        for place_id in self._task_claims:
+            self._place_index.release(place_id)
+        self._task_claims = set()
+
+    def run_task(self, task: dict, file_creator: any, dashboard: any = None, stop_event: any = None) -> dict:
+        """
+        Run one scheduler task in the worker process and forward what it sends back.
+            :param task: "kind", "query", "source_query", "results_indices" and "deadline" of the task.
+            :param file_creator: Receives the records of the worker (OutputSink or EnrichmentStage).
+            :param dashboard: Receives the statuses of the worker.
+            :param stop_event: Parent stop event, passed on to the worker when set.
+            :return: The outcome of the task: "completed" and, for harvested queries, "place_urls".
+        """
+
+        if self._process is None or not self._process.is_alive():
+            self._start()
+        self.tasks_run += 1
+        self._task_claims = set()
+        self._task_queue.put(task)
+        last_message = time()
+
+        while True:
+            try:
+                message = self._result_queue.get(timeout=0.5)
+            except Empty:
+                if stop_event is not None and stop_event.is_set():
+                    self._stop_event.set()
+                if not self._process.is_alive():
+                    exit_code = self._process.exitcode
+                    self._process = None
+                    self._release_task_claims()
+                    raise WorkerCrashed(f"worker process {self.worker_id} exited with code {exit_code}")
+                if task["deadline"] is not None and time() > task["deadline"] + self._hang_grace:
+                    self._kill()
+                    self._release_task_claims()
+                    raise WorkerCrashed(f"worker process {self.worker_id} stopped responding and was killed")
+                if task["deadline"] is None and time() - last_message > self._silence_timeout:
+                    self._kill()
+                    self._release_task_claims()
+                    raise WorkerCrashed(f"worker process {self.worker_id} sent nothing for "
+                                        f"{self._silence_timeout:.0f}s and was killed")
+                continue
+            last_message = time()
+
+            if message[0] == "done":
+                self._task_claims = set()
+                return message[1]
+            if message[0] == "failed":
+                self._release_task_claims()
+                raise RuntimeError(message[1])
+            self._forward(message, file_creator, dashboard)
+
+    def stop(self, file_creator: any, dashboard: any = None, timeout: float = 60.0) -> None:
+        """
+        Let the worker finish its pending records and exit.
+            :param file_creator: Receives the records still on their way.
+            :param dashboard: Receives the last statuses.
+            :param timeout: Seconds to wait before the worker is killed.
+        """
+
+        if self._process is None:
+            return
+        self._task_queue.put(None)
+        deadline = time() + timeout
+        while time() < deadline:
+            try:
+                message = self._result_queue.get(timeout=0.5)
+            except Empty:
+                if not self._process.is_alive():
+                    break
+                continue
+            if message[0] == "stopped":
+                break
+            self._forward(message, file_creator, dashboard)
+        self._process.join(timeout=5)
+        self._kill()
+
+    def interrupt(self) -> None:
+        """Ask the running task to stop as soon as possible."""
+        self._stop_event.set()
@@ -0,0 +1,174 @@
+from threading import Condition, Event
+from heapq import heappush, heappop
+from itertools import count
+from time import time
+
+
+class ScheduledQuery:
+    """
+    A query (or a harvested place page) handed out by the QueryScheduler.
+
+    Attributes:
+        query (str): The search query or Google Maps URL.
+        priority (int): Higher priorities are handed out first.
+        kind (str): "query" for a search to harvest, "place" for a place page to scrape.
+        source_query (str): For place tasks, the query the page was harvested from.
+        results_indices (list[int]): For place tasks, [number of harvested places, position of this one].
+        attempts (int): How many times the query has already been tried.
+        deadline (float): Epoch time after which the worker should stop the query (None for no limit).
+    """
+
+    def __init__(self, query: str, priority: int = 0, kind: str = "query", source_query: str = None,
+                 results_indices: list[int] = None) -> None:
+        self.query = query
+        self.priority = priority
+        self.kind = kind
+        self.source_query = source_query
+        self.results_indices = results_indices
+        self.attempts = 0
+        self.deadline = None
+
+
+class QueryScheduler:
+    """
+    A shared work queue the scraper threads pull queries from.
+
+    Workers call get() whenever they are free, so a worker stuck on a long query never holds back the
+    others. Queries that raise are requeued up to `max_retries` times and every query ends up counted
+    as processed, timed out or failed.
+
+    Methods:
+        put(self, query, priority):
+            Add a query to the queue.
+
+        put_places(self, source, urls):
+            Queue the place pages harvested for a query.
+
+        get(self, stop_event, timeout):
+            Block until a query is available, return None once all work is finished.
+
+        finished(self):
+            True once every query has been handed out and reported done.
+
+        task_done(self, task, success, timed_out):
+            Report the outcome of a query handed out by get().
+
+        stats(self):
+            Counters of processed, failed, timed out and requeued queries.
+    """
+
+    def __init__(self, max_retries: int = 2, query_timeout: int = 0) -> None:
+        """
+        Initialize the scheduler.
+            :param max_retries: Number of times a failed query is put back in the queue.
+            :param query_timeout: Seconds a worker may spend on a single query (0 disables the limit).
+        """
+
+        self._max_retries = max_retries
+        self._query_timeout = query_timeout
+        self._heap = []
+        self._sequence = count()
+        self._condition = Condition()
+        self._in_flight = 0
+
+        self._total = 0
+        self._processed = 0
+        self._failed = 0
+        self._timed_out = 0
+        self._requeued = 0
+        self._places = 0
+
+    def put(self, query: str, priority: int = 0) -> None:
+        """
+        Add a query to the queue.
+            :param query: The search query.
+            :param priority: Higher priorities are handed out first, equal priorities keep insertion order.
+        """
+
+        with self._condition:
+            self._push(ScheduledQuery(query=query, priority=priority))
+            self._total += 1
+            self._condition.notify()
+
+    def put_places(self, source: ScheduledQuery, urls: list[str]) -> None:
+        """
+        Queue the place pages harvested for a query.
+            :param source: The query task the pages were harvested from.
+            :param urls: Place page URLs, they inherit the query priority and go ahead of queries of that priority.
+        """
+
+        with self._condition:
+            for index, url in enumerate(urls, start=1):
+                self._push(ScheduledQuery(query=url, priority=source.priority, kind="place",
+                                          source_query=source.query, results_indices=[len(urls), index]))
+            self._total += len(urls)
+            self._places += len(urls)
+            self._condition.notify_all()
+
+    def _push(self, task: ScheduledQuery) -> None:
+        # Place pages first so a harvested query is finished before the next one is started
+        heappush(self._heap, (-task.priority, 0 if task.kind == "place" else 1, next(self._sequence), task))
+
+    def get(self, stop_event: Event = None, timeout: float = None) -> ScheduledQuery:
+        """
+        Get the next query to scrape.
+            :param stop_event: Optional event that makes the call return None when set.
+            :param timeout: Optional seconds to wait for a query, None is then returned if none came up.
+            :return: A ScheduledQuery, or None when the queue is drained and no query is in flight.
+        """
+
+        give_up = time() + timeout if timeout is not None else None
+        with self._condition:
+            while True:
+                if stop_event is not None and stop_event.is_set():
+                    return None
+                if self._heap:
+                    task = heappop(self._heap)[-1]
+                    task.attempts += 1
+                    task.deadline = time() + self._query_timeout if self._query_timeout else None
+                    self._in_flight += 1
+                    return task
+                if self._in_flight == 0:
+                    return None
+                if give_up is not None and time() >= give_up:
+                    return None
+                # A query in flight may still fail and be requeued
+                self._condition.wait(timeout=0.5 if give_up is None else max(0.0, min(0.5, give_up - time())))
+
+    def finished(self) -> bool:
+        """True once every query has been handed out and reported done."""
+        with self._condition:
+            return not self._heap and self._in_flight == 0
+
+    def task_done(self, task: ScheduledQuery, success: bool = True, timed_out: bool = False) -> None:
+        """
+        Report the outcome of a query.
+            :param task: The ScheduledQuery returned by get().
+            :param success: False if the query raised, it is requeued while retries are left.
+            :param timed_out: True if the worker stopped the query at its deadline.
+        """
+
+        with self._condition:
+            self._in_flight -= 1
+            if success:
+                self._processed += 1
+                if timed_out:
+                    self._timed_out += 1
+            elif task.attempts <= self._max_retries:
+                self._requeued += 1
+                self._push(task)
+            else:
+                self._failed += 1
+            self._condition.notify_all()
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "total": self._total,
+                "processed": self._processed,
+                "failed": self._failed,
+                "timed_out": self._timed_out,
+                "requeued": self._requeued,
+                "places": self._places,
+                "pending": len(self._heap) + self._in_flight,
+            }
@@ -0,0 +1,250 @@
+from requests.exceptions import RequestException
+from concurrent.futures import ThreadPoolExecutor
+from utils.process_worker import run_scraper_task
+from utils.enrichment_stage import EnrichmentStage
+from utils.web_site_scraper import PatternScrapper
+from utils.google_maps_scraper import GoogleMaps
+from utils.metrics import MetricsRegistry
+from utils.http_fetcher import HTTPPageFetcher
+from threading import Thread, Lock, Event
+from utils.pprints import StatusDashboard
+from utils.output_sink import OutputSink
+from utils.driver_pool import DriverPool
+from socket import gethostname
+from requests import Session
+from functools import partial
+from time import time, sleep
+from os import getpid
+
+
+class CoordinatorClient:
+    """
+    HTTP client of the Coordinator endpoints, retries every call on connection errors but not on a refused token.
+
+    Methods:
+        lease(self, max_tasks):
+            Ask for up to `max_tasks` tasks.
+
+        heartbeat(self, lease_ids):
+            Renew the leases still held.
+
+        send_records(self, records):
+            Send finished records to the coordinator.
+
+        complete(self, lease_id, success, outcome, error):
+            Report the outcome of a leased task.
+
+        goodbye(self):
+            Tell the coordinator this worker has flushed everything and exits.
+    """
+
+    def __init__(self, coordinator_url: str, token: str = None, worker_id: str = None, timeout: float = 30.0,
+                 retries: int = 5) -> None:
+        """
+        Initialize the client.
+            :param coordinator_url: Base URL of the coordinator, e.g. http://10.0.0.5:8765.
+            :param token: Shared token of the coordinator (its -ct), sent with every request.
+            :param worker_id: Name of this worker, hostname and process id by default.
+            :param timeout: Seconds to wait for an answer.
+            :param retries: Attempts per call before the error is raised.
+        """
+
+        if not coordinator_url.startswith("http"):
+            coordinator_url = "http://" + coordinator_url
+        self._base_url = coordinator_url.rstrip("/")
+        self.worker_id = worker_id or f"{gethostname()}-{getpid()}"
+        self._timeout = timeout
+        self._retries = retries
+        self._session = Session()
+        if token:
+            self._session.headers["Authorization"] = f"Bearer {token}"
+
+    def _post(self, path: str, payload: dict) -> dict:
+        payload["worker_id"] = self.worker_id
+        for attempt in range(self._retries):
+            try:
+                response = self._session.post(self._base_url + path, json=payload, timeout=self._timeout)
+                if response.status_code == 401:
+                    raise PermissionError("the coordinator refused the token, pass its -ct/--coordinator-token")
+                response.raise_for_status()
+                return response.json()
+            except RequestException:
+                if attempt == self._retries - 1:
+                    raise
+                sleep(min(30, 2 ** attempt))
+
+    def lease(self, max_tasks: int = 1) -> dict:
+        return self._post("/lease", {"max_tasks": max_tasks})
+
+    def heartbeat(self, lease_ids: list) -> dict:
+        return self._post("/heartbeat", {"lease_ids": lease_ids})
+
+    def send_records(self, records: list[dict]) -> dict:
+        return self._post("/records", {"records": records})
+
+    def complete(self, lease_id: int, success: bool, outcome: dict = None, error: str = None) -> dict:
+        return self._post("/complete", {"lease_id": lease_id, "success": success, "outcome": outcome,
+                                        "error": error})
+
+    def goodbye(self) -> dict:
+        return self._post("/goodbye", {})
+
+    def close(self) -> None:
+        self._session.close()
+
+
+class RemoteRecordWriter:
+    """Output writer of a remote worker, sends each batch of records to the coordinator."""
+
+    def __init__(self, client: CoordinatorClient) -> None:
+        self._client = client
+
+    def create(self, list_of_dict_data: list[dict]) -> None:
+        self._client.send_records(list_of_dict_data)
+
+    def close(self) -> None:
+        ...
+
+
+class RemoteWorker:
+    """
+    A scraping node of a distributed run: leases tasks from a Coordinator and runs them on local browsers.
+
+    Every thread owns a GoogleMaps scrapper on a shared DriverPool, leases tasks (one query or a batch of
+    place pages at a time), runs them exactly like a local worker and reports the outcome. A heartbeat
+    thread keeps the held leases alive, records are batched by a local OutputSink (after the local website
+    enrichment stage) and sent to the coordinator, which writes the output files.
+
+    Methods:
+        run(self):
+            Work until the coordinator has no tasks left.
+
+        stop(self):
+            Stop after the running tasks.
+    """
+
+    def __init__(self, client: CoordinatorClient, scraper_settings: dict, threads: int = 1,
+                 enrichment_mode: str = "http", enrichment_workers: int = 32, recycle_queries: int = 100,
+                 recycle_rss_mb: int = 0, lease_batch: int = 10, poll_interval: float = 2.0,
+                 driver_factory: callable = None, metrics: MetricsRegistry = None, verbose: bool = True) -> None:
+        """
+        Initialize the worker node.
+            :param client: CoordinatorClient connected to the coordinator.
+            :param scraper_settings: GoogleMaps keyword arguments (headless, wait_time, suggested_ext, ...).
+            :param threads: Number of browsers on this node.
+            :param enrichment_mode: "http" or "browser", see FastSearchAlgo.
+            :param enrichment_workers: Websites enriched in parallel on this node.
+            :param recycle_queries: Relaunch a browser after this many search queries (0 to never).
+            :param recycle_rss_mb: Relaunch a browser above this memory in MB (0 to disable).
+            :param lease_batch: Maximum place pages leased at once by a thread.
+            :param poll_interval: Seconds to wait before asking again when no task is available.
+            :param driver_factory: Callable returning a new WebDriver, a Chrome browser by default.
+            :param metrics: Optional MetricsRegistry of this node, see MetricsExporter to publish it.
+            :param verbose: If False, statuses are prefixed with "[Verbose is off]".
+        """
+
+        self._client = client
+        self._scraper_settings = scraper_settings
+        self._threads = max(1, threads)
+        self._lease_batch = lease_batch
+        self._poll_interval = poll_interval
+        self._stop_event = Event()
+        self._held_leases = set()
+        self._held_lock = Lock()
+        self._lease_seconds = 60
+        self.tasks_run = 0
+        self._metrics = metrics or MetricsRegistry()
+
+        self._output_sink = OutputSink(writers=[RemoteRecordWriter(client)], metrics=self._metrics)
+        self._page_fetcher = HTTPPageFetcher(pool_size=max(10, enrichment_workers)) \
+            if enrichment_mode.lower() == "http" else None
+        self._enrichment_stage = None
+        if self._page_fetcher and enrichment_workers > 0 and scraper_settings.get("suggested_ext"):
+            self._enrichment_stage = EnrichmentStage(
+                downstream=self._output_sink, pattern_scraper=PatternScrapper(page_fetcher=self._page_fetcher),
+                suggested_ext=scraper_settings["suggested_ext"],
+                unavailable_text=scraper_settings.get("unavailable_text", "Not Available"), workers=enrichment_workers,
+                metrics=self._metrics
+            )
+        if driver_factory is None:
+            performance_log = scraper_settings.get("network_report", False) or \
+                scraper_settings.get("extraction_mode") == "payload"
+            driver_factory = partial(GoogleMaps.build_chrome_driver, headless=scraper_settings.get("headless", False),
+                                     performance_log=performance_log)
+        self._driver_pool = DriverPool(driver_factory=driver_factory, size=self._threads,
+                                       reset_url=GoogleMaps._maps_url, max_queries=recycle_queries,
+                                       max_rss_mb=recycle_rss_mb)
+        self._dashboard = StatusDashboard(output_format="REMOTE", verbose=verbose)
+
+    def _heartbeats(self) -> None:
+        while not self._stop_event.wait(max(1.0, self._lease_seconds / 3)):
+            with self._held_lock:
+                lease_ids = list(self._held_leases)
+            if lease_ids:
+                try:
+                    self._client.heartbeat(lease_ids)
+                except RequestException:
+                    ...
+
+    def _work(self, thread_id: int) -> None:
+        maps_obj = GoogleMaps(**self._scraper_settings, stop_event=self._stop_event, driver_pool=self._driver_pool,
+                              file_creator=self._enrichment_stage or self._output_sink,
+                              page_fetcher=self._page_fetcher, defer_enrichment=self._enrichment_stage is not None,
+                              dashboard=self._dashboard, metrics=self._metrics,
+                              worker_name=f"{self._client.worker_id}-{thread_id + 1}")
+
+        while not self._stop_event.is_set():
+            reply = self._client.lease(max_tasks=self._lease_batch)
+            self._lease_seconds = reply.get("lease_seconds", self._lease_seconds)
+            if not reply["tasks"]:
+                if reply["finished"]:
+                    return
+                sleep(self._poll_interval)
+                continue
+
+            with self._held_lock:
+                self._held_leases.update(task["lease_id"] for task in reply["tasks"])
+            for task in reply["tasks"]:
+                task["deadline"] = None if task["timeout"] is None else time() + task["timeout"]
+                try:
+                    outcome = run_scraper_task(maps_obj, task, reply["place_mode"])
+                    self._client.complete(task["lease_id"], success=True, outcome=outcome)
+                except RequestException:
+                    raise
+                except Exception as e:
+                    print(f"Exception in thread {thread_id}: {e}")
+                    self._client.complete(task["lease_id"], success=False, error=f"{type(e).__name__}: {e}")
+                finally:
+                    with self._held_lock:
+                        self._held_leases.discard(task["lease_id"])
+                self.tasks_run += 1
+
+    def run(self) -> None:
+        self._output_sink.start()
+        self._dashboard.start()
+        heartbeat_thread = Thread(target=self._heartbeats, name="Heartbeats", daemon=True)
+        heartbeat_thread.start()
+        executor = ThreadPoolExecutor(max_workers=self._threads)
+        try:
+            for future in [executor.submit(self._work, thread_id) for thread_id in range(self._threads)]:
+                future.result()
+        finally:
+            # a lost coordinator stops every thread, not only the one that noticed
+            self._stop_event.set()
+            executor.shutdown(wait=True)
+            self._dashboard.stop()
+            self._driver_pool.close()
+            if self._enrichment_stage:
+                self._enrichment_stage.close()
+            self._output_sink.close()
+            if self._page_fetcher:
+                self._page_fetcher.close()
+            try:
+                self._client.goodbye()
+            except RequestException:
+                ...
+            self._client.close()
+            print(f"[+] Worker {self._client.worker_id}: {self.tasks_run} tasks run")
+
+    def stop(self) -> None:
+        self._stop_event.set()
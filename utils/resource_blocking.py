@@ -0,0 +1,65 @@
+class BlockingProfile:
+    """
+    Resources a Maps browser does not download, grouped in named profiles.
+
+    The scrapers only read the DOM and the `src`/`href` attributes, so image bytes, map tiles, fonts, media,
+    street view thumbnails and analytics beacons are never used. Images are turned off with the Chrome
+    content setting, which covers every tab of the browser, the other categories are blocked with the CDP
+    Network.setBlockedURLs command on the first tab (the only tab in URL place mode). The elements and
+    their attributes stay in the page, only the downloads are dropped.
+
+    Profiles:
+        none:  nothing is blocked.
+        media: images, fonts and audio/video.
+        lean:  media plus map tiles, street view imagery and analytics/logging beacons.
+
+    Methods:
+        chrome_prefs(self):
+            Chrome preferences to set at launch.
+
+        apply(self, driver):
+            Block the URL patterns of the profile on the current tab of a driver.
+    """
+
+    _category_patterns = {
+        "images": ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.ico", "*.googleusercontent.com/*",
+                   "*.ggpht.com/*"],
+        "fonts": ["*fonts.gstatic.com/*", "*.woff", "*.woff2", "*.ttf", "*.otf"],
+        "media": ["*.mp4", "*.webm", "*.m4a", "*.mp3", "*.ogg"],
+        "tiles": ["*/maps/vt?*", "*/maps/vt/*", "*/kh/v=*", "*khms*.google.com/*", "*/maps/rpc/vector*"],
+        "street_view": ["*streetviewpixels-pa.googleapis.com/*", "*cbk*.google.com/*", "*/cbk?*"],
+        "beacons": ["*google-analytics.com/*", "*googletagmanager.com/*", "*doubleclick.net/*", "*/gen_204*",
+                    "*play.google.com/log*", "*/maps/preview/log*", "*/csi?*"],
+    }
+    profiles = {
+        "none": (),
+        "media": ("images", "fonts", "media"),
+        "lean": ("images", "fonts", "media", "tiles", "street_view", "beacons"),
+    }
+
+    def __init__(self, name: str = "none") -> None:
+        """
+        Initialize a blocking profile.
+            :param name: "none", "media" or "lean".
+        """
+
+        self.name = name.lower()
+        if self.name not in self.profiles:
+            raise ValueError(f"Unknown blocking profile: {name}")
+        self.categories = self.profiles[self.name]
+        self.url_patterns = [pattern for category in self.categories
+                             for pattern in self._category_patterns[category]]
+
+    @property
+    def blocks_images(self) -> bool:
+        return "images" in self.categories
+
+    def chrome_prefs(self) -> dict:
+        # 2 = block, the <img> elements keep their src attribute
+        return {"profile.managed_default_content_settings.images": 2} if self.blocks_images else {}
+
+    def apply(self, driver: any) -> None:
+        if not self.url_patterns:
+            return
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.url_patterns})
@@ -0,0 +1,185 @@
+from selenium.common.exceptions import WebDriverException
+from os.path import dirname, abspath, join
+from utils.metrics import MetricsRegistry
+from collections import deque
+from time import perf_counter
+from threading import Lock
+import json
+
+_default_selectors = join(dirname(dirname(abspath(__file__))), "data", "selectors.json")
+
+
+class SelectorRegistry:
+    """
+    The locators of the place page fields, read from a JSON data file, with an ordered fallback chain per field.
+
+    Every lookup tries the locators of a field in order until one matches, and records a hit or a miss (with the
+    lookup time) per locator. A locator that matched in its last `window` lookups counts as working, the working
+    locators are tried first, fastest first, so after a Maps DOM change the fallback that still matches moves to
+    the front instead of every lookup paying for the broken one. Locators are labelled by their position in the
+    file (`gmaps_selector_lookups_total{field, selector, outcome}`), the health report shows which one stopped
+    matching. The file also holds the thresholds of the canary place checked before a run (see check_canary).
+
+    Methods:
+        locators(self, field):
+            (position in the file, by, selector) of the locators of a field, the working ones first.
+
+        lookup(self, driver, field, multiple):
+            Elements of the first locator of a field that matches, without recording it.
+
+        find(self, driver, field, multiple):
+            Elements of the first locator of a field that matches, recorded per locator.
+
+        record(self, field, index, hit, seconds):
+            Record the outcome of one locator.
+
+        record_lookup(self, field, index):
+            Record a lookup that went through the locators in order until one matched.
+
+        health(self):
+            Lookups, hits and mean lookup time per locator.
+
+        check_canary(self, record, unavailable_text):
+            Fill rate of a scraped place against the canary thresholds.
+    """
+
+    def __init__(self, file_path: str = None, metrics: MetricsRegistry = None, window: int = 20) -> None:
+        """
+        Load the selectors.
+            :param file_path: Path of the JSON file (default: data/selectors.json).
+            :param metrics: MetricsRegistry receiving the lookup counters.
+            :param window: Recent lookups per locator that decide whether it is working.
+        """
+
+        self.file_path = file_path or _default_selectors
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        canary = data.get("canary", {})
+        self.canary_fields = canary.get("fields", [])
+        self.canary_min_fill_rate = canary.get("min_fill_rate", 0.5)
+        self.canary_required = canary.get("required", [])
+
+        self._metrics = metrics or MetricsRegistry()
+        self._lock = Lock()
+        self._locators = {}
+        self._order = {}
+        self._stats = {}
+        for field, locators in data.get("fields", {}).items():
+            self._locators[field] = [(by, selector) for by, selector in locators]
+            self._order[field] = list(range(len(locators)))
+            self._stats[field] = [{"lookups": 0, "hits": 0, "seconds": 0.0, "timed": 0,
+                                   "recent": deque(maxlen=window)} for _ in locators]
+
+    def __contains__(self, field: str) -> bool:
+        return field in self._locators
+
+    def _ranked(self, field: str) -> list[int]:
+        # working locators first, by mean hit time (untimed ones after the timed ones), then in file order
+        def key(index: int) -> tuple:
+            stats = self._stats[field][index]
+            working = any(stats["recent"])
+            mean = stats["seconds"] / stats["timed"] if stats["timed"] else float("inf")
+            return 0 if working else 1, mean if working else 0, index
+        return sorted(self._order[field], key=key)
+
+    def locators(self, field: str) -> list[tuple]:
+        with self._lock:
+            return [(index, *self._locators[field][index]) for index in self._order[field]]
+
+    def record(self, field: str, index: int, hit: bool, seconds: float = None) -> None:
+        """
+        Record the outcome of one locator.
+            :param field: The field.
+            :param index: Position of the locator in the file.
+            :param hit: Whether it matched.
+            :param seconds: Time of the lookup, None when it is not known (batch script, waits).
+        """
+
+        with self._lock:
+            stats = self._stats[field][index]
+            stats["lookups"] += 1
+            stats["recent"].append(hit)
+            if hit:
+                stats["hits"] += 1
+                if seconds is not None:
+                    stats["seconds"] += seconds
+                    stats["timed"] += 1
+            self._order[field] = self._ranked(field)
+        self._metrics.inc("gmaps_selector_lookups_total", field=field, selector=str(index),
+                          outcome="hit" if hit else "miss")
+        if seconds is not None:
+            self._metrics.observe("gmaps_selector_seconds", seconds, field=field, selector=str(index))
+
+    def record_lookup(self, field: str, index: int = None) -> None:
+        """
+        Record a lookup that went through the locators in order until one matched.
+            :param field: The field.
+            :param index: Position in the file of the locator that matched, None if none did.
+        """
+
+        for tried, _, _ in self.locators(field):
+            self.record(field, tried, tried == index)
+            if tried == index:
+                break
+
+    def lookup(self, driver: any, field: str, multiple: bool = False) -> tuple[int, any]:
+        """
+        Elements of the first locator of a field that matches, without recording it.
+            :param driver: The WebDriver instance (or a WebElement to search in).
+            :param field: The field.
+            :param multiple: Return every matching element instead of the first one.
+            :return: (position of the matching locator in the file, the element or list of elements),
+                     (None, None) if no locator matches.
+        """
+
+        for index, by, selector in self.locators(field):
+            try:
+                elements = driver.find_elements(by, selector)
+            except WebDriverException:
+                elements = []
+            if elements:
+                return index, elements if multiple else elements[0]
+        return None, None
+
+    def find(self, driver: any, field: str, multiple: bool = False) -> any:
+        """
+        Elements of the first locator of a field that matches, recorded per locator.
+            :param driver: The WebDriver instance (or a WebElement to search in).
+            :param field: The field.
+            :param multiple: Return every matching element instead of the first one.
+            :return: The element (or list of elements), None (or []) if no locator matches.
+        """
+
+        for index, by, selector in self.locators(field):
+            start_time = perf_counter()
+            try:
+                elements = driver.find_elements(by, selector)
+            except WebDriverException:
+                elements = []
+            self.record(field, index, bool(elements), perf_counter() - start_time)
+            if elements:
+                return elements if multiple else elements[0]
+        return [] if multiple else None
+
+    def health(self) -> dict:
+        with self._lock:
+            return {field: [{"selector": index, "locator": self._locators[field][index][1],
+                             "lookups": stats["lookups"], "hits": stats["hits"],
+                             "mean_seconds": stats["seconds"] / stats["timed"] if stats["timed"] else None}
+                            for index, stats in enumerate(field_stats)]
+                    for field, field_stats in self._stats.items()}
+
+    def check_canary(self, record: dict, unavailable_text: str) -> dict:
+        """
+        Fill rate of a scraped place against the canary thresholds.
+            :param record: The output record of the canary place.
+            :param unavailable_text: Placeholder of the missing values.
+            :return: {"fill_rate", "missing" (canary fields without a value), "healthy"}.
+        """
+
+        missing = [field for field in self.canary_fields
+                   if record.get(field, unavailable_text) in (unavailable_text, "", None)]
+        fill_rate = 1 - len(missing) / len(self.canary_fields) if self.canary_fields else 1.0
+        healthy = fill_rate >= self.canary_min_fill_rate and not any(field in missing
+                                                                     for field in self.canary_required)
+        return {"fill_rate": fill_rate, "missing": missing, "healthy": healthy}
@@ -1,8 +1,34 @@
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from utils.output_files_formats import create_file_creator
+from utils.query_scheduler import QueryScheduler, ScheduledQuery
+from utils.browser_backends import BrowserBackend, ChromeBackend
+from utils.checkpoint_journal import CheckpointJournal
+from utils.metrics import MetricsRegistry, MetricsExporter
+from utils.selector_registry import SelectorRegistry
+from utils.wait_policy import WaitPolicy
+from utils.geo_tiling import TilePlanner
+from utils.process_worker import ProcessWorker
+from utils.coordinator import Coordinator
+from utils.output_sink import OutputSink
+from utils.enrichment_stage import EnrichmentStage
+from utils.web_site_scraper import PatternScrapper
 from utils.google_maps_scraper import GoogleMaps
+from utils.http_fetcher import HTTPPageFetcher
+from utils.pprints import StatusDashboard
+from utils.place_index import PlaceIndex
+from utils.driver_pool import DriverPool
 from signal import signal, SIGINT, SIGTERM
+from collections import deque
 from threading import Lock, Event
 from atexit import register
+from time import time
+
+
+class CanaryRecords(list):
+    """File creator keeping the records of the canary place in memory."""
+
+    def create(self, list_of_dict_data: list[dict]) -> None:
+        self.extend(list_of_dict_data)
 
 
 class FastSearchAlgo:
@@ -11,7 +37,32 @@ class FastSearchAlgo:
                  suggested_ext: list = None, output_path: str = "./CSV_FILES", result_range: int = None,
                  workers: int = 1, verbose: bool = True,
                  output_format: str = "CSV",
-                 scroll_minutes: int = 1
+                 scroll_minutes: int = 1,
+                 recycle_queries: int = 100,
+                 recycle_rss_mb: int = 0,
+                 max_retries: int = 2,
+                 query_timeout: int = 0,
+                 extraction_mode: str = "batch",
+                 jsonl_to_array: bool = False,
+                 excel_flush_rows: int = 0,
+                 enrichment_mode: str = "http",
+                 enrichment_workers: int = 32,
+                 place_mode: str = "url",
+                 dedup: bool = True,
+                 resume: bool = False,
+                 execution_mode: str = "thread",
+                 role: str = "standalone",
+                 coordinator_address: str = "0.0.0.0:8765",
+                 coordinator_token: str = None,
+                 browser_backend: BrowserBackend = None,
+                 metrics_port: int = 0,
+                 metrics_file: str = None,
+                 network_report: bool = False,
+                 tile_planner: TilePlanner = None,
+                 adaptive_wait: bool = True,
+                 selector_file: str = None,
+                 canary_mode: str = "warn",
+                 canary_url: str = None
                  ) -> None:
         if suggested_ext is None:
             suggested_ext = ["contact-us", "contact"]
@@ -25,37 +76,306 @@ class FastSearchAlgo:
         self._scroll_minutes = scroll_minutes
         self._verbose = verbose
         self._output_format = output_format
+        self._extraction_mode = extraction_mode
+        self._place_mode = place_mode.lower()
+        self._execution_mode = execution_mode.lower()
+        self._role = role.lower()
+        self._coordinator_address = coordinator_address
+        self._coordinator_token = coordinator_token
+        self._coordinator = None
+        self._browser_backend = browser_backend or ChromeBackend(
+            headless=headless, network_log=network_report or extraction_mode.lower() == "payload")
+        self._recycle_queries = recycle_queries
+        self._recycle_rss_mb = recycle_rss_mb
+        self._enrichment_mode = enrichment_mode.lower()
+        self._enrichment_workers = enrichment_workers
+        self._process_workers = []
+        self._metrics = MetricsRegistry()
+        self._metrics_exporter = None
+        self._network_report = network_report
+        self._tile_planner = tile_planner
+        self._adaptive_wait = adaptive_wait
+        # the worker threads learn the element timeouts together
+        self._wait_policy = WaitPolicy(wait_time=wait_time, metrics=self._metrics, adaptive=adaptive_wait)
+        self._selector_file = selector_file
+        self._selectors = SelectorRegistry(file_path=selector_file, metrics=self._metrics)
+        self._canary_mode = canary_mode.lower()
+        self._canary_url = canary_url
+        self._canary_warning = None
+        if metrics_port or metrics_file:
+            self._metrics_exporter = MetricsExporter(self._metrics, port=metrics_port, json_path=metrics_file)
 
         self._workers = workers
-        self._query_list = list()
+        self._scheduler = QueryScheduler(max_retries=max_retries, query_timeout=query_timeout)
         self._threads_handlers = list()
         self._print_lock = Lock()
+        self._file_lock = Lock()
         self._thread_stop_event = Event()
+        file_writer = create_file_creator(output_format=self._output_format, file_lock=self._file_lock,
+                                          output_path=self._output_path, finalize_array=jsonl_to_array,
+                                          excel_flush_rows=excel_flush_rows)
+        self._journal = CheckpointJournal(output_path=self._output_path, resume=resume)
+        self._place_index = PlaceIndex(output_path=self._output_path) if dedup else None
+        self._output_sink = OutputSink(writers=[file_writer], journal=self._journal, metrics=self._metrics,
+                                       place_index=self._place_index)
+        self._dashboard = StatusDashboard(output_format=self._output_format, progress=self._scheduler.stats,
+                                          verbose=self._verbose)
+        self._page_fetcher = None
+        self._enrichment_stage = None
+        # worker processes and remote workers download and parse the websites themselves
+        if enrichment_mode.lower() == "http" and self._execution_mode != "process" and self._role != "coordinator":
+            self._page_fetcher = HTTPPageFetcher(per_host_limit=4, pool_size=max(10, enrichment_workers))
+            if enrichment_workers > 0 and self._suggested_ext:
+                self._enrichment_stage = EnrichmentStage(
+                    downstream=self._output_sink, pattern_scraper=PatternScrapper(page_fetcher=self._page_fetcher),
+                    suggested_ext=self._suggested_ext, unavailable_text=self._unavailable_text,
+                    workers=enrichment_workers, metrics=self._metrics
+                )
         self._executor = ThreadPoolExecutor(max_workers=self._workers)
+        self._driver_pool = DriverPool(driver_factory=self._create_pool_driver, size=self._workers,
+                                       reset_url=GoogleMaps._maps_url, max_queries=recycle_queries,
+                                       max_rss_mb=recycle_rss_mb)
         super().__init__()
 
     def signal_handler(self, sig, frame):
+        if sig == SIGINT and not self._thread_stop_event.is_set():
+            # the workers finish the place in hand and take no new task, the run then ends and closes the
+            # output as usual, so no scraped record is lost
+            print('[+] Stopping after the places in progress, press Ctrl+C again to exit now')
+            self._thread_stop_event.set()
+            for worker in self._process_workers:
+                worker.interrupt()
+            return
+        self._dashboard.stop()
         print('[+] Exiting and releasing memory')
         self._thread_stop_event.set()
+        for worker in self._process_workers:
+            worker.interrupt()
         self._executor.shutdown(wait=False)  # Shut down threads immediately
+        self._driver_pool.close()
+        if self._enrichment_stage:
+            self._enrichment_stage.close()
+        self._output_sink.close()
+
+    def _create_pool_driver(self):
+        return self._browser_backend.create_driver()
+
+    def print_pool_stats(self):
+        for worker in self._process_workers:
+            print(f"[+] Worker process {worker.worker_id}: tasks={worker.tasks_run} restarts={worker.restarts}")
+        for driver_stats in self._driver_pool.stats():
+            print(f"[+] Driver {driver_stats['driver_id']}: launches={driver_stats['launches']} "
+                  f"reuses={driver_stats['reuses']} launch_time={driver_stats['launch_seconds']}s")
+
+    def print_place_index_stats(self):
+        if self._place_index is None:
+            return
+        stats = self._place_index.stats()
+        print(f"[+] Place index: {stats['known']} known places, {stats['skipped']} already scraped places skipped")
+
+    def print_network_stats(self):
+        if not self._network_report:
+            return
+        totals = {}
+        for counter in self._metrics.snapshot()["counters"]:
+            key = (counter["name"], counter["labels"].get("phase"))
+            totals[key] = totals.get(key, 0) + counter["value"]
+        places = totals.get(("gmaps_places_total", None), 0)
+        place_bytes = totals.get(("gmaps_network_bytes_total", "place"), 0)
+        search_bytes = totals.get(("gmaps_network_bytes_total", "search"), 0)
+        print(f"[+] Network: {place_bytes / 1024 / 1024:.1f} MB for {int(places)} places "
+              f"({place_bytes / 1024 / max(1, places):.0f} KB/place), {search_bytes / 1024 / 1024:.1f} MB of "
+              f"results lists, {int(totals.get(('gmaps_network_requests_total', 'place'), 0))} place requests, "
+              f"{int(totals.get(('gmaps_network_blocked_total', 'place'), 0))} blocked")
+
+    def print_tile_stats(self):
+        if self._tile_planner is None:
+            return
+        stats = self._tile_planner.stats()
+        print(f"[+] Geo tiling: {stats['planned']} tiles, {stats['split']} dense tiles split")
+
+    def print_wait_stats(self):
+        waits = {}
+        for counter in self._metrics.snapshot()["counters"]:
+            if counter["name"] not in ("gmaps_waits_total", "gmaps_wait_saved_seconds_total"):
+                continue
+            probe = waits.setdefault(counter["labels"]["probe"], {"found": 0, "absent": 0, "timeout": 0, "saved": 0})
+            if counter["name"] == "gmaps_waits_total":
+                probe[counter["labels"]["outcome"]] += counter["value"]
+            else:
+                probe["saved"] += counter["value"]
+        for name, probe in sorted(waits.items()):
+            print(f"[+] Waits for {name}: {int(probe['found'])} found, {int(probe['absent'])} skipped on a loaded "
+                  f"page, {int(probe['timeout'])} timed out, {probe['saved']:.1f}s saved")
+
+    def print_selector_health(self):
+        lookups = {}
+        for counter in self._metrics.snapshot()["counters"]:
+            if counter["name"] != "gmaps_selector_lookups_total":
+                continue
+            labels = counter["labels"]
+            selectors = lookups.setdefault(labels["field"], {})
+            selector = selectors.setdefault(int(labels["selector"]), {"hit": 0, "miss": 0})
+            selector[labels["outcome"]] += counter["value"]
+        # a field whose first selector stopped matching, or that no selector matches any more
+        degraded = {field: selectors for field, selectors in lookups.items()
+                    if any(index and selector["hit"] for index, selector in selectors.items())
+                    or not any(selector["hit"] for selector in selectors.values())}
+        print(f"[+] Selectors: {int(sum(s['hit'] + s['miss'] for f in lookups.values() for s in f.values()))} "
+              f"lookups, {len(lookups) - len(degraded)}/{len(lookups)} fields matched by their first selector")
+        for field, selectors in sorted(degraded.items()):
+            print(f"[!] Selectors of {field}: " + ", ".join(
+                f"#{index} {int(selector['hit'])}/{int(selector['hit'] + selector['miss'])} hits"
+                for index, selector in sorted(selectors.items())))
+        if self._canary_warning:
+            print(self._canary_warning)
+
+    def run_canary(self, query_list: list[str]) -> bool:
+        """
+        Scrape one place before the run and check how many of the canary fields it filled.
+
+        The place is --canary-url or the first result of the first query, scraped like any other place but not
+        written. A broken selector set empties the same fields on every place, the canary catches it before
+        thousands of rows of placeholders are written.
+            :param query_list: The queries of the run.
+            :return: False if the run should be aborted (canary mode "abort" and a failed check).
+        """
+
+        if self._canary_mode == "off" or self._role == "coordinator" or not (self._canary_url or query_list):
+            return True
+        records = CanaryRecords()
+        # never drawn, keeps the canary statuses off the terminal
+        maps_obj = GoogleMaps(unavailable_text=self._unavailable_text, headless=self._headless,
+                              wait_time=self._wait_time, output_path=self._output_path, verbose=False,
+                              print_lock=self._print_lock, result_range=1, driver_pool=self._driver_pool,
+                              extraction_mode=self._extraction_mode, file_creator=records, defer_enrichment=True,
+                              dashboard=StatusDashboard(), worker_name="canary", wait_policy=self._wait_policy,
+                              selector_registry=self._selectors)
+        try:
+            place_urls = [self._canary_url] if self._canary_url else maps_obj.harvest_links(query_list[0])
+            if place_urls and not records:
+                maps_obj.scrape_place(place_urls[0], query="canary")
+        except Exception as e:
+            print(f"[-] Canary: the canary place could not be scraped ({type(e).__name__}: {e})")
+            return self._canary_mode != "abort"
+        if not records:
+            print(f"[!] Canary: no place found for {query_list[0]}, the selectors were not checked")
+            return True
 
-    def fast_search_algorithm(self, query_list: list[str]):
-        query_list_range = len(query_list)
-        self._query_list = query_list
+        check = self._selectors.check_canary(records[0], self._unavailable_text)
+        title = records[0].get("title")
+        if title in (None, self._unavailable_text):
+            title = records[0].get("map_link")
+        missing = f" (missing: {', '.join(check['missing'])})" if check["missing"] else ""
+        if check["healthy"]:
+            print(f"[+] Canary: {title}: {check['fill_rate']:.0%} of the canary fields filled{missing}")
+            return True
+        # printed again with the selector health, the dashboard clears the screen in between
+        self._canary_warning = (f"[!] Canary: {title}: only {check['fill_rate']:.0%} of the canary fields filled"
+                                f"{missing}, the selectors of {self._selectors.file_path} probably no longer match "
+                                f"Google Maps")
+        print(self._canary_warning)
+        return self._canary_mode != "abort"
+
+    def print_scheduler_stats(self):
+        stats = self._scheduler.stats()
+        print(f"[+] Processed {stats['processed']}/{stats['total']} tasks ({stats['places']} places, "
+              f"timed out: {stats['timed_out']}, failed: {stats['failed']}, retries: {stats['requeued']})")
+
+    def _queue_queries(self, query_list: list[str], priorities: list[int]) -> None:
+        finished_queries = 0
+        resumed_places = 0
+        pending = deque(zip(query_list, priorities))
+        while pending:
+            query, priority = pending.popleft()
+            if not query:
+                continue
+            # the smaller tiles of a dense tile split by the resumed run
+            pending.extend((tile, priority) for tile in self._journal.split_tiles.get(query, []))
+            state, remaining_places = self._journal.query_state(query)
+            if state == "done":
+                finished_queries += 1
+            elif state == "harvested" and self._place_mode != "tab":
+                # carry on from the places that were not written yet, without scrolling the results again
+                self._scheduler.put_places(ScheduledQuery(query=query, priority=priority), remaining_places)
+                resumed_places += len(remaining_places)
+            else:
+                self._scheduler.put(query, priority=priority)
+
+        if finished_queries or resumed_places:
+            print(f"[+] Resuming: {finished_queries} finished queries skipped, "
+                  f"{resumed_places} places left from harvested queries")
+
+    def fast_search_algorithm(self, query_list: list[str], priorities: list[int] = None) -> bool:
+        if priorities is None:
+            priorities = [0] * len(query_list)
+        if not self.run_canary(query_list):
+            print("[-] Aborting before the run, see the selector file or run with -cm WARN")
+            self._driver_pool.close()
+            if self._enrichment_stage:
+                self._enrichment_stage.close()
+            if self._page_fetcher:
+                self._page_fetcher.close()
+            if self._place_index:
+                self._place_index.close()
+            return False
+        self._queue_queries(query_list, priorities)
         signal(SIGINT, self.signal_handler)
+        self._output_sink.start()
+        self._dashboard.start()
+        if self._metrics_exporter:
+            self._metrics_exporter.start()
 
-        futures = []
-        for thread_index in range(self._workers):
-            future = self._executor.submit(self._start_scrapper_threads, thread_index, query_list_range)
-            futures.append(future)
+        if self._role == "coordinator":
+            self._start_coordinator()
+        else:
+            futures = []
+            worker_loop = self._start_process_threads if self._execution_mode == "process" \
+                else self._start_scrapper_threads
+            for thread_index in range(self._workers):
+                future = self._executor.submit(worker_loop, thread_index)
+                futures.append(future)
 
         register(self.signal_handler, SIGTERM, None)
 
-        for future in as_completed(futures):
-            # This will ensure that if an exception occurred in the thread, it will be raised here.
-            future.result()
+        try:
+            if self._coordinator:
+                self._coordinator.serve_until_finished(stop_event=self._thread_stop_event)
+            else:
+                for future in as_completed(futures):
+                    # This will ensure that if an exception occurred in the thread, it will be raised here.
+                    future.result()
+        finally:
+            if self._coordinator:
+                self._coordinator.stop()
+                stats = self._coordinator.stats()
+            self._dashboard.stop()
+            self._driver_pool.close()
+            if self._enrichment_stage:
+                self._enrichment_stage.close()
+            self._output_sink.close()
+            if self._page_fetcher:
+                self._page_fetcher.close()
+            if self._metrics_exporter:
+                self._metrics_exporter.stop()
+            self.print_pool_stats()
+            self.print_scheduler_stats()
+            self.print_place_index_stats()
+            self.print_tile_stats()
+            self.print_network_stats()
+            self.print_wait_stats()
+            self.print_selector_health()
+            if self._coordinator:
+                print(f"[+] Coordinator: {stats['records_received']} records from {len(stats['workers'])} workers, "
+                      f"{stats['leases_expired']} expired leases")
+            if self._output_sink.records_dropped:
+                print(f"[-] {self._output_sink.records_dropped} scraped records were not written, "
+                      f"the output was closed before they arrived")
+            if self._place_index:
+                self._place_index.close()
+        return True
 
-    def _start_scrapper_threads(self, thread_id: int, query_list_range: int) -> None:
+    def _start_scrapper_threads(self, thread_id: int) -> None:
         maps_obj = GoogleMaps(unavailable_text=self._unavailable_text, headless=self._headless,
                               wait_time=self._wait_time,
                               output_format=self._output_format,
@@ -63,19 +383,148 @@ class FastSearchAlgo:
                               print_lock=self._print_lock,
                               result_range=self._result_range, verbose=self._verbose,
                               stop_event=self._thread_stop_event,
-                              scroll_minutes=self._scroll_minutes
+                              scroll_minutes=self._scroll_minutes,
+                              driver_pool=self._driver_pool,
+                              extraction_mode=self._extraction_mode,
+                              file_creator=self._enrichment_stage or self._output_sink,
+                              page_fetcher=self._page_fetcher,
+                              defer_enrichment=self._enrichment_stage is not None,
+                              dashboard=self._dashboard,
+                              place_index=self._place_index,
+                              metrics=self._metrics,
+                              worker_name=f"worker-{thread_id + 1}",
+                              network_report=self._network_report,
+                              wait_policy=self._wait_policy,
+                              selector_registry=self._selectors
                               )
 
-        range_calculation = query_list_range / self._workers
-        thread_start = thread_id * int(range_calculation)
-        thread_end = thread_start + int(range_calculation)
-
-        for thread_index in range(thread_start, thread_end):
+        while True:
+            task = self._scheduler.get(stop_event=self._thread_stop_event)
+            if task is None:
+                break
             try:
-                maps_obj.start_scrapper(self._query_list[thread_index])
+                completed = self._run_task(maps_obj, task)
             except Exception as e:
                 print(f"Exception in thread {thread_id}: {e}")
+                self._scheduler.task_done(task, success=False)
                 continue
+            self._scheduler.task_done(task, success=True, timed_out=not completed)
+
+    def _run_task(self, maps_obj: GoogleMaps, task: ScheduledQuery) -> bool:
+        if self._place_mode == "tab":
+            completed = maps_obj.start_scrapper(task.query, deadline=task.deadline,
+                                                skip_place_ids=self._journal.written_place_ids)
+            self._split_dense_tile(task, maps_obj.results_found)
+            # the query counts as done once the records of its places are journaled as written by the output
+            if completed:
+                self._journal.record_harvest(task.query, maps_obj.query_places)
+            return completed
+
+        if task.kind == "place":
+            return maps_obj.scrape_place(task.query, query=task.source_query, results_indices=task.results_indices,
+                                         deadline=task.deadline)
+
+        # queued before the query is reported done, so idle workers never see an empty scheduler in between
+        place_urls = maps_obj.harvest_links(task.query, deadline=task.deadline)
+        self._split_dense_tile(task, maps_obj.results_found)
+        # a harvest cut short is not journaled, a resumed run harvests the query again; a single place query
+        # journals its place, it is done once the record is written
+        if maps_obj.results_complete:
+            self._journal.record_harvest(task.query, maps_obj.query_places)
+        self._scheduler.put_places(task, place_urls)
+        return maps_obj.results_complete and (task.deadline is None or time() <= task.deadline)
+
+    def _split_dense_tile(self, task: ScheduledQuery, results_found: int) -> None:
+        # a full results list means the tile probably holds more places than Maps lists, its quarters are
+        # queued before the tile is reported done so the scheduler never runs dry in between
+        if self._tile_planner is None or task.query in self._journal.split_tiles:
+            return
+        tiles = self._tile_planner.subdivide(task.query, results_found)
+        if not tiles:
+            return
+        self._journal.record_split(task.query, tiles)
+        for tile in tiles:
+            self._scheduler.put(tile, priority=task.priority)
+
+    def _process_settings(self) -> dict:
+        return {
+            "scraper": {"unavailable_text": self._unavailable_text, "headless": self._headless,
+                        "wait_time": self._wait_time, "output_format": self._output_format,
+                        "suggested_ext": self._suggested_ext, "output_path": self._output_path,
+                        "result_range": self._result_range, "verbose": self._verbose,
+                        "scroll_minutes": self._scroll_minutes, "extraction_mode": self._extraction_mode,
+                        "network_report": self._network_report, "adaptive_wait": self._adaptive_wait,
+                        "selector_file": self._selector_file},
+            "browser_backend": self._browser_backend.settings,
+            "place_mode": self._place_mode,
+            "enrichment_mode": self._enrichment_mode,
+            "enrichment_workers": max(4, self._enrichment_workers // self._workers) if self._enrichment_workers else 0,
+            "recycle_queries": self._recycle_queries,
+            "recycle_rss_mb": self._recycle_rss_mb,
+            "skip_place_ids": self._journal.written_place_ids if self._place_mode == "tab" else set(),
+        }
+
+    def _start_coordinator(self) -> None:
+        host, _, port = self._coordinator_address.rpartition(":")
+        self._coordinator = Coordinator(scheduler=self._scheduler, file_creator=self._output_sink,
+                                        apply_outcome=self._apply_outcome, place_mode=self._place_mode,
+                                        host=host or "0.0.0.0", port=int(port), dashboard=self._dashboard,
+                                        token=self._coordinator_token)
+        self._coordinator.start()
+        print(f"[+] Coordinator listening on {host or '0.0.0.0'}:{port}")
+        if not self._coordinator_token:
+            print(f"[+] Coordinator token (start the workers with -ct): {self._coordinator.token}")
+
+    def _start_process_threads(self, thread_id: int) -> None:
+        # harvested links are claimed by _apply_outcome, TAB workers claim their places in this process' index
+        worker = ProcessWorker(worker_id=thread_id + 1, settings=self._process_settings(), metrics=self._metrics,
+                               silence_timeout=max(600.0, self._scroll_minutes * 60 + 120.0),
+                               place_index=self._place_index if self._place_mode == "tab" else None)
+        self._process_workers.append(worker)
+        file_creator = self._enrichment_stage or self._output_sink
+
+        try:
+            while True:
+                task = self._scheduler.get(stop_event=self._thread_stop_event)
+                if task is None:
+                    break
+                try:
+                    outcome = worker.run_task({"kind": task.kind, "query": task.query,
+                                               "source_query": task.source_query,
+                                               "results_indices": task.results_indices, "deadline": task.deadline},
+                                              file_creator=file_creator, dashboard=self._dashboard,
+                                              stop_event=self._thread_stop_event)
+                    completed = self._apply_outcome(task, outcome)
+                except Exception as e:
+                    # a crashed worker is relaunched by its next task
+                    print(f"Exception in worker process {worker.worker_id}: {e}")
+                    self._scheduler.task_done(task, success=False)
+                    continue
+                self._scheduler.task_done(task, success=True, timed_out=not completed)
+        finally:
+            worker.stop(file_creator=file_creator, dashboard=self._dashboard)
+
+    def _apply_outcome(self, task: ScheduledQuery, outcome: dict) -> bool:
+        # the place index and the journal live in this process, worker processes and remote workers only
+        # report what they did
+        if task.kind != "place":
+            self._split_dense_tile(task, outcome.get("results_found", 0))
+        # the places scraped are completed in the place index by the output once their records are written
+        if self._place_mode == "tab":
+            if outcome["completed"]:
+                self._journal.record_harvest(task.query, outcome["query_places"])
+        elif task.kind != "place":
+            place_urls = outcome["place_urls"]
+            if self._place_index and place_urls:
+                claims = self._place_index.claim_many([PlaceIndex.canonical_id(url) for url in place_urls],
+                                                      task.query)
+                place_urls = [url for url, claimed in zip(place_urls, claims) if claimed]
+            if outcome["results_complete"]:
+                # the claimed links, or the single place the worker scraped itself
+                query_places = place_urls if outcome["place_urls"] else outcome["query_places"]
+                self._journal.record_harvest(task.query, query_places)
+            self._scheduler.put_places(task, place_urls)
+        return outcome["completed"]
 
     @staticmethod
     def load_query_file(file_name: str):
@@ -0,0 +1,135 @@
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
+from selenium.webdriver.support.ui import WebDriverWait
+from utils.metrics import MetricsRegistry
+from collections import deque
+from time import perf_counter
+from threading import Lock
+
+
+class _PageSettled(Exception):
+    """Raised inside a wait to stop it at once: the page is fully shown and the element is not in it."""
+
+
+class WaitPolicy:
+    """
+    Explicit waits with a timeout per probe, learned from how long the probe took to succeed recently.
+
+    A probe (cover image, about panel, results list...) first waits for the full `wait_time` until it has
+    `warmup` successful waits, then for `factor` times the 95th percentile of its last `window` successes,
+    never less than `min_timeout`. A wait that times out counts as a sample of its timeout, so a probe that
+    keeps timing out quickly grows back towards `wait_time`. A probe can also pass a `settled` check of the
+    page: once the page is fully shown and the element is still missing, the wait stops right away, the
+    element is not coming (such a wait is not a sample of the timeout). Every wait is counted per probe and
+    outcome, with the seconds saved against a full `wait_time` wait.
+
+    Methods:
+        timeout(self, probe):
+            Current timeout of a probe.
+
+        wait(self, driver, probe, condition, settled, required):
+            Wait for a condition with the timeout of its probe.
+    """
+
+    def __init__(self, wait_time: float = 15, metrics: MetricsRegistry = None, adaptive: bool = True,
+                 min_timeout: float = 0.5, factor: float = 3.0, window: int = 50, warmup: int = 5,
+                 poll_frequency: float = 0.2) -> None:
+        """
+        Initialize the policy.
+            :param wait_time: Longest wait, the timeout of every probe before it has learned one.
+            :param metrics: MetricsRegistry receiving the wait counters.
+            :param adaptive: False waits the full wait_time every time and ignores the settled checks.
+            :param min_timeout: Shortest learned timeout (seconds).
+            :param factor: Learned timeout as a multiple of the 95th percentile of the recent waits.
+            :param window: Recent waits kept per probe.
+            :param warmup: Successful waits a probe needs before its timeout is learned.
+            :param poll_frequency: Seconds between two checks of a condition.
+        """
+
+        self._wait_time = wait_time
+        self._metrics = metrics or MetricsRegistry()
+        self._adaptive = adaptive
+        self._min_timeout = min_timeout
+        self._factor = factor
+        self._window = window
+        self._warmup = warmup
+        self._poll_frequency = poll_frequency
+        self._lock = Lock()
+        self._latencies = {}
+        self._successes = {}
+
+    def timeout(self, probe: str) -> float:
+        with self._lock:
+            latencies = sorted(self._latencies.get(probe, ()))
+            successes = self._successes.get(probe, 0)
+        if not self._adaptive or successes < self._warmup or not latencies:
+            return self._wait_time
+        p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+        return min(self._wait_time, max(self._min_timeout, p95 * self._factor))
+
+    def _record(self, probe: str, seconds: float, outcome: str) -> None:
+        # an absent element says nothing about how long a present one takes to show, it is only counted
+        if outcome != "absent":
+            with self._lock:
+                latencies = self._latencies.get(probe)
+                if latencies is None:
+                    latencies = self._latencies[probe] = deque(maxlen=self._window)
+                latencies.append(seconds)
+                if outcome == "found":
+                    self._successes[probe] = self._successes.get(probe, 0) + 1
+        self._metrics.observe("gmaps_wait_seconds", seconds, probe=probe)
+        self._metrics.inc("gmaps_waits_total", probe=probe, outcome=outcome)
+        if outcome != "found":
+            self._metrics.inc("gmaps_wait_saved_seconds_total", max(0.0, self._wait_time - seconds), probe=probe)
+
+    def wait(self, driver: any, probe: str, condition: callable, settled: callable = None,
+             required: bool = False) -> any:
+        """
+        Wait for a condition with the timeout of its probe.
+            :param driver: The WebDriver instance.
+            :param probe: Name of the probe, its timeout is learned separately.
+            :param condition: Expected condition, called with the driver until it returns a truthy value.
+            :param settled: Optional check of the driver, True once the page is fully shown and the condition
+                            can no longer become true.
+            :param required: Wait up to wait_time after a short timeout instead of giving up, and raise if the
+                             condition never came true.
+            :return: The value of the condition, None if it did not come true.
+            :raises TimeoutException: A required condition did not come true within wait_time.
+        """
+
+        timeout = self.timeout(probe)
+        start_time = perf_counter()
+
+        def check(checked_driver: any) -> any:
+            try:
+                value = condition(checked_driver)
+            except (NoSuchElementException, StaleElementReferenceException):
+                value = False
+            if value:
+                return value
+            if self._adaptive and settled is not None and settled(checked_driver):
+                raise _PageSettled()
+            return False
+
+        try:
+            value = WebDriverWait(driver, timeout, poll_frequency=self._poll_frequency).until(check)
+        except _PageSettled:
+            self._record(probe, perf_counter() - start_time, "absent")
+            if required:
+                raise TimeoutException(f"{probe} is not on the page")
+            return None
+        except TimeoutException:
+            value = None
+            if required and timeout < self._wait_time:
+                # a required element that is only slower than usual, not a missing one
+                try:
+                    value = WebDriverWait(driver, self._wait_time - timeout,
+                                          poll_frequency=self._poll_frequency).until(check)
+                except (TimeoutException, _PageSettled):
+                    ...
+            if not value:
+                self._record(probe, perf_counter() - start_time, "timeout")
+                if required:
+                    raise TimeoutException(f"{probe} did not show within {self._wait_time}s")
+                return None
+        self._record(probe, perf_counter() - start_time, "found")
+        return value
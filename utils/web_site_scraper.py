@@ -1,19 +1,110 @@
 from selenium.webdriver.chrome.webdriver import WebDriver
-from urllib.parse import urlparse
+from utils.http_fetcher import HTTPPageFetcher
+from urllib.parse import urlparse, unquote
 from bs4 import BeautifulSoup
-from re import compile
+from re import compile, IGNORECASE
+
+# Optional fast parsers for reading the <a href> values, BeautifulSoup is used when neither is installed
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    try:
+        from selectolax.parser import HTMLParser
+    except ImportError:
+        HTMLParser = None
+try:
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
 
 
 class PatternScrapper:
+    _link_buckets = {"facebook": "facebook_links", "twitter": "twitter_links", "instagram": "instagram_links",
+                     "youtube": "youtube_links", "linkedin": "linkedin_links"}
+
+    def __init__(self, link_parser: str = "auto", page_fetcher: HTTPPageFetcher = None):
+        """
+        Initialize the website pattern scrapper.
+            :param link_parser: Parser used to read the links of a page: "selectolax", "lxml", "soup" or
+                                "auto" for the fastest one installed.
+            :param page_fetcher: Optional HTTP client, pages are then downloaded over HTTP and only the ones
+                                 that need JavaScript are opened in the browser.
+        """
 
-    def __init__(self):
         self._last_opened_handler = None
-        self._email_pattern = compile(r'([a-zA-Z0-9._-]+@[a-zA-Z0-9._-]+\.[a-zA-Z0-9_-]+)*')
-        self._fb_pattern = compile(r'(?:https?://)?(?:www\.)?facebook\.com/\S+')
-        self._twitter_pattern = compile(r'(?:https?://)?(?:www\.)?twitter\.com/\S+')
-        self._insta_pattern = compile(r'(?:https?://)?(?:www\.)?instagram\.com/\S+')
-        self._youtube_pattern = compile(r'(?:https?://)?(?:www\.)?youtube\.com/\S+')
-        self._linkedin_pattern = compile(r'(?:https?://)?(?:www\.)?linkedin\.com/\S+')
+        self._page_fetcher = page_fetcher
+        self._link_parser = self._pick_link_parser(link_parser)
+        # Anchored on the literal "@" so the regex engine can skip straight to candidates,
+        # the local part is then read backwards from the match
+        self._email_pattern = compile(r'@[a-z0-9-]+(?:\.[a-z0-9-]+)*\.[a-z]{2,}', IGNORECASE)
+        self._email_local_chars = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789._%+-")
+        self._cf_email_pattern = compile(r'(?:email-protection#|data-cfemail=["\'])([0-9a-fA-F]{4,})')
+        self._asset_suffixes = (".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".css", ".js")
+        # Sample addresses: the placeholder or prefilled value of a form field and the reserved example domains
+        self._form_field_pattern = compile(r'<(?:input|textarea)\b[^>]*>', IGNORECASE)
+        self._field_value_pattern = compile(r'\b(?:placeholder|value)\s*=\s*(["\'])(.*?)\1', IGNORECASE)
+        self._example_domains = ("example.com", "example.org", "example.net")
+        self._email_address_pattern = compile(r'[a-z0-9._%+-]+@[a-z0-9-]+(?:\.[a-z0-9-]+)*\.[a-z]{2,}', IGNORECASE)
+        self._mailto_separators = compile(r'[,;]')
+        self._percent_escape = compile(r'%[0-9a-f]{2}', IGNORECASE)
+        # Every social network in one pattern, a link lands in the bucket of each network it mentions
+        self._social_pattern = compile(r'(?P<network>facebook|twitter|instagram|youtube|linkedin)\.com/\S')
+
+    @staticmethod
+    def _pick_link_parser(link_parser: str) -> str:
+        link_parser = link_parser.lower()
+        if link_parser == "auto":
+            if HTMLParser is not None:
+                return "selectolax"
+            if lxml_html is not None:
+                return "lxml"
+            return "soup"
+        if link_parser == "selectolax" and HTMLParser is None:
+            raise ImportError("selectolax is not installed (pip install selectolax)")
+        if link_parser == "lxml" and lxml_html is None:
+            raise ImportError("lxml is not installed (pip install lxml)")
+        return link_parser
+
+    def iter_hrefs(self, source: str):
+        """
+        Yield the href of every <a> element of a page, in document order.
+            :param source: Raw HTML of the page.
+        """
+
+        if self._link_parser == "selectolax":
+            for node in HTMLParser(source).css("a[href]"):
+                href = node.attributes.get("href")
+                if href is not None:
+                    yield href
+        elif self._link_parser == "lxml":
+            try:
+                tree = lxml_html.fromstring(source)
+            except Exception as e:
+                _ = e
+                return
+            for href in tree.xpath("//a/@href"):
+                yield str(href)
+        else:
+            for link in BeautifulSoup(source, features="html.parser").find_all("a", href=True):
+                yield link["href"]
+
+    def classify_links(self, source: str) -> dict:
+        """
+        Sort the links of a page into social network and mailto buckets with a single pass over the anchors.
+            :param source: Raw HTML of the page.
+            :return: Bucket name -> list of hrefs in document order.
+        """
+
+        buckets = {bucket: [] for bucket in self._link_buckets.values()}
+        buckets["mailto"] = []
+        for href in self.iter_hrefs(source):
+            if href.lower().startswith("mailto:"):
+                buckets["mailto"].append(href)
+                continue
+            networks = {match.group("network") for match in self._social_pattern.finditer(href)}
+            for network in networks:
+                buckets[self._link_buckets[network]].append(href)
+        return buckets
 
     @staticmethod
     def create_urls(site_url: str, url_ext: list):
@@ -46,6 +137,22 @@ class PatternScrapper:
             driver.switch_to.window(self._last_opened_handler)
         return source_codes
 
+    def get_source_code_http(self, urls: list) -> tuple[list, list]:
+        """
+        Download pages with the HTTP client.
+            :param urls: Page URLs.
+            :return: The page sources, and the URLs that have to be opened in a browser instead.
+        """
+
+        source_codes = []
+        browser_urls = []
+        for page in self._page_fetcher.fetch_all(urls):
+            if page.needs_browser:
+                browser_urls.append(page.url)
+            elif page.text:
+                source_codes.append(page.text)
+        return source_codes, browser_urls
+
     @staticmethod
     def email_decoder(email):
         decoded_mail = ""
@@ -56,65 +163,155 @@ class PatternScrapper:
 
         return decoded_mail
 
-    def _href_emails(self, soup: BeautifulSoup) -> list:
-        email_list = []
-        mail_tos = soup.select('a[href]')
-        for mail in mail_tos:
-            href = mail['href']
-            if "email-protect" in href:
-                email_list.append(self.email_decoder(href.split("#")[1]))
-            elif "mailto" in href:
-                email_list.append(href.removeprefix("mailto:").strip())
+    def extract_emails(self, source: str) -> list:
+        """
+        Find every email address written in a page source, including Cloudflare protected ones. Sample addresses
+        (form field placeholders and values, example.com/.org/.net) are left out.
+            :param source: Raw HTML of the page.
+            :return: Unique addresses in order of first appearance.
+        """
+
+        found = []
+        sample_spans = None
+        for match in self._email_pattern.finditer(source):
+            if sample_spans is None:
+                sample_spans = self._form_field_value_spans(source)
+            if any(start <= match.start() < end for start, end in sample_spans):
+                continue
+            local_start = match.start()
+            while local_start > 0 and match.start() - local_start < 64 and \
+                    source[local_start - 1] in self._email_local_chars:
+                local_start -= 1
+            if local_start < match.start():
+                found.append((local_start, source[local_start:match.end()]))
+
+        if "email-protection" in source or "data-cfemail" in source:
+            for match in self._cf_email_pattern.finditer(source):
+                try:
+                    found.append((match.start(), self.email_decoder(match.group(1))))
+                except ValueError:
+                    continue
+
+        emails = []
+        seen = set()
+        for _, email in sorted(found, key=lambda item: item[0]):
+            email = self._accept_email(email)
+            if email and email.lower() not in seen:
+                seen.add(email.lower())
+                emails.append(email)
+        return emails
+
+    def _accept_email(self, email: str) -> any:
+        """
+        Clean up a candidate address and check it is a real one.
+            :param email: Address found in a page or a mailto: link.
+            :return: The address, None for a malformed or still URL-encoded one, an asset file name or an
+                     example.com/.org/.net address.
+        """
+
+        email = email.strip().strip(".")
+        if not self._email_address_pattern.fullmatch(email) or email.lower().endswith(self._asset_suffixes):
+            return None
+        if self._percent_escape.search(email):
+            # read from an URL-encoded link by the text scan, the decoded address comes from the link itself
+            return None
+        domain = email.rsplit("@", 1)[1].lower()
+        if any(domain == example or domain.endswith("." + example) for example in self._example_domains):
+            return None
+        return email
 
-        return email_list
+    def mailto_emails(self, href: str) -> list:
+        """
+        Addresses of a mailto: link, every recipient of a multi-recipient one.
+            :param href: The href of the link, percent-encoded or not.
+            :return: The accepted addresses, in link order.
+        """
 
-    def get_pattern_data(self, source_codes: list):
+        recipients = unquote(href[len("mailto:"):]).split("?")[0]
+        emails = (self._accept_email(email) for email in self._mailto_separators.split(recipients))
+        return [email for email in emails if email]
+
+    def _form_field_value_spans(self, source: str) -> list:
+        # (start, end) of the placeholder and value attributes of the <input> and <textarea> elements
+        spans = []
+        for tag in self._form_field_pattern.finditer(source):
+            for attribute in self._field_value_pattern.finditer(tag.group(0)):
+                spans.append((tag.start() + attribute.start(2), tag.start() + attribute.end(2)))
+        return spans
+
+    @staticmethod
+    def rank_emails(emails: list, site_url: str = None) -> list:
+        """
+        Order addresses so the ones on the website's own domain come first.
+            :param emails: Unique email addresses.
+            :param site_url: URL of the website the addresses were found on.
+            :return: The same addresses, same-domain first, otherwise in their original order.
+        """
+
+        site_domain = urlparse(site_url).netloc.lower().split(":")[0].removeprefix("www.") if site_url else ""
+        if not site_domain:
+            return emails
+
+        def domain_rank(email):
+            email_domain = email.rsplit("@", 1)[1].lower()
+            if email_domain == site_domain or email_domain.endswith("." + site_domain) or \
+                    site_domain.endswith("." + email_domain):
+                return 0
+            return 1
+
+        return sorted(emails, key=domain_rank)
+
+    def get_pattern_data(self, source_codes: list, site_url: str = None):
         patterns_data = {"site_email": [], "facebook_links": [], "twitter_links": [], "instagram_links": [],
                          "youtube_links": [], "linkedin_links": []}
+        seen_emails = set()
 
         for source in source_codes:
-            soup = BeautifulSoup(source, features="lxml", parser="html.parser")
-
-            site_email = [x for x in str(soup) if self._email_pattern.search(x).group()]
-            if not site_email:
-                href_emails = self._href_emails(soup)
-                site_email.extend(href_emails)
-
-            facebook_links = [link['href'] for link in soup.find_all('a', href=self._fb_pattern)]
-            twitter_links = [link['href'] for link in soup.find_all('a', href=self._twitter_pattern)]
-            instagram_links = [link['href'] for link in soup.find_all('a', href=self._insta_pattern)]
-            youtube_links = [link['href'] for link in soup.find_all('a', href=self._youtube_pattern)]
-            linkedin_links = [link['href'] for link in soup.find_all('a', href=self._linkedin_pattern)]
-
-            patterns_data["site_email"].extend(site_email)
-            patterns_data["facebook_links"].extend(facebook_links)
-            patterns_data["twitter_links"].extend(twitter_links)
-            patterns_data["instagram_links"].extend(instagram_links)
-            patterns_data["youtube_links"].extend(youtube_links)
-            patterns_data["linkedin_links"].extend(linkedin_links)
+            links = self.classify_links(source)
+
+            # percent-encoded mailto: targets are not visible to the plain text scan
+            site_email = self.extract_emails(source)
+            for href in links["mailto"]:
+                site_email.extend(self.mailto_emails(href))
+
+            for email in site_email:
+                if email.lower() not in seen_emails:
+                    seen_emails.add(email.lower())
+                    patterns_data["site_email"].append(email)
+            for bucket in self._link_buckets.values():
+                patterns_data[bucket].extend(links[bucket])
+
+        patterns_data["site_email"] = self.rank_emails(patterns_data["site_email"], site_url)
         return patterns_data
 
+    @staticmethod
+    def unavailable_patterns(unavailable: str = "Not Available") -> dict:
+        return {"site_email": unavailable, "facebook_links": unavailable, "twitter_links": unavailable,
+                "instagram_links": unavailable, "youtube_links": unavailable, "linkedin_links": unavailable}
+
     def find_patterns(self, driver: WebDriver, site_url: str, suggested_ext: list, unavailable: str = "Not Available"):
-        patterns_data = {"site_email": "", "facebook_links": "", "twitter_links": "", "instagram_links": "",
-                         "youtube_links": "", "linkedin_links": ""}
+        patterns_data = self.unavailable_patterns(unavailable)
 
         if site_url == unavailable or suggested_ext == []:
-            for key in patterns_data.keys():
-                patterns_data[key] = unavailable
             return patterns_data
 
         valid_urls = self.create_urls(site_url, suggested_ext)
 
-        self._last_opened_handler = driver.current_window_handle
-        try:
-            sources = self.get_source_code(driver, valid_urls)
-        except Exception as e:
-            _ = e
-            for key in patterns_data.keys():
-                patterns_data[key] = unavailable
-            return patterns_data
+        if self._page_fetcher is not None:
+            sources, browser_urls = self.get_source_code_http(valid_urls)
+        else:
+            sources, browser_urls = [], valid_urls
+
+        if browser_urls and driver is not None:
+            try:
+                self._last_opened_handler = driver.current_window_handle
+                sources.extend(self.get_source_code(driver, browser_urls))
+            except Exception as e:
+                _ = e
+                if not sources:
+                    return patterns_data
 
-        social_data = self.get_pattern_data(sources)
+        social_data = self.get_pattern_data(sources, site_url)
 
         for key in social_data.keys():
             if not social_data[key]: